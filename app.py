@@ -4,14 +4,26 @@ import plotly.graph_objs as go
 import numpy as np
 import dash_bootstrap_components as dbc
 
-from methods import gradient_descent, simplex_method, genetic_algorithm, particle_swarm, bee, immune, bacterial, hybrid
+from methods import gradient_descent, lbfgs, newton, conjugate_gradient, simplex_method, genetic_algorithm, particle_swarm, bee, immune, bacterial, hybrid
 from functions import functions
+import jobs
+from surfaces import SurfaceCache, evaluate_surface
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SOLAR], suppress_callback_exceptions=True, prevent_initial_callbacks='initial_duplicate')
 server = app.server
 
+# Кэш вычисленных поверхностей графика (ключ: метод, функция, границы, разрешение)
+surface_cache = SurfaceCache()
+
+# Допустимое разрешение сетки поверхности
+MIN_RESOLUTION = 10
+MAX_RESOLUTION = 1000
+
 methods = {
     "Градиентный спуск": gradient_descent,
+    "L-BFGS": lbfgs,
+    "Метод Ньютона": newton,
+    "Сопряжённые градиенты": conjugate_gradient,
     "Симплекс-метод": simplex_method,
     "Генетический алгоритм": genetic_algorithm,
     "Алгоритм роя частиц": particle_swarm,
@@ -37,6 +49,10 @@ app.layout = dbc.Container([
     html.H1("Методы оптимизации", className='mt-3'),
     
     dbc.Alert(id='final-result', color="success", className='mt-3'),
+
+    # Текущая фоновая задача оптимизации и таймер опроса её состояния
+    dcc.Store(id='job-store'),
+    dcc.Interval(id='job-interval', interval=500, disabled=True),
     
     dbc.Row([
         dbc.Col([ 
@@ -52,6 +68,10 @@ app.layout = dbc.Container([
         ], md=4),
         
         dbc.Col([ 
+            dbc.InputGroup([
+                dbc.InputGroupText("Разрешение поверхности"),
+                dbc.Input(id='surface-resolution-input', type='number', value=100, min=MIN_RESOLUTION, max=MAX_RESOLUTION)
+            ], className='mb-2'),
             dcc.Graph(id='3d-plot'),
             html.Div(id='results-table', className='mt-3')
         ], md=8)
@@ -65,6 +85,17 @@ app.layout = dbc.Container([
 def update_params(method_name):
     if method_name == "Градиентный спуск":
         return html.Div([ 
+            dbc.InputGroup([ 
+                dbc.InputGroupText("Функция"),
+                dcc.Dropdown(
+                        id="gradient-function-dropdown",
+                        options=[{"label": name, "value": optimization_functions[name]} for name in optimization_functions.keys()],
+                        value="sphere",
+                        clearable=False,
+                        style={'width': '100%'}
+                    )
+            ], className='mb-2'),
+
             dbc.InputGroup([ 
                     dbc.InputGroupText("X₀"), 
                     dbc.Input(id='gradient-x0-input', type='number', value=0)
@@ -102,6 +133,17 @@ def update_params(method_name):
 
                 dbc.Button("Запустить", id='gradient-run-button', color='primary', className='mt-3')
             ]) 
+    elif method_name == "L-BFGS":
+        return local_method_params('lbfgs', [
+            dbc.InputGroup([ 
+                dbc.InputGroupText("Память (пар s, y)"), 
+                dbc.Input(id='lbfgs-memory-input', type='number', value=10)
+            ], className='mb-2')
+        ])
+    elif method_name == "Метод Ньютона":
+        return local_method_params('newton')
+    elif method_name == "Сопряжённые градиенты":
+        return local_method_params('cg')
     elif method_name == "Симплекс-метод":
         return html.Div([ 
             dbc.InputGroup([ 
@@ -559,13 +601,61 @@ def update_params(method_name):
         ])
     return html.Div()
 
+# Параметры локальных методов (L-BFGS, Ньютон, сопряжённые градиенты):
+# функция, начальная точка, точности и число итераций; extra - параметры метода
+def local_method_params(prefix, extra=()):
+    return html.Div([ 
+        dbc.InputGroup([ 
+            dbc.InputGroupText("Функция"),
+            dcc.Dropdown(
+                    id=f"{prefix}-function-dropdown",
+                    options=[{"label": name, "value": optimization_functions[name]} for name in optimization_functions.keys()],
+                    value="rosenbrock",
+                    clearable=False,
+                    style={'width': '100%'}
+                )
+        ], className='mb-2'),
+
+        dbc.InputGroup([ 
+            dbc.InputGroupText("X₀"), 
+            dbc.Input(id=f'{prefix}-x0-input', type='number', value=-1.2)
+        ], className='mb-2'),
+
+        dbc.InputGroup([ 
+            dbc.InputGroupText("Y₀"), 
+            dbc.Input(id=f'{prefix}-y0-input', type='number', value=1)
+        ], className='mb-2'),
+
+        dbc.InputGroup([ 
+            dbc.InputGroupText("Точность ε1 (норма градиента в точке)"), 
+            dbc.Input(id=f'{prefix}-epsilon1-input', type='number', value=1e-6, step=1e-6)
+        ], className='mb-2'),
+
+        dbc.InputGroup([ 
+            dbc.InputGroupText("Точность ε2 (разность значений функций)"), 
+            dbc.Input(id=f'{prefix}-epsilon2-input', type='number', value=1e-8, step=1e-8)
+        ], className='mb-2'),
+
+        dbc.InputGroup([ 
+            dbc.InputGroupText("Макс. итераций"), 
+            dbc.Input(id=f'{prefix}-max-iter-input', type='number', value=100)
+        ], className='mb-2'),
+
+        *extra,
+
+        dbc.Button("Запустить", id=f'{prefix}-run-button', color='primary', className='mt-3')
+    ])
+
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('gradient-run-button', 'n_clicks')],
-    [State('gradient-x0-input', 'value'),
+    [State('gradient-function-dropdown', 'value'),
+     State('gradient-x0-input', 'value'),
      State('gradient-y0-input', 'value'),
      State('gradient-lr-input', 'value'),
      State('gradient-epsilon-input', 'value'),
@@ -574,17 +664,88 @@ def update_params(method_name):
      State('gradient-max-iter-input', 'value')],
      prevent_initial_call=True
 )
-def update_plot_and_table_gradient(n_clicks, x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter):
-    if None in [x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+def update_plot_and_table_gradient(n_clicks, func, x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter):
+    if None in [func, x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter]:
+        return input_error("Пожалуйста, заполните все поля")
     
-    return update_plot_and_table("gradient", gradient_descent.func, *gradient_descent.optimize(x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter))
+    # Аналитический градиент выбранной функции берётся из functions.gradients по имени;
+    # поверхность строится в окрестности начальной точки
+    return start_job("gradient", "methods.gradient_descent:optimize", [x0, y0, lr, epsilon, epsilon1, epsilon2, max_iter], {"grad": func}, function_name=func, options={"bounds": [x0 - 5, x0 + 5, y0 - 5, y0 + 5]})
+
+@app.callback(
+    [Output('3d-plot', 'figure', allow_duplicate=True),
+     Output('results-table', 'children', allow_duplicate=True),
+     Output('final-result', 'children', allow_duplicate=True),
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
+    [Input('lbfgs-run-button', 'n_clicks')],
+    [State('lbfgs-function-dropdown', 'value'),
+     State('lbfgs-x0-input', 'value'),
+     State('lbfgs-y0-input', 'value'),
+     State('lbfgs-epsilon1-input', 'value'),
+     State('lbfgs-epsilon2-input', 'value'),
+     State('lbfgs-max-iter-input', 'value'),
+     State('lbfgs-memory-input', 'value')],
+     prevent_initial_call=True
+)
+def update_plot_and_table_lbfgs(n_clicks, func, x0, y0, epsilon1, epsilon2, max_iter, memory):
+    if None in [func, x0, y0, epsilon1, epsilon2, max_iter, memory]:
+        return input_error("Пожалуйста, заполните все поля")
+
+    return start_job("lbfgs", "methods.lbfgs:optimize", [x0, y0, epsilon1, epsilon2, max_iter], {"grad": func, "memory": memory}, function_name=func, options={"bounds": [x0 - 5, x0 + 5, y0 - 5, y0 + 5]})
 
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
+    [Input('newton-run-button', 'n_clicks')],
+    [State('newton-function-dropdown', 'value'),
+     State('newton-x0-input', 'value'),
+     State('newton-y0-input', 'value'),
+     State('newton-epsilon1-input', 'value'),
+     State('newton-epsilon2-input', 'value'),
+     State('newton-max-iter-input', 'value')],
+     prevent_initial_call=True
+)
+def update_plot_and_table_newton(n_clicks, func, x0, y0, epsilon1, epsilon2, max_iter):
+    if None in [func, x0, y0, epsilon1, epsilon2, max_iter]:
+        return input_error("Пожалуйста, заполните все поля")
+
+    return start_job("newton", "methods.newton:optimize", [x0, y0, epsilon1, epsilon2, max_iter], {"grad": func}, function_name=func, options={"bounds": [x0 - 5, x0 + 5, y0 - 5, y0 + 5]})
+
+@app.callback(
+    [Output('3d-plot', 'figure', allow_duplicate=True),
+     Output('results-table', 'children', allow_duplicate=True),
+     Output('final-result', 'children', allow_duplicate=True),
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
+    [Input('cg-run-button', 'n_clicks')],
+    [State('cg-function-dropdown', 'value'),
+     State('cg-x0-input', 'value'),
+     State('cg-y0-input', 'value'),
+     State('cg-epsilon1-input', 'value'),
+     State('cg-epsilon2-input', 'value'),
+     State('cg-max-iter-input', 'value')],
+     prevent_initial_call=True
+)
+def update_plot_and_table_cg(n_clicks, func, x0, y0, epsilon1, epsilon2, max_iter):
+    if None in [func, x0, y0, epsilon1, epsilon2, max_iter]:
+        return input_error("Пожалуйста, заполните все поля")
+
+    return start_job("cg", "methods.conjugate_gradient:optimize", [x0, y0, epsilon1, epsilon2, max_iter], {"grad": func}, function_name=func, options={"bounds": [x0 - 5, x0 + 5, y0 - 5, y0 + 5]})
+
+@app.callback(
+    [Output('3d-plot', 'figure', allow_duplicate=True),
+     Output('results-table', 'children', allow_duplicate=True),
+     Output('final-result', 'children', allow_duplicate=True),
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('simplex-run-button', 'n_clicks')],
     [
      State('simplex-x1-0-input', 'value'),
@@ -605,15 +766,17 @@ def update_plot_and_table_gradient(n_clicks, x0, y0, lr, epsilon, epsilon1, epsi
 )
 def update_plot_and_table_simplex(n_clicks, x0, y0, x12, x22, x1x2, x1, x2, a1, b1, c1, a2, b2, c2, type):
     if None in [x0, y0, x12, x22, x1x2, x1, x2, a1, b1, c1, a2, b2, c2, type]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+        return input_error("Пожалуйста, заполните все поля")
     
-    return update_plot_and_table("simplex", simplex_method.objective_param([x12, x22, x1x2, x1, x2]), *simplex_method.optimize([x0, y0], [x12, x22, x1x2, x1, x2], [a1, b1, c1, a2, b2, c2] if (any([x != 0 for x in [a1, b1, c1]]) and any([x != 0 for x in [a2, b2, c2]])) else [a1, b1, c1] if (any([x != 0 for x in [a1, b1, c1]]) and all([x == 0 for x in [a2, b2, c2]])) else [a2, b2, c2] if (all([x == 0 for x in [a1, b1, c1]]) and any([x != 0 for x in [a2, b2, c2]])) else [], "minimize" if type=="Минимум" else "maximize"), {'simplex_coefficients': [a1, b1, c1, a2, b2, c2]})
+    return start_job("simplex", "methods.simplex_method:optimize", [[x0, y0], [x12, x22, x1x2, x1, x2], [a1, b1, c1, a2, b2, c2] if (any([x != 0 for x in [a1, b1, c1]]) and any([x != 0 for x in [a2, b2, c2]])) else [a1, b1, c1] if (any([x != 0 for x in [a1, b1, c1]]) and all([x == 0 for x in [a2, b2, c2]])) else [a2, b2, c2] if (all([x == 0 for x in [a1, b1, c1]]) and any([x != 0 for x in [a2, b2, c2]])) else [], "minimize" if type=="Минимум" else "maximize"], options={'simplex_coefficients': [a1, b1, c1, a2, b2, c2], 'objective_coefficients': [x12, x22, x1x2, x1, x2]})
 
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('genetic-run-button', 'n_clicks')],
     [
      State('genetic-function-dropdown', 'value'),
@@ -631,35 +794,31 @@ def update_plot_and_table_simplex(n_clicks, x0, y0, x12, x22, x1x2, x1, x2, a1,
     prevent_initial_call=True
 )
 def update_plot_and_table_genetic(n_clicks, func, chromosome_number, max_iter, x_min, x_max, y_min, y_max, crossover_prob, mutation_prob, mutation_param, operations):
-    func = functions(func)
     if None in [func, chromosome_number, max_iter, x_min, x_max, y_min, y_max, crossover_prob, mutation_prob, mutation_param, operations]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
-
-    # Получаем все 4 значения из optimize
-    history, converged, message, population = genetic_algorithm.optimize(
-        func, 
-        [[x_min, x_max], [y_min, y_max]], 
-        {"crossover": "crossover" in operations, "mutation": "mutation" in operations}, 
-        chromosome_number, 
-        crossover_prob, 
-        mutation_prob, 
-        mutation_param, 
-        max_iter
-    )
+        return input_error("Пожалуйста, заполните все поля")
 
-    return update_plot_and_table(
+    return start_job(
         "genetic", 
-        func, 
-        history, 
-        converged, 
-        message, 
-        {"bounds": [x_min, x_max, y_min, y_max]}
+        "methods.genetic_algorithm:optimize", 
+        [
+            [[x_min, x_max], [y_min, y_max]], 
+            {"crossover": "crossover" in operations, "mutation": "mutation" in operations}, 
+            chromosome_number, 
+            crossover_prob, 
+            mutation_prob, 
+            mutation_param, 
+            max_iter
+        ],
+        function_name=func,
+        options={"bounds": [x_min, x_max, y_min, y_max]}
     )
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('swarm-run-button', 'n_clicks')],
     [
      State('swarm-function-dropdown', 'value'),
@@ -677,20 +836,21 @@ def update_plot_and_table_genetic(n_clicks, func, chromosome_number, max_iter, x
     prevent_initial_call=True
 )
 def update_plot_and_table_swarm(n_clicks, func, swarmsize, max_iter, x_min, x_max, y_min, y_max, velocity, local_velocity, global_velocity, penalty):
-    func = functions(func)
     if None in [func, swarmsize, max_iter, x_min, x_max, y_min, y_max, velocity, local_velocity, global_velocity, penalty]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+        return input_error("Пожалуйста, заполните все поля")
     
     if 0 >= velocity or velocity >= 1:
-        return go.Figure(), "Коэффициент k должен быть в диапазоне (0, 1)", "", "danger"
+        return input_error("Коэффициент k должен быть в диапазоне (0, 1)")
 
-    return update_plot_and_table("swarm", func, *particle_swarm.optimize(func, max_iter, swarmsize, [[x_min, y_min], [x_max, y_max]], velocity, local_velocity, global_velocity, penalty), {"bounds": [x_min, x_max, y_min, y_max]})
+    return start_job("swarm", "methods.particle_swarm:optimize", [max_iter, swarmsize, [[x_min, y_min], [x_max, y_max]], velocity, local_velocity, global_velocity, penalty], function_name=func, options={"bounds": [x_min, x_max, y_min, y_max]})
 
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('bee-run-button', 'n_clicks')],
     [
      State('bee-function-dropdown', 'value'),
@@ -712,20 +872,21 @@ def update_plot_and_table_swarm(n_clicks, func, swarmsize, max_iter, x_min, x_ma
     prevent_initial_call=True
 )
 def update_plot_and_table_bee(n_clicks, func, max_iter, x_min, x_max, y_min, y_max, scoutbees, bestbees, selbees, bestsites, selsites, radius, koeff, tolerance, globaltolerance):
-    func = functions(func)
     if None in [func, max_iter, x_min, x_max, y_min, y_max, scoutbees, bestbees, selbees, bestsites, selsites, radius, koeff, tolerance, globaltolerance]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+        return input_error("Пожалуйста, заполните все поля")
     
     if 0 >= koeff or koeff > 1:
-        return go.Figure(), "Коэффициент изменения участков должен быть в диапазоне (0, 1]", "", "danger"
+        return input_error("Коэффициент изменения участков должен быть в диапазоне (0, 1]")
 
-    return update_plot_and_table("bee", func, *bee.optimize(func, max_iter, scoutbees, selbees, bestbees, bestsites, selsites, radius, koeff, tolerance, globaltolerance, x_min, x_max, y_min, y_max), {"bounds": [x_min, x_max, y_min, y_max]})
+    return start_job("bee", "methods.bee:optimize", [max_iter, scoutbees, selbees, bestbees, bestsites, selsites, radius, koeff, tolerance, globaltolerance, x_min, x_max, y_min, y_max], function_name=func, options={"bounds": [x_min, x_max, y_min, y_max]})
 
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('immune-run-button', 'n_clicks')],
     [
      State('immune-function-dropdown', 'value'),
@@ -744,17 +905,18 @@ def update_plot_and_table_bee(n_clicks, func, max_iter, x_min, x_max, y_min, y_m
     prevent_initial_call=True
 )
 def update_plot_and_table_immune(n_clicks, func, max_iter, population, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps):
-    func = functions(func)
     if None in [func, max_iter, population, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+        return input_error("Пожалуйста, заполните все поля")
 
-    return update_plot_and_table("immune", func, *immune.optimize(func, max_iter, population, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps), {"bounds": [x_min, x_max, y_min, y_max]})
+    return start_job("immune", "methods.immune:optimize", [max_iter, population, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps], function_name=func, options={"bounds": [x_min, x_max, y_min, y_max]})
 
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('bacterial-run-button', 'n_clicks')],
     [
      State('bacterial-function-dropdown', 'value'),
@@ -776,30 +938,31 @@ def update_plot_and_table_immune(n_clicks, func, max_iter, population, x_min, x_
 
 
 def update_plot_and_table_bacterial(n_clicks, func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count):
-    func = functions(func)
     if None in [func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count]:
-        return go.Figure(), "Пожалуйста, заполните все поля", "", "danger"
+        return input_error("Пожалуйста, заполните все поля")
     
     if (population_count % 2) == 1:
-        return go.Figure(), "Количество бактерий в популяции должно быть чётным", "", "danger"
+        return input_error("Количество бактерий в популяции должно быть чётным")
 
     if (n_reproduction > n_chemotaxis) or (n_elimination > n_chemotaxis):
-        return go.Figure(), "Количество репродукций и ликвидаций должно быть не больше общего кол-ва итераций", "", "danger"
+        return input_error("Количество репродукций и ликвидаций должно быть не больше общего кол-ва итераций")
     
     if (elimination_probabilty < 0) or (elimination_probabilty > 1):
-        return go.Figure(), "Вероятность ликвидации должна быть в диапазоне [0;1]", "", "danger"
+        return input_error("Вероятность ликвидации должна быть в диапазоне [0;1]")
     
     if elimination_count > population_count:
-        return go.Figure(), "Кол-во ликвидируемых бактерий не должно превышать общий размер популяции", "", "danger"
+        return input_error("Кол-во ликвидируемых бактерий не должно превышать общий размер популяции")
 
-    return update_plot_and_table("bacterial", func, *bacterial.optimize(func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count), {"bounds": [x_min, x_max, y_min, y_max]})
+    return start_job("bacterial", "methods.bacterial:optimize", [x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count], function_name=func, options={"bounds": [x_min, x_max, y_min, y_max]})
 
 # app.py
 @app.callback(
     [Output('3d-plot', 'figure', allow_duplicate=True),
      Output('results-table', 'children', allow_duplicate=True),
      Output('final-result', 'children', allow_duplicate=True),
-     Output('final-result', 'color', allow_duplicate=True)],
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-store', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
     [Input('hybrid-run-button', 'n_clicks')],
     [State('hybrid-function-dropdown', 'value'),
      State('hybrid-ga-population', 'value'),
@@ -813,29 +976,98 @@ def update_plot_and_table_bacterial(n_clicks, func, x_min, x_max, y_min, y_max,
     prevent_initial_call=True
 )
 def update_hybrid(n_clicks, func, ga_pop, ga_iters, pso_swarm, pso_iters, x_min, x_max, y_min, y_max):
-    func = functions(func)
     bounds = [[x_min, x_max], [y_min, y_max]]
     
-    try:
-        history, converged, message = hybrid.hybrid_optimize(
-            func=func,
-            bounds=bounds,
-            ga_population_size=ga_pop,
-            ga_max_iter=ga_iters,
-            pso_swarmsize=pso_swarm,
-            pso_max_iter=pso_iters
-        )
-    except Exception as e:
-        return go.Figure(), "", f"Ошибка: {str(e)}", "danger"
-    
-    return update_plot_and_table("hybrid", func, history, converged, message, {"bounds": [x_min, x_max, y_min, y_max]})
+    # Ошибки выполнения показываются при опросе задачи (poll_job)
+    return start_job(
+        "hybrid",
+        "methods.hybrid:hybrid_optimize",
+        [bounds],
+        {
+            "ga_population_size": ga_pop,
+            "ga_max_iter": ga_iters,
+            "pso_swarmsize": pso_swarm,
+            "pso_max_iter": pso_iters
+        },
+        function_name=func,
+        options={"bounds": [x_min, x_max, y_min, y_max]}
+    )
+
+# Ответ на некорректные параметры: текущая фоновая задача (если есть) не затрагивается
+def input_error(message):
+    return go.Figure(), message, "", "danger", dash.no_update, dash.no_update
+
+# Методы, которые замеряют время по фазам итерации (methods.profiler)
+PROFILED_METHODS = {'genetic', 'swarm', 'bee', 'immune', 'bacterial', 'hybrid'}
+
+# Названия фаз для вывода результатов
+PHASE_NAMES = {
+    'evaluation': 'вычисление функции',
+    'selection': 'отбор',
+    'variation': 'скрещивание и мутация',
+    'movement': 'перемещение частиц',
+    'chemotaxis': 'хемотаксис',
+    'reproduction': 'репродукция',
+    'elimination': 'элиминация',
+    'site_selection': 'выбор участков',
+    'recruitment': 'отправка пчел',
+    'bookkeeping': 'учёт результатов'
+}
+
+# Запуск метода в фоновом процессе: сразу возвращаем идентификатор задачи и включаем опрос.
+# function_name - имя функции из functions.py, options - параметры отрисовки
+def start_job(method, target, args, kwargs=None, function_name=None, options=None):
+    job_id = jobs.submit(target, args, kwargs, function_name, profile=method in PROFILED_METHODS)
+    job = {'job_id': job_id, 'method': method, 'function': function_name, 'options': options or {}}
+    return dash.no_update, dash.no_update, "Оптимизация выполняется...", "info", job, False
 
-def update_plot_and_table(method, func, history, converged, status_message, options=None, optional_options=None):
+# Целевая функция для построения поверхности
+def plot_function(job):
+    if job['function'] is not None:
+        return functions(job['function'])
+    return simplex_method.objective_param(job['options']['objective_coefficients'])
+
+@app.callback(
+    [Output('3d-plot', 'figure', allow_duplicate=True),
+     Output('results-table', 'children', allow_duplicate=True),
+     Output('final-result', 'children', allow_duplicate=True),
+     Output('final-result', 'color', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True)],
+    [Input('job-interval', 'n_intervals')],
+    [State('job-store', 'data'),
+     State('surface-resolution-input', 'value')],
+    prevent_initial_call=True
+)
+def poll_job(n_intervals, job, resolution):
+    if not job:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, True
+
+    status = jobs.status(job['job_id'])
+    if status['state'] == 'unknown':
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, True
+
+    if status['state'] == 'error':
+        return go.Figure(), "", f"Ошибка: {status['error']}", "danger", True
+
+    func = plot_function(job)
+    # Поверхность зависит только от функции и параметров отрисовки, а не от параметров метода
+    surface_key = (job['method'], job['function'], repr(sorted(job['options'].items())))
+    resolution = int(np.clip(resolution or 100, MIN_RESOLUTION, MAX_RESOLUTION))
+    if status['state'] == 'running':
+        # Промежуточный результат: текущая лучшая точка и число выполненных итераций
+        if not status['history']:
+            return dash.no_update, dash.no_update, "Оптимизация выполняется...", "info", False
+        fig, table, result_message, _ = update_plot_and_table(job['method'], func, status['history'], False, "Выполняется...", job['options'], resolution=resolution, surface_key=surface_key)
+        return fig, table, result_message, "info", False
+
+    return (*update_plot_and_table(job['method'], func, status['history'], status['converged'], status['message'], job['options'], resolution=resolution, surface_key=surface_key, stats=status['stats'], profile=status['profile']), True)
+
+# surface_key - ключ кэша поверхностей (без него поверхность вычисляется заново),
+# stats - счётчики вычислений целевой функции (Objective.stats),
+# profile - время по фазам итерации (Profiler.stats)
+def update_plot_and_table(method, func, history, converged, status_message, options=None, optional_options=None, resolution=100, surface_key=None, stats=None, profile=None):
     if options is None:
         options = {}
-    
-    if 'optional_history' not in options:
-        options['optional_history'] = []
         
     if history:
         final = history[-1]
@@ -850,26 +1082,43 @@ def update_plot_and_table(method, func, history, converged, status_message, opti
             html.Br(),
             f"Состояние: {status_message}"
         ]
+        if stats is not None:
+            result_message += [
+                html.Br(),
+                f"Вычислений функции: {stats['evaluations']} ({stats['time']:.3f} сек)"
+            ]
+        if profile:
+            result_message += [html.Br(), html.Strong("Время по фазам:")]
+            for name, phase in profile.items():
+                result_message += [
+                    html.Br(),
+                    f"{PHASE_NAMES.get(name, name)}: {phase['time']:.3f} сек ({phase['share']:.0%}, {phase['count']} раз)"
+                ]
         color = "success" if converged else "warning"
     else:
         result_message = "Не удалось выполнить оптимизацию"
         color = "danger"
     
-    x = np.linspace(0, 20, 100)
-    y = np.linspace(0, 20, 100)
-    if method in ['genetic', 'swarm', 'bee', 'immune', 'bacterial','hybrid']:
+    x_range, y_range = (0, 20), (0, 20)
+    if method in ['gradient', 'lbfgs', 'newton', 'cg', 'genetic', 'swarm', 'bee', 'immune', 'bacterial','hybrid']:
         x_min, x_max, y_min, y_max = options["bounds"]
-        x = np.linspace(x_min, x_max, 100)
-        y = np.linspace(y_min, y_max, 100)
-    X, Y = np.meshgrid(x, y)
-    Z = func(X, Y)
+        x_range, y_range = (x_min, x_max), (y_min, y_max)
+
+    def surface(key, surface_func):
+        compute = lambda: evaluate_surface(surface_func, x_range, y_range, resolution)
+        if surface_key is None:
+            return compute()
+        return surface_cache.get((surface_key, key, resolution), compute)
+
+    x, y, Z = surface('objective', func)
     
-    trajectory_x = [point['x'] for point in history]
-    trajectory_y = [point['y'] for point in history]
-    trajectory_z = [point['f_value'] for point in history]
+    # Колонки истории - представления массивов без копирования
+    trajectory_x = history.x
+    trajectory_y = history.y
+    trajectory_z = history.f_value
     
     fig = go.Figure(data=[ 
-        go.Surface(x=X, y=Y, z=Z, colorscale='Viridis', opacity=0.8),
+        go.Surface(x=x, y=y, z=Z, colorscale='Viridis', opacity=0.8),
         go.Scatter3d(
             x=trajectory_x,
             y=trajectory_y,
@@ -885,13 +1134,13 @@ def update_plot_and_table(method, func, history, converged, status_message, opti
         
         if any([x !=0 for x in [a1, b1, c1]]):
             func1 = lambda x1, x2: a1*x1 + b1*x2 - c1
-            Z1 = func1(X, Y)
-            fig.add_trace(go.Surface(x=X, y=Y, z=Z1, colorscale='Reds', opacity=0.4))
+            _, _, Z1 = surface('constraint1', func1)
+            fig.add_trace(go.Surface(x=x, y=y, z=Z1, colorscale='Reds', opacity=0.4))
 
         if any([x != 0 for x in [a2, b2, c2]]):
             func2 = lambda x1, x2: a2*x1 + b2*x2 - c2
-            Z2 = func2(X, Y)
-            fig.add_trace(go.Surface(x=X, y=Y, z=Z2, colorscale='Blues', opacity=0.4))
+            _, _, Z2 = surface('constraint2', func2)
+            fig.add_trace(go.Surface(x=x, y=y, z=Z2, colorscale='Blues', opacity=0.4))
 
     fig.update_layout(
         scene=dict(
@@ -909,28 +1158,10 @@ def update_plot_and_table(method, func, history, converged, status_message, opti
         {'name': 'f(x,y)', 'id': 'f_value'}, 
     ]
 
-    formatted_history = [
-        {
-            'iteration': item['iteration'],
-            'x': round(item['x'], 4),
-            'y': round(item['y'], 4),
-            'f_value': round(item['f_value'], 4),
-            
-        }
-        for item in history
-    ]
+    formatted_history = history.table_rows(4)
     
-    if method == 'gradient':
+    if method in ['gradient', 'lbfgs', 'newton', 'cg']:
         columns.append({'name': 'Норма градиента', 'id': 'grad_norm'})
-        formatted_optional_history = [{
-                'grad_norm': round(item['grad_norm'], 4) if 'grad_norm' in item else 0
-            }
-            for item in options['optional_history']
-        ]
-        if len(formatted_optional_history) < len(formatted_history):
-            formatted_optional_history.extend([{'grad_norm': 0}] * (len(formatted_history) - len(formatted_optional_history)))
-        for i in range(len(formatted_history)):
-            formatted_history[i]['grad_norm'] = formatted_optional_history[i]['grad_norm']
 
     table = dash_table.DataTable(
         id='results-datatable',
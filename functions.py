@@ -1,10 +1,13 @@
 import numpy as np
 
+# Функции принимают координаты точки отдельными аргументами: f(x, y) или f(x1, ..., xn).
+# Каждая координата может быть числом или массивом NumPy (вычисление сразу для многих точек).
+# Розенброк, Растригин и сфера заданы в N-мерной форме, остальные - двумерные
 def functions(function_name):
     s = function_name.lower()
     match s:
         case "rosenbrock":
-            return lambda x, y: (1-x)**2 + 100*((y-x**2)**2)
+            return lambda *x: sum((1-x[i])**2 + 100*((x[i+1]-x[i]**2)**2) for i in range(len(x)-1))
         case "bukin":
             return lambda x, y: 100*np.sqrt(abs(y-0.01*(x**2))) + 0.01*abs(x+10)
         case "himmelblau":
@@ -12,10 +15,75 @@ def functions(function_name):
         case "isom":
             return lambda x, y: -np.cos(x)*np.cos(y)*np.exp(-((x-np.pi)**2 + (y-np.pi)**2))
         case "rastrigin":
-            return lambda x, y: 20 + (x**2 - 10*np.cos(2*np.pi*x)) + (y**2 - 10*np.cos(2*np.pi*y))
+            return lambda *x: 10*len(x) + sum(xi**2 - 10*np.cos(2*np.pi*xi) for xi in x)
         case "goldstein_price":
             return lambda x, y: (1 + ((x+y+1)**2)*(19-14*x+3*(x**2)-14*y+6*x*y+3*(y**2)))*(30 + ((2*x-3*y)**2)*(18-32*x+12*(x**2)+48*y-36*x*y+27*(y**2)))
         case "cross_in_tray":
             return lambda x, y: -0.0001 * ((abs(np.sin(x)*np.sin(y)*np.exp(abs(100 - (np.sqrt(x**2+y**2)/np.pi)))) + 1)**0.1)
         case "sphere":
-            return lambda x, y: x**2 + y**2
\ No newline at end of file
+            return lambda *x: sum(xi**2 for xi in x)
+
+# Аналитические градиенты функций: принимают координаты так же, как сами функции,
+# и возвращают массив частных производных (D,) - или (D, M), если координаты - массивы из M точек.
+# Для функций без градиента возвращается None (тогда методы используют конечные разности)
+def gradients(function_name):
+    s = function_name.lower()
+    match s:
+        case "rosenbrock":
+            def rosenbrock(*x):
+                grad = [0*xi for xi in x]
+                for i in range(len(x)-1):
+                    grad[i] = grad[i] - 2*(1-x[i]) - 400*x[i]*(x[i+1]-x[i]**2)
+                    grad[i+1] = grad[i+1] + 200*(x[i+1]-x[i]**2)
+                return np.array(grad)
+            return rosenbrock
+        case "bukin":
+            def bukin(x, y):
+                u = y - 0.01*(x**2)
+                # В точках u = 0 модуль недифференцируем - берём нулевую производную
+                du = 50*np.sign(u) / np.sqrt(np.maximum(abs(u), 1e-300))
+                return np.array([-0.02*x*du + 0.01*np.sign(x+10), du])
+            return bukin
+        case "himmelblau":
+            return lambda x, y: np.array([
+                4*x*(x**2 + y - 11) + 2*(x + y**2 - 7),
+                2*(x**2 + y - 11) + 4*y*(x + y**2 - 7)
+            ])
+        case "isom":
+            def isom(x, y):
+                e = np.exp(-((x-np.pi)**2 + (y-np.pi)**2))
+                return np.array([
+                    e*np.cos(y)*(np.sin(x) + 2*(x-np.pi)*np.cos(x)),
+                    e*np.cos(x)*(np.sin(y) + 2*(y-np.pi)*np.cos(y))
+                ])
+            return isom
+        case "rastrigin":
+            return lambda *x: np.array([2*xi + 20*np.pi*np.sin(2*np.pi*xi) for xi in x])
+        case "goldstein_price":
+            def goldstein_price(x, y):
+                s, t = x+y+1, 2*x-3*y
+                p = 19-14*x+3*(x**2)-14*y+6*x*y+3*(y**2)
+                q = 18-32*x+12*(x**2)+48*y-36*x*y+27*(y**2)
+                a = 1 + (s**2)*p
+                b = 30 + (t**2)*q
+                da = 2*s*p + (s**2)*(-14+6*x+6*y)  # одинакова по x и y
+                db_dx = 4*t*q + (t**2)*(-32+24*x-36*y)
+                db_dy = -6*t*q + (t**2)*(48-36*x+54*y)
+                return np.array([da*b + a*db_dx, da*b + a*db_dy])
+            return goldstein_price
+        case "cross_in_tray":
+            def cross_in_tray(x, y):
+                r = np.maximum(np.sqrt(x**2+y**2), 1e-300)
+                v = 100 - r/np.pi
+                e = np.exp(abs(v))
+                h = np.sin(x)*np.sin(y)*e
+                # Производная внешней части: -0.0001 * 0.1 * (|h| + 1)^(-0.9) * sign(h)
+                outer = -0.00001 * ((abs(h) + 1)**-0.9) * np.sign(h)
+                dv = -np.sign(v) / (np.pi*r)  # d|v|/dr, делённая на r
+                return np.array([
+                    outer*e*(np.cos(x)*np.sin(y) + np.sin(x)*np.sin(y)*dv*x),
+                    outer*e*(np.sin(x)*np.cos(y) + np.sin(x)*np.sin(y)*dv*y)
+                ])
+            return cross_in_tray
+        case "sphere":
+            return lambda *x: np.array([2*xi for xi in x])
@@ -0,0 +1,112 @@
+import os
+import time
+import uuid
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from functions import functions
+from methods.history import History
+from methods.objective import Objective
+from methods.profiler import Profiler
+
+# Фоновое выполнение оптимизаций в локальном пуле процессов.
+# submit() сразу возвращает идентификатор задачи, а status() отдаёт
+# промежуточную историю, которую процесс-исполнитель присылает через очередь
+
+# Как часто (сек) исполнитель отправляет накопленные записи истории
+PROGRESS_INTERVAL = 0.25
+
+_executor = None
+_manager = None
+_jobs = {}
+
+
+def _get_executor():
+    global _executor, _manager
+    if _executor is None:
+        _manager = multiprocessing.Manager()
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _executor
+
+
+# Выполняется в процессе пула. target - "модуль:функция" метода оптимизации,
+# function_name - имя функции из functions.py (лямбды нельзя передать между процессами),
+# она подставляется первым аргументом метода (в обёртке Objective, считающей вычисления).
+# С profile=True методу передаётся Profiler, и вместе с результатом возвращается время по фазам
+def _run(target, function_name, args, kwargs, queue, profile=False):
+    module_name, attr = target.split(':')
+    optimize = getattr(importlib.import_module(module_name), attr)
+    objective = None
+    if function_name is not None:
+        objective = Objective(functions(function_name))
+        args = (objective,) + tuple(args)
+
+    if queue is not None:
+        rows = []
+        last_flush = time.monotonic()
+
+        def callback(row):
+            nonlocal last_flush
+            rows.append((int(row['iteration']), row['position'].tolist(), float(row['f_value'])))
+            if time.monotonic() - last_flush >= PROGRESS_INTERVAL:
+                queue.put(rows.copy())
+                rows.clear()
+                last_flush = time.monotonic()
+
+        kwargs = dict(kwargs, callback=callback)
+
+    profiler = None
+    if profile:
+        profiler = Profiler()
+        kwargs = dict(kwargs, profiler=profiler)
+
+    history, converged, message = optimize(*args, **kwargs)[:3]
+    stats = objective.stats() if objective is not None else None
+    return history, converged, message, stats, profiler.stats() if profiler is not None else None
+
+
+def submit(target, args=(), kwargs=None, function_name=None, progress=True, profile=False):
+    executor = _get_executor()
+    queue = _manager.Queue() if progress else None
+    job_id = uuid.uuid4().hex
+    future = executor.submit(_run, target, function_name, tuple(args), kwargs or {}, queue, profile)
+    _jobs[job_id] = {'future': future, 'queue': queue, 'history': History()}
+    return job_id
+
+
+# Перенос присланных исполнителем записей в промежуточную историю задачи
+def _drain(job):
+    queue = job['queue']
+    if queue is None:
+        return
+    while not queue.empty():
+        for iteration, position, f_value in queue.get_nowait():
+            job['history'].append(iteration, position, f_value)
+
+
+# Состояние задачи: 'running' (с промежуточной историей), 'done' (с итоговым
+# результатом метода, счётчиками вычислений функции и временем по фазам), 'error' или 'unknown'.
+# Завершённая задача отдаётся один раз
+def status(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return {'state': 'unknown'}
+
+    _drain(job)
+    future = job['future']
+    if not future.done():
+        return {'state': 'running', 'history': job['history']}
+
+    del _jobs[job_id]
+    try:
+        history, converged, message, stats, profile = future.result()
+    except Exception as e:
+        return {'state': 'error', 'error': str(e), 'history': job['history']}
+    return {'state': 'done', 'history': history, 'converged': converged, 'message': message, 'stats': stats, 'profile': profile}
+
+
+def cancel(job_id):
+    job = _jobs.pop(job_id, None)
+    if job is not None:
+        job['future'].cancel()
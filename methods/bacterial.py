@@ -1,67 +1,29 @@
 # Импорт необходимых библиотек
-import random  # для генерации случайных чисел
-import copy    # для глубокого копирования объектов
 import numpy as np  # для работы с массивами и математических операций
+from .evaluation import evaluate  # пакетное вычисление целевой функции
+from .bounds import resolve_bounds  # границы поиска любой размерности
+from .history import History  # запись истории оптимизации
+from .profiler import phases  # замер времени по фазам
+from .stream import counted, state, collect  # пошаговый режим
+from .checkpoint import restore  # контрольные точки
+
+# Класс, представляющий популяцию бактерий.
+# Состояние колонии хранится массивами: позиции и направления движения (N, D),
+# здоровье, значения функции и флаги улучшения (N,). Хемотаксис - один векторный
+# шаг кувырка/плавания для всей колонии, репродукция - выборка строк по индексам
+class BacterialPopulation:
+    def __init__(self, func, minval, maxval, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count, rng=None, profiler=None, initial_positions=None, state=None, initial_values=None):
+        # Генератор случайных чисел популяции
+        self.rng = np.random.default_rng(rng)
+        # Замер фаз шага (methods.profiler): хемотаксис, репродукция, элиминация, учёт результатов
+        self.phase = phases(profiler)
 
-# Класс, представляющий одну бактерию
-class Bacteria:
-    def __init__(self, func, x_min, x_max, y_min, y_max):
-        # Установка границ пространства поиска
-        self.minval = [x_min, y_min]  # минимальные значения по осям x и y
-        self.maxval = [x_max, y_max]  # максимальные значения по осям x и y
-
-        # Генерация случайной начальной позиции бактерии в заданных границах
-        self.position = np.array([random.uniform(self.minval[i], self.maxval[i]) for i in range(2)])
-
-        # Целевая функция, которую нужно оптимизировать
+        # Целевая функция (вычисляется сразу для всей популяции)
         self.func = func
 
-        # Здоровье бактерии (сумма значений функции за все шаги)
-        self.health = func(*self.position)
-        # Текущее значение функции в позиции бактерии
-        self.func_value = self.health
-
-        # Флаг, улучшила ли бактерия свое положение на последнем шаге
-        self.improved_last_step = True
-
-        # Вектор движения бактерии (случайное направление)
-        self.movement_vector = np.random.rand(2)
-        # Норма вектора движения (для нормализации)
-        self.movement_vector_norm = np.linalg.norm(self.movement_vector)
-
-    def move(self, chemotaxis_step):
-        # Если на предыдущем шаге не было улучшения, генерируем новый случайный вектор движения
-        if not(self.improved_last_step):
-            self.movement_vector = np.random.rand(2)
-            self.movement_vector_norm = np.linalg.norm(self.movement_vector)
-
-        # Обновление позиции бактерии с учетом шага хемотаксиса
-        self.position += chemotaxis_step * self.movement_vector / self.movement_vector_norm
-
-        # Ограничение позиции бактерии заданными границами
-        self.position[0] = np.clip(self.position[0], self.minval[0], self.maxval[0])
-        self.position[1] = np.clip(self.position[1], self.minval[1], self.maxval[1])
-
-        # Вычисление нового значения функции
-        new_func_value = self.func(*self.position)
-        # Обновление здоровья бактерии (накапливаем значения функции)
-        self.health += new_func_value
-
-        # Обновление флага improved_last_step в зависимости от того, улучшилось ли значение функции
-        if new_func_value > self.func_value:
-            self.improved_last_step = False
-        else:
-            self.improved_last_step = True
-        
-        # Сохранение нового значения функции
-        self.func_value = new_func_value
-
-
-# Класс, представляющий популяцию бактерий
-class BacterialPopulation:
-    def __init__(self, func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count):
-        # Создание начальной популяции бактерий
-        self.population = [Bacteria(func, x_min, x_max, y_min, y_max) for _ in range(population_count)]
+        # Установка границ пространства поиска
+        self.minval = np.array(minval, dtype=float)  # минимальные значения по каждой координате
+        self.maxval = np.array(maxval, dtype=float)  # максимальные значения по каждой координате
 
         # Шаг хемотаксиса (размер шага при движении)
         self.chemotaxis_step = chemotaxis_step
@@ -74,6 +36,10 @@ class BacterialPopulation:
         # Величина, на которую будет уменьшаться шаг хемотаксиса
         self.chemotaxis_step_reduction = chemotaxis_step / n_chemotaxis
 
+        # Индексы бактерий, перемещённых элиминацией на последнем шаге
+        # (их значения функции станут известны после следующего хемотаксиса)
+        self.eliminated = np.empty(0, dtype=int)
+
         # Порог для активации элиминации (минимальное количество репродукций)
         self.elimination_threshold = elimination_threshold
 
@@ -81,24 +47,110 @@ class BacterialPopulation:
         self.elimination_probabilty = elimination_probabilty
         self.elimination_count = elimination_count
 
+        # Сохранённое состояние популяции (см. get_state) заменяет начальное
+        if state is not None:
+            self.set_state(state)
+            return
+
+        # Генерация случайных начальных позиций бактерий в заданных границах
+        self.positions = self.rng.uniform(self.minval, self.maxval, (population_count, len(self.minval)))
+        # Первые бактерии - в заданных начальных точках (например, решениях прошлого запуска),
+        # initial_values - известные значения функции в них
+        known = np.empty(0)
+        if initial_positions is not None:
+            initial_positions = np.clip(np.array(initial_positions, dtype=float)[:population_count], self.minval, self.maxval)
+            self.positions[:len(initial_positions)] = initial_positions
+            if initial_values is not None:
+                known = np.array(initial_values, dtype=float)[:len(initial_positions)]
+
+        # Единичные векторы движения бактерий (случайные направления)
+        self.directions = self.random_directions(population_count)
+
+        # Текущие значения функции в позициях бактерий и здоровье
+        # (сумма значений функции за все шаги)
+        self.func_values = np.concatenate((known, evaluate(self.func, self.positions[len(known):])))
+        self.health = self.func_values.copy()
+
+        # Флаги, улучшила ли бактерия свое положение на последнем шаге
+        self.improved_last_step = np.ones(population_count, dtype=bool)
+
         # Лучшее значение функции и позиция среди всей популяции
-        self.best_func = self.population[0].func_value
-        self.best_pos = self.population[0].position.copy()
+        self.best_func = self.func_values[0]
+        self.best_pos = self.positions[0].copy()
 
         # Счетчики выполненных операций
         self.chemotaxiss_completed = 0
         self.reproductions_completed = 0
         self.eliminations_completed = 0
 
-    
+    # Состояние популяции для контрольной точки (methods.checkpoint),
+    # включая текущий шаг хемотаксиса и счетчики операций
+    def get_state(self):
+        return {
+            'positions': self.positions,
+            'directions': self.directions,
+            'func_values': self.func_values,
+            'values': self.known_values(),
+            'health': self.health,
+            'improved_last_step': self.improved_last_step,
+            'chemotaxis_step': self.chemotaxis_step,
+            'best_func': self.best_func,
+            'best_pos': self.best_pos,
+            'chemotaxiss_completed': self.chemotaxiss_completed,
+            'reproductions_completed': self.reproductions_completed,
+            'eliminations_completed': self.eliminations_completed
+        }
+
+    def set_state(self, state):
+        self.positions = np.array(state['positions'], dtype=float)
+        self.directions = np.array(state['directions'], dtype=float)
+        self.func_values = np.array(state['func_values'], dtype=float)
+        self.health = np.array(state['health'], dtype=float)
+        self.improved_last_step = np.array(state['improved_last_step'], dtype=bool)
+        self.chemotaxis_step = state['chemotaxis_step']
+        self.best_func = state['best_func']
+        self.best_pos = np.array(state['best_pos'], dtype=float)
+        self.chemotaxiss_completed = state['chemotaxiss_completed']
+        self.reproductions_completed = state['reproductions_completed']
+        self.eliminations_completed = state['eliminations_completed']
+
+    # Значения целевой функции в текущих позициях всех бактерий
+    def evaluate(self):
+        return evaluate(self.func, self.positions)
+
+    # Известные значения функции в текущих позициях (NaN - у перемещённых элиминацией)
+    def known_values(self):
+        if len(self.eliminated) == 0:
+            return self.func_values
+        values = self.func_values.copy()
+        values[self.eliminated] = np.nan
+        return values
+
+    # Случайные единичные векторы движения (кувырок) для count бактерий
+    def random_directions(self, count):
+        directions = self.rng.uniform(-1.0, 1.0, (count, len(self.minval)))
+        norms = np.linalg.norm(directions, axis=1, keepdims=True)
+        return directions / np.where(norms > 0, norms, 1.0)
+
     def chemotaxis(self):
         # Проверка, не превышено ли максимальное количество шагов хемотаксиса
         if self.chemotaxiss_completed >= self.n_chemotaxis:
             return
 
-        # Движение каждой бактерии в популяции
-        for bacteria in self.population:
-            bacteria.move(self.chemotaxis_step)
+        # Бактерии, не улучшившие положение на предыдущем шаге, выбирают новое направление
+        tumble = ~self.improved_last_step
+        self.directions[tumble] = self.random_directions(np.count_nonzero(tumble))
+
+        # Плавание: сдвиг всех бактерий на шаг хемотаксиса с ограничением границами
+        self.positions += self.chemotaxis_step * self.directions
+        np.clip(self.positions, self.minval, self.maxval, out=self.positions)
+
+        # Вычисление новых значений функции для всей популяции одним вызовом
+        values = self.evaluate()
+        # Обновление здоровья (накапливаем значения функции) и флагов улучшения
+        self.health += values
+        self.improved_last_step = ~(values > self.func_values)
+        self.func_values = values
 
         # Уменьшение шага хемотаксиса
         self.chemotaxis_step -= self.chemotaxis_step_reduction
@@ -111,24 +163,24 @@ class BacterialPopulation:
         if self.reproductions_completed >= self.n_reproduction:
             return
 
-        # Сортировка популяции по здоровью (лучшие - в начале списка)
-        self.population.sort(key=lambda x: x.health)
+        # Репродукция: лучшая по здоровью половина бактерий делится на две одинаковые
+        survivors = np.argsort(self.health, kind='stable')[:len(self.health)//2]
+        index = np.repeat(survivors, 2)
 
-        new_population = []
-
-        # Репродукция: каждая лучшая половина бактерий делится на две одинаковые
-        for i in range(len(self.population)//2):
-            new_population.extend([copy.deepcopy(self.population[i]), copy.deepcopy(self.population[i])])
-        
         # Замена старой популяции новой
-        self.population = new_population
+        self.positions = self.positions[index]
+        self.directions = self.directions[index]
+        self.func_values = self.func_values[index]
+        self.health = self.health[index]
+        self.improved_last_step = self.improved_last_step[index]
 
         # Увеличение счетчика выполненных репродукций
         self.reproductions_completed += 1
 
     def elimination(self):
+        self.eliminated = np.empty(0, dtype=int)
         # Генерация случайного числа для проверки вероятности элиминации
-        q = random.random()
+        q = self.rng.random()
         # Проверка условий для элиминации:
         # 1. Выполнено достаточно репродукций
         # 2. Случайное число меньше вероятности элиминации
@@ -137,52 +189,94 @@ class BacterialPopulation:
             return
         
         # Элиминация: замена случайных бактерий новыми со случайными позициями
-        for _ in range(self.elimination_count):
-            i = np.random.randint(0, len(self.population))
-            self.population[i].position = np.array([random.uniform(self.population[i].minval[j], self.population[i].maxval[j]) for j in range(2)])
+        index = self.rng.integers(0, len(self.positions), self.elimination_count)
+        self.positions[index] = self.rng.uniform(self.minval, self.maxval, (len(index), len(self.minval)))
+        self.eliminated = index
 
         # Увеличение счетчика выполненных элиминаций
         self.eliminations_completed += 1
 
     def next_step(self):
         # Выполнение одного полного цикла: хемотаксис, репродукция, элиминация
-        self.chemotaxis()
-        self.reproduction()
-        self.elimination()
-
-        # Обновление лучшего решения
-        for bacteria in self.population:
-            if bacteria.func_value < self.best_func:
-                self.best_func = bacteria.func_value
-                self.best_pos = bacteria.position.copy()
-
-
-# Основная функция оптимизации
-def optimize(func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count):
-    # История оптимизации (для сохранения результатов на каждом шаге)
-    history = []
+        with self.phase('chemotaxis'):
+            self.chemotaxis()
+        with self.phase('reproduction'):
+            self.reproduction()
+        with self.phase('elimination'):
+            self.elimination()
+
+        # Обновление лучшего решения (точки, где функция не определена, пропускаются,
+        # как и перенесённые элиминацией бактерии - их значения ещё не вычислены)
+        with self.phase('bookkeeping'):
+            values = self.known_values()
+            values = np.where(np.isnan(values), np.inf, values)
+            best = np.argmin(values)
+            if values[best] < self.best_func:
+                self.best_func = values[best]
+                self.best_pos = self.positions[best].copy()
+
+
+# Пошаговый режим (methods.stream): после каждого шага отдаётся состояние
+# с лучшим решением и позициями всех бактерий
+# Границы поиска: x_min, x_max, y_min, y_max для двумерной задачи
+# или bounds - пары [min, max] по каждой координате для задачи любой размерности.
+# initial_positions - начальные позиции первых бактерий (например, methods.checkpoint.warm_start),
+# initial_values - известные значения функции в них,
+# checkpoint - контрольная точка (methods.checkpoint.Checkpoint), resume - продолжение
+# работы с сохранённого состояния (путь к файлу или methods.checkpoint.load)
+def iterate(func, x_min=None, x_max=None, y_min=None, y_max=None, population_count=100, n_chemotaxis=100, n_reproduction=100, n_elimination=50, chemotaxis_step=0.1, elimination_threshold=30, elimination_probabilty=0.25, elimination_count=3, bounds=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
+    # Границы поиска в виде векторов нижних и верхних значений
+    minval, maxval = resolve_bounds(bounds, x_min, x_max, y_min, y_max)
+    # Подсчёт вычислений и общие критерии остановки (methods.termination)
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    rng = seed if rng is None else rng
+    # Продолжение работы: популяция, генератор и счётчики из контрольной точки
+    saved = None if resume is None else restore(resume, 'bacterial')
+    completed = 0
+    if saved is not None:
+        rng, completed = saved['rng'], saved['iteration']
+        start_evaluations -= saved['evaluations']
     # Создание популяции бактерий с заданными параметрами
-    population = BacterialPopulation(func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count)
+    population = BacterialPopulation(func, minval, maxval, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step, elimination_threshold, elimination_probabilty, elimination_count, rng, profiler, initial_positions, saved, initial_values)
+
+    # Состояние для контрольной точки
+    def snapshot():
+        return dict(method='bacterial', rng=population.rng, evaluations=func.evaluations - start_evaluations, **population.get_state())
 
     # Флаги и сообщения о статусе оптимизации
     converged = False
     message = "Достигнуто максимальное количество итераций"
 
     # Основной цикл оптимизации
-    for i in range(n_chemotaxis):
+    for i in range(completed, n_chemotaxis):
         population.next_step()
-
-        # Сохранение текущего лучшего решения в историю
-        history.append({
-            'iteration': i+1,
-            'x': population.best_pos[0],
-            'y': population.best_pos[1],
-            'f_value': population.best_func
-        })
-
-    # Установка флага и сообщения об успешном завершении
-    converged = True
-    message = "Оптимум найден"
+        completed = i+1
+
+        with population.phase('bookkeeping'):
+            stop = termination is not None and termination.check(population.best_func)
+        # Текущее лучшее решение
+        yield state(i+1, population.best_pos, population.best_func, func.evaluations - start_evaluations, population.positions, population.known_values())
+        if stop:
+            converged, message = termination.converged, termination.reason
+            break
+        # Сохранение состояния каждые checkpoint.every шагов
+        if checkpoint is not None:
+            checkpoint.step(completed, snapshot)
+
+    # Состояние в конце работы сохраняется всегда
+    if checkpoint is not None:
+        checkpoint.save(completed, **snapshot())
     
-    # Возврат истории оптимизации, флага сходимости и сообщения
-    return history, converged, message
\ No newline at end of file
+    # Флаг сходимости и сообщение
+    return converged, message
+
+
+# Основная функция оптимизации: история оптимизации, флаг сходимости и сообщение
+def optimize(func, x_min=None, x_max=None, y_min=None, y_max=None, population_count=100, n_chemotaxis=100, n_reproduction=100, n_elimination=50, chemotaxis_step=0.1, elimination_threshold=30, elimination_probabilty=0.25, elimination_count=3, bounds=None, callback=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
+    # История оптимизации (для сохранения результатов на каждом шаге)
+    history = History(capacity=n_chemotaxis, callback=callback)
+    converged, message = collect(iterate(func, x_min, x_max, y_min, y_max, population_count, n_chemotaxis, n_reproduction, n_elimination, chemotaxis_step,
+                                         elimination_threshold, elimination_probabilty, elimination_count, bounds, seed, rng, termination, profiler,
+                                         initial_positions, checkpoint, resume, initial_values), history)
+    return history, converged, message
@@ -1,69 +1,19 @@
-import random, math
+import math
+import numpy as np
 import time
+from .evaluation import evaluate
+from .bounds import resolve_bounds
+from .history import History
+from .profiler import phases
+from .stream import counted, state, collect
+from .checkpoint import restore
 
-# Класс Bee представляет отдельную пчелу в алгоритме пчелиной колонии
-class Bee:
-    def __init__(self, func, x_min, x_max, y_min, y_max):
-        # Минимальные и максимальные значения для координат x и y
-        self.minval = [x_min, y_min]
-        self.maxval = [x_max, y_max]
-        
-        # Инициализация случайной позиции пчелы в заданных границах
-        self.position = [random.uniform(self.minval[i], self.maxval[i]) for i in range(2)]
-        
-        # Фитнес-функция (значение целевой функции в текущей позиции)
-        self.fitness = 0.0
-        
-        # Целевая функция, которую нужно оптимизировать
-        self.func = func
-    
-    # Вычисление значения фитнес-функции в текущей позиции
-    def calcFitness(self):
-        self.fitness = self.func(*self.position)
-    
-    # Проверка, находится ли пчела на другом участке, отличном от пчел в bee_list
-    def otherPatch(self, bee_list, radius):
-        if len(bee_list) == 0:
-            return True
-        
-        self.calcFitness()
-        for bee in bee_list:
-            bee.calcFitness()
-            pos = bee.getPosition()
-            for i in range(2):
-                # Если расстояние по любой координате превышает радиус, участки считаются разными
-                if abs(self.position[i] - pos[i]) > radius:
-                    return True
-                
-        return False
-    
-    # Получение текущей позиции пчелы
-    def getPosition(self):
-        return [val for val in self.position]
-    
-    # Перемещение пчелы в окрестность другой позиции (в пределах заданного радиуса) лучший или выбранный участок
-    def goto(self, otherpos, radius):
-        self.position = [otherpos[n] + random.uniform(-radius, radius) for n in range(len(otherpos))]
-        self.checkPosition()
-        self.calcFitness()
-    
-    # Случайное перемещение пчелы в пределах границ поиска(используется для разведчиков)
-    def gotorandom(self):
-        self.position = [random.uniform(self.minval[i], self.maxval[i]) for i in range(2)]
-        self.checkPosition()
-        self.calcFitness()
-    
-    # Проверка и корректировка позиции, чтобы она не выходила за границы поиска
-    def checkPosition(self):
-        for n in range(len(self.position)):
-            if self.position[n] < self.minval[n]:
-                self.position[n] = self.minval[n]
-            elif self.position[n] > self.maxval[n]:
-                self.position[n] = self.maxval[n]
-
-# Класс Hive представляет всю пчелиную колонию и управляет ее поведением
+# Класс Hive представляет всю пчелиную колонию и управляет ее поведением.
+# Позиции и значения фитнес-функции всех пчел хранятся массивами (N, D) и (N,),
+# поэтому за итерацию целевая функция вызывается один раз для всех переместившихся пчел,
+# а разделение участков проверяется векторно по расстоянию Чебышёва
 class Hive:
-    def __init__(self, scoutbee_count, selectedbee_count, bestbee_count, selectedsites_count, bestsites_count, radius, func, x_min, x_max, y_min, y_max):
+    def __init__(self, scoutbee_count, selectedbee_count, bestbee_count, selectedsites_count, bestsites_count, radius, func, minval, maxval, rng=None, profiler=None, initial_positions=None, state=None, initial_values=None):
         # Параметры алгоритма:
         self.scoutbee_count = scoutbee_count       # Количество пчел-разведчиков
         self.selectedbee_count = selectedbee_count # Количество пчел для выбранных участков
@@ -72,128 +22,202 @@ class Hive:
         self.bestsites_count = bestsites_count     # Количество лучших участков
         self.radius = radius                       # Радиус поиска вокруг участка
         self.func = func                           # Целевая функция
-        
-        # Лучшая найденная позиция и ее значение
-        self.best_position = None
-        self.best_fitness = math.inf
-        
-        # Создание роя пчел
+        self.rng = np.random.default_rng(rng)      # Генератор случайных чисел улья
+        self.phase = phases(profiler)              # Замер фаз итерации (methods.profiler)
+
+        # Минимальные и максимальные значения для каждой координаты
+        self.minval = np.array(minval, dtype=float)
+        self.maxval = np.array(maxval, dtype=float)
+
+        # Индексы пчел, отмеченных как лучшие и выбранные участки
+        self.bestsites = np.empty(0, dtype=int)
+        self.selectedsites = np.empty(0, dtype=int)
+
+        # Сохранённое состояние улья (см. getState) - рой не создаётся заново
+        if state is not None:
+            self.setState(state)
+            return
+
+        # Создание роя пчел: случайные позиции в заданных границах,
+        # первые пчелы - в точках initial_positions, если они заданы
+        # (initial_values - известные значения функции в них, не вычисляются повторно)
         bee_count = scoutbee_count + selectedbee_count * selectedsites_count + bestbee_count * bestsites_count
-        self.swarm = [Bee(func, x_min, x_max, y_min, y_max) for _ in range(bee_count)]
-        
-        # Инициализация списков лучших и выбранных участков
-        self.bestsites = []
-        self.selectedsites = []
-        
+        self.positions = self.rng.uniform(self.minval, self.maxval, (bee_count, len(self.minval)))
+        known = np.empty(0)
+        if initial_positions is not None:
+            initial_positions = np.clip(np.array(initial_positions, dtype=float)[:bee_count], self.minval, self.maxval)
+            self.positions[:len(initial_positions)] = initial_positions
+            if initial_values is not None:
+                known = np.array(initial_values, dtype=float)[:len(initial_positions)]
+                known = np.where(np.isnan(known), math.inf, known)
+        self.fitness = np.concatenate((known, self.calcFitness(self.positions[len(known):])))
+
         # Сортировка пчел по значению фитнес-функции и сохранение лучшего результата
-        self.swarm.sort(key=lambda x: x.fitness)
-        self.best_position = self.swarm[0].getPosition()
-        self.best_fitness = self.swarm[0].fitness
-    
-    # Отправка пчел на указанный участок
-    def sendBees(self, position, index, count):
-        for i in range(count):
-            if index == len(self.swarm):
+        self.sortSwarm()
+
+    # Состояние улья для контрольной точки (methods.checkpoint), включая текущий радиус
+    def getState(self):
+        return {
+            'positions': self.positions,
+            'values': self.fitness,
+            'radius': self.radius,
+            'best_position': self.best_position,
+            'best_fitness': self.best_fitness
+        }
+
+    def setState(self, state):
+        self.positions = np.array(state['positions'], dtype=float)
+        self.fitness = np.array(state['values'], dtype=float)
+        self.radius = state['radius']
+        self.best_position = np.array(state['best_position'], dtype=float)
+        self.best_fitness = state['best_fitness']
+
+    # Вычисление фитнес-функции сразу для переданных позиций одним вызовом целевой функции
+    def calcFitness(self, positions):
+        values = evaluate(self.func, positions)
+        # Точки, где функция не определена (NaN), считаются худшими
+        return np.where(np.isnan(values), math.inf, values)
+
+    # Сортировка пчел по значению фитнес-функции (лучшая - первая)
+    def sortSwarm(self):
+        order = np.argsort(self.fitness, kind='stable')
+        self.positions = self.positions[order]
+        self.fitness = self.fitness[order]
+        self.best_position = self.positions[0].copy()
+        self.best_fitness = self.fitness[0]
+
+    # Поиск участков: пчелы просматриваются по возрастанию фитнеса, и пчела становится
+    # новым участком, если по расстоянию Чебышёва она дальше радиуса от всех уже выбранных.
+    # После выбора участка одной векторной операцией исключаются все пчелы в его окрестности
+    def findSites(self):
+        available = np.ones(len(self.positions), dtype=bool)
+        sites = []
+        index = 0
+        while len(sites) < self.bestsites_count + self.selectedsites_count:
+            candidates = np.flatnonzero(available[index:])
+            if len(candidates) == 0:
                 break
-            
-            bee = self.swarm[index]
-            # Отправляем только тех пчел, которые еще не на участках
-            if not(bee in self.bestsites) and not(bee in self.selectedsites):
-                bee.goto(position, self.radius)
-            index += 1
-        
-        return index 
-    
+            index += candidates[0]
+            sites.append(index)
+            available &= np.abs(self.positions - self.positions[index]).max(axis=1) > self.radius
+
+        sites = np.array(sites, dtype=int)
+        self.bestsites = sites[:self.bestsites_count]
+        self.selectedsites = sites[self.bestsites_count:]
+
     # Выполнение одной итерации алгоритма
     def nextIteration(self):
-        # Пересчет фитнес-функции для всех пчел
-        for bee in self.swarm:
-            bee.calcFitness()
-        
-        # Сортировка пчел по значению фитнес-функции
-        self.swarm.sort(key=lambda x: x.fitness)
-        self.best_position = self.swarm[0].getPosition()
-        self.best_fitness = self.swarm[0].fitness
-        
-        # Выбор лучших участков
-        self.bestsites = [self.swarm[0]]
-        self.selectedsites = []
-        
-        # Поиск лучших участков (непересекающихся в пределах радиуса)
-        curr_index = 1
-        while curr_index < len(self.swarm) and len(self.bestsites) < self.bestsites_count:
-            bee = self.swarm[curr_index]
-            if bee.otherPatch(self.bestsites, self.radius):
-                self.bestsites.append(bee)
-            curr_index += 1
-        
-        # Поиск выбранных участков (непересекающихся с лучшими и между собой)
-        while curr_index < len(self.swarm) and len(self.selectedsites) < self.selectedsites_count:
-            bee = self.swarm[curr_index]
-            if bee.otherPatch(self.bestsites, self.radius) and bee.otherPatch(self.selectedsites, self.radius):
-                self.selectedsites.append(bee)
-            curr_index += 1
-        
-        # Отправка пчел на лучшие участки
-        bee_index = 1
-        for best_bee in self.bestsites:
-            bee_index = self.sendBees(best_bee.getPosition(), bee_index, self.bestbee_count)
-        
-        # Отправка пчел на выбранные участки
-        for sel_bee in self.selectedsites:
-            bee_index = self.sendBees(sel_bee.getPosition(), bee_index, self.selectedbee_count)
-        
-        # Оставшиеся пчелы отправляются на случайный поиск
-        for bee in self.swarm[bee_index:-1]:
-            bee.gotorandom()  
+        with self.phase('site_selection'):
+            self.findSites()
 
-# Основная функция оптимизации
-def optimize(func, maxiter, scoutbee_count, selectedbee_count, bestbee_count, bestsites_count, selectedsites_count, radius, koeff, tolerance, globaltolerance, x_min, x_max, y_min, y_max,verbose=True):
+        with self.phase('recruitment'):
+            # Пчелы-участки остаются на месте, остальные по порядку отправляются к участкам
+            recruits = np.ones(len(self.positions), dtype=bool)
+            recruits[self.bestsites] = False
+            recruits[self.selectedsites] = False
+            recruits = np.flatnonzero(recruits)
+
+            # Центры окрестностей для отправляемых пчел: сначала лучшие участки, затем выбранные
+            targets = np.concatenate([
+                np.repeat(self.positions[self.bestsites], self.bestbee_count, axis=0),
+                np.repeat(self.positions[self.selectedsites], self.selectedbee_count, axis=0)
+            ])
+            sent = min(len(targets), len(recruits))
+            shift = self.rng.uniform(-self.radius, self.radius, (sent, self.positions.shape[1]))
+            self.positions[recruits[:sent]] = targets[:sent] + shift
+
+            # Оставшиеся пчелы отправляются на случайный поиск
+            scouts = recruits[sent:]
+            self.positions[scouts] = self.rng.uniform(self.minval, self.maxval, (len(scouts), self.positions.shape[1]))
+
+            # Проверка и корректировка позиций, чтобы они не выходили за границы поиска
+            np.clip(self.positions, self.minval, self.maxval, out=self.positions)
+
+        # Фитнес пересчитывается только для переместившихся пчел
+        with self.phase('evaluation'):
+            self.fitness[recruits] = self.calcFitness(self.positions[recruits])
+        with self.phase('bookkeeping'):
+            self.sortSwarm()
+
+# Пошаговый режим (methods.stream): после каждой итерации отдаётся состояние
+# с лучшей пчелой и позициями всех пчел (отсортированы по фитнесу)
+# Границы поиска: x_min, x_max, y_min, y_max для двумерной задачи
+# или bounds - пары [min, max] по каждой координате для задачи любой размерности.
+# initial_positions - начальные позиции первых пчел (например, methods.checkpoint.warm_start),
+# initial_values - известные значения функции в них,
+# checkpoint - контрольная точка (methods.checkpoint.Checkpoint), resume - продолжение
+# работы с сохранённого состояния (путь к файлу или methods.checkpoint.load)
+def iterate(func, maxiter, scoutbee_count, selectedbee_count, bestbee_count, bestsites_count, selectedsites_count, radius, koeff, tolerance, globaltolerance, x_min=None, x_max=None, y_min=None, y_max=None, bounds=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
        
-    history = []
-    start_time=time.time()  
-    # Инициализация улья с заданными параметрами
-    hive = Hive(scoutbee_count, selectedbee_count, bestbee_count, selectedsites_count, bestsites_count, radius, func, x_min, x_max, y_min, y_max)
+    minval, maxval = resolve_bounds(bounds, x_min, x_max, y_min, y_max)
+    # Подсчёт вычислений и общие критерии остановки (methods.termination)
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    rng = seed if rng is None else rng
     
     best_value = math.inf
     tolerance_counter = 0
     converged = False
     message = "Достигнуто максимальное количество итераций"
+
+    # Продолжение работы: улей, генератор и счётчики из контрольной точки
+    saved = None if resume is None else restore(resume, 'bee')
+    completed = 0
+    if saved is not None:
+        rng, completed = saved['rng'], saved['iteration']
+        best_value, tolerance_counter, globaltolerance = saved['best_value'], saved['tolerance_counter'], saved['globaltolerance']
+        start_evaluations -= saved['evaluations']
+    # Инициализация улья с заданными параметрами
+    hive = Hive(scoutbee_count, selectedbee_count, bestbee_count, selectedsites_count, bestsites_count, radius, func, minval, maxval, rng, profiler, initial_positions, saved, initial_values)
+
+    def snapshot():
+        return dict(method='bee', rng=hive.rng, evaluations=func.evaluations - start_evaluations, best_value=best_value,
+                    tolerance_counter=tolerance_counter, globaltolerance=globaltolerance, **hive.getState())
     
     # Основной цикл оптимизации
-    for i in range(maxiter):
+    for i in range(completed, maxiter):
         hive.nextIteration()
+        completed = i+1
         
-        # Адаптация радиуса поиска на основе изменения лучшего значения
-        if abs(hive.best_fitness - best_value) > 1e-5:
-            best_value = hive.best_fitness
-            hive.radius = hive.radius * koeff  # Уменьшаем радиус поиска
-            tolerance_counter = 0
-        else:
-            tolerance_counter += 1
-            if tolerance_counter >= tolerance:
-                hive.radius = hive.radius / koeff  # Увеличиваем радиус поиска
+        with hive.phase('bookkeeping'):
+            # Адаптация радиуса поиска на основе изменения лучшего значения
+            if abs(hive.best_fitness - best_value) > 1e-5:
+                best_value = hive.best_fitness
+                hive.radius = hive.radius * koeff  # Уменьшаем радиус поиска
                 tolerance_counter = 0
-                globaltolerance -= 1
-                if globaltolerance == 0:
-                    converged = True
-                    message = "Достигнут предел расширений"
-                    break #Решение не улучшалось после нескольких расширений радиуса
-        
-        # Сохранение истории изменений
-        history.append({
-            'iteration': i+1,
-            'x': hive.best_position[0],
-            'y': hive.best_position[1],
-            'f_value': hive.best_fitness
-        })
+            else:
+                tolerance_counter += 1
+                if tolerance_counter >= tolerance:
+                    hive.radius = hive.radius / koeff  # Увеличиваем радиус поиска
+                    tolerance_counter = 0
+                    globaltolerance -= 1
+                    if globaltolerance == 0:
+                        converged = True
+                        message = "Достигнут предел расширений"
+                        break #Решение не улучшалось после нескольких расширений радиуса
 
+            stop = termination is not None and termination.check(hive.best_fitness)
+        
+        # Состояние после итерации
+        yield state(i+1, hive.best_position, hive.best_fitness, func.evaluations - start_evaluations, hive.positions, hive.fitness)
+        if stop:
+            converged, message = termination.converged, termination.reason
+            break
+        if checkpoint is not None:
+            checkpoint.step(completed, snapshot)
 
-    
+    # Состояние в конце работы сохраняется всегда
+    if checkpoint is not None:
+        checkpoint.save(completed, **snapshot())
+     
+    return converged, message
+
+# Основная функция оптимизации
+def optimize(func, maxiter, scoutbee_count, selectedbee_count, bestbee_count, bestsites_count, selectedsites_count, radius, koeff, tolerance, globaltolerance, x_min=None, x_max=None, y_min=None, y_max=None,verbose=True, bounds=None, callback=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
+    history = History(capacity=maxiter, callback=callback)
+    start_time=time.time()  
+    converged, message = collect(iterate(func, maxiter, scoutbee_count, selectedbee_count, bestbee_count, bestsites_count, selectedsites_count, radius, koeff, tolerance, globaltolerance,
+                                         x_min, x_max, y_min, y_max, bounds, seed, rng, termination, profiler, initial_positions, checkpoint, resume, initial_values), history)
     if verbose:
         print(f"Время выполнения пчелиный: {time.time() - start_time:.2f} сек")
-     
-    converged = True
-    message = "Оптимум найден" if converged else "Достигнуто максимальное количество итераций"
-    
-    return history, converged, message
\ No newline at end of file
+    return history, converged, message
@@ -0,0 +1,17 @@
+import numpy as np
+
+# Границы поиска задаются списком пар [[min, max], ...] - по одной паре на координату,
+# поэтому размерность задачи определяется количеством пар.
+# Для двумерных задач можно по-прежнему передать x_min, x_max, y_min, y_max
+def resolve_bounds(bounds=None, x_min=None, x_max=None, y_min=None, y_max=None):
+    if bounds is None:
+        if None in (x_min, x_max, y_min, y_max):
+            raise ValueError("Не заданы границы поиска")
+        bounds = [[x_min, x_max], [y_min, y_max]]
+
+    bounds = np.array(bounds, dtype=float)
+    if bounds.ndim != 2 or bounds.shape[1] != 2 or len(bounds) == 0:
+        raise ValueError("Границы поиска должны задаваться парами [min, max] по каждой координате")
+
+    # Массивы нижних и верхних границ (D,)
+    return bounds[:, 0].copy(), bounds[:, 1].copy()
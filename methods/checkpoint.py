@@ -0,0 +1,87 @@
+import json
+import os
+import numpy as np
+
+# Контрольные точки популяционных методов. Полное состояние метода (массивы популяции,
+# скорости, лучшие решения, счётчики и состояние генератора случайных чисел)
+# сохраняется в сжатый файл .npz каждые every итераций и в конце работы метода.
+# Метод, запущенный с resume (путь к файлу или результат load), продолжает работу
+# с сохранённой итерации так же, как если бы не прерывался: номера итераций и счёт
+# вычислений продолжаются, max_iter - общее число итераций с начала работы.
+# Параметры метода и целевая функция в файл не записываются - при продолжении
+# они передаются те же. Общие критерии остановки (methods.termination)
+# и профилировщик при продолжении начинают счёт заново.
+# Для нового запуска с лучших точек прошлого запуска - warm_start
+class Checkpoint:
+    def __init__(self, path, every=10, **values):
+        self.path = path
+        self.every = every
+        # Дополнительные поля каждой записи (например, этап гибридного метода)
+        self.values = values
+
+    # Та же контрольная точка с дополнительными полями
+    def extend(self, **values):
+        return Checkpoint(self.path, self.every, **self.values, **values)
+
+    # Вызывается после каждой итерации: сохраняет состояние каждые every итераций.
+    # snapshot() возвращает поля состояния метода (вызывается только при сохранении)
+    def step(self, iteration, snapshot):
+        if self.every and iteration % self.every == 0:
+            self.save(iteration, **snapshot())
+
+    def save(self, iteration, method, rng, **values):
+        save(self.path, method, iteration, rng, **self.values, **values)
+
+
+# Запись состояния: method - имя метода, iteration - число завершённых итераций,
+# rng - генератор случайных чисел, values - массивы и числа (None не записывается).
+# Файл сначала пишется рядом и затем заменяет старый, поэтому прерванная запись
+# не портит предыдущую контрольную точку
+def save(path, method, iteration, rng, **values):
+    arrays = {name: value for name, value in values.items() if value is not None}
+    # Состояние генератора - словарь с большими целыми числами, хранится строкой JSON
+    arrays['rng'] = json.dumps(rng.bit_generator.state, default=lambda value: value.tolist())
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as file:
+        np.savez_compressed(file, method=method, iteration=iteration, **arrays)
+    os.replace(temporary, path)
+
+
+# Чтение контрольной точки: словарь полей (числа и строки - скаляры numpy,
+# 'rng' - состояние генератора строкой JSON)
+def load(path):
+    with np.load(path, allow_pickle=False) as file:
+        return {name: file[name][()] for name in file.files}
+
+
+# Состояние для продолжения работы: source - путь или результат load,
+# methods - имена методов, чьи контрольные точки подходят.
+# Генератор случайных чисел восстанавливается заново при каждом вызове
+def restore(source, *methods):
+    data = dict(source) if isinstance(source, dict) else load(source)
+    if methods and data['method'] not in methods:
+        raise ValueError(f"Контрольная точка метода {data['method']} не подходит для метода {', '.join(methods)}")
+    if isinstance(data['rng'], str):
+        rng_state = json.loads(data['rng'])
+        bit_generator = getattr(np.random, rng_state['bit_generator'])()
+        bit_generator.state = rng_state
+        data['rng'] = np.random.Generator(bit_generator)
+    return data
+
+
+# Сохранённая популяция: у роя - лучшие позиции частиц, у остальных методов -
+# текущая популяция, и значения функции в её точках (None, если не сохранены;
+# NaN - значение неизвестно)
+def population(source):
+    data = source if isinstance(source, dict) else load(source)
+    positions = data.get('local_positions', data['positions'])
+    return positions, data.get('local_values', data.get('values'))
+
+
+# Начальные точки нового запуска (initial_positions) из контрольной точки
+# по возрастанию значения функции, если значения сохранены. count - число точек
+def warm_start(source, count=None):
+    positions, values = population(source)
+    if values is not None:
+        positions = positions[np.argsort(np.where(np.isnan(values), np.inf, values), kind='stable')]
+    return positions[:count]
@@ -0,0 +1,81 @@
+import numpy as np
+from .derivatives import gradient_function, wolfe
+from .history import History
+from .stream import counted, state, collect
+
+# Нелинейный метод сопряжённых градиентов (Полак - Рибьер с неотрицательным beta).
+# Направление - антиградиент плюс beta * предыдущее направление; метод перезапускается
+# с антиградиента каждые restart итераций и когда направление перестаёт вести к убыванию.
+# Шаг выбирается по сильным условиям Вольфе (c2 = 0.1 - почти точный поиск по прямой),
+# начальный шаг подбирается по предыдущему: t * (g_old, d_old) / (g, d)
+
+# func - целевая функция f(x, y) или f(x1, ..., xn).
+# Начальная точка: (x0, y0) или вектор x0 любой размерности (тогда y0 не задаётся).
+# grad - аналитический градиент, имя функции из functions.py или None (конечные разности).
+# restart - период перезапуска (по умолчанию - размерность задачи)
+def iterate(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, restart=None, grad=None, termination=None):
+    current_point = np.array([x0, y0] if y0 is not None else x0, dtype=float).ravel()
+    # Общие критерии остановки (methods.termination): вычисления для градиента тоже учитываются
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    grad_func = gradient_function(func, grad)
+    restart = restart or len(current_point)
+
+    current_value = func(*current_point)
+    grad_value = grad_func(current_point)
+    search_direction = -grad_value
+    step, slope = None, None
+    since_restart = 0
+
+    for i in range(max_iter):
+        if not np.all(np.isfinite(grad_value)) or np.any(np.abs(grad_value) > 1e10):
+            return False, "Функция расходится (норма градиента слишком большая)"
+
+        grad_norm = np.linalg.norm(grad_value)
+
+        yield state(i+1, current_point, current_value, func.evaluations - start_evaluations, grad_norm=grad_norm)
+
+        if grad_norm < epsilon1:
+            return True, "Сошёлся (норма градиента меньше заданной точности)"
+
+        if termination is not None and termination.check(current_value):
+            return termination.converged, termination.reason
+
+        new_slope = np.dot(grad_value, search_direction)
+        if new_slope >= 0:
+            search_direction, new_slope = -grad_value, -grad_norm**2
+            since_restart = 0
+
+        if step:
+            initial_step = min(1.0, step * slope / new_slope) if since_restart else min(1.0, 2.0 * step)
+        else:
+            initial_step = min(1.0, 1.0 / grad_norm)
+        step, new_point, new_value, new_grad = wolfe(func, grad_func, current_point, current_value, grad_value, search_direction, initial_step, c2=0.1)
+        if step == 0 and since_restart:
+            # Шага по сопряжённому направлению нет - шаг повторяется по антиградиенту
+            search_direction, new_slope, since_restart = -grad_value, -grad_norm**2, 0
+            step, new_point, new_value, new_grad = wolfe(func, grad_func, current_point, current_value, grad_value, search_direction, min(1.0, 1.0 / grad_norm), c2=0.1)
+        slope = new_slope
+        if step == 0:
+            return True, "Сошёлся (значение функции больше не уменьшается)"
+
+        since_restart += 1
+        if since_restart >= restart:
+            beta, since_restart = 0.0, 0
+        else:
+            beta = max(0.0, np.dot(new_grad, new_grad - grad_value) / np.dot(grad_value, grad_value))
+        search_direction = -new_grad + beta * search_direction
+
+        old_point, old_value = current_point, current_value
+        current_point, current_value, grad_value = new_point, new_value, new_grad
+
+        if (np.linalg.norm(current_point-old_point) < epsilon2) and (abs(current_value-old_value) < epsilon2):
+            return True, "Сошёлся (разница значений функции меньше заданной точности)"
+
+    return False, "Не сошёлся (достигнуто максимальное количество итераций)"
+
+
+def optimize(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, restart=None, callback=None, grad=None, termination=None):
+    history = History(capacity=max_iter, callback=callback)
+    converged, message = collect(iterate(func, x0, y0, epsilon1, epsilon2, max_iter, restart, grad, termination), history, ('grad_norm',))
+    return history, converged, message
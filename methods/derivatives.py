@@ -0,0 +1,98 @@
+import numpy as np
+from .evaluation import evaluate
+
+# Производные целевой функции для локальных методов (градиентный спуск, L-BFGS,
+# метод Ньютона, сопряжённые градиенты): аналитические, если они заданы,
+# иначе конечные разности с пакетным вычислением всех точек шаблона
+
+def gradient(func, point, h=1e-5):
+    point = np.asarray(point, dtype=float)
+    return batch_gradient(func, point.reshape(1, -1), h)[0]
+
+# Градиенты сразу в M точках (M, D) -> (M, D).
+# Производная по i-й координате: (f(x + h*e_i) - f(x - h*e_i)) / (2h).
+# Все M*2D точек шаблона вычисляются одним пакетным вызовом функции
+def batch_gradient(func, points, h=1e-5):
+    points = np.asarray(points, dtype=float)
+    count, dimension = points.shape
+    steps = h * np.eye(dimension)
+    stencil = np.concatenate([points[:, None] + steps, points[:, None] - steps], axis=1)
+    values = evaluate(func, stencil.reshape(-1, dimension)).reshape(count, 2 * dimension)
+    return (values[:, :dimension] - values[:, dimension:]) / (2 * h)
+
+# Матрица Гессе в точке (D,) -> (D, D).
+# С аналитическим градиентом - центральные разности градиента (2D точек),
+# без него - вторые разности функции (4D² точек); в обоих случаях одним пакетным вызовом
+def hessian(func, point, grad=None, h=1e-4):
+    point = np.asarray(point, dtype=float)
+    dimension = len(point)
+    steps = h * np.eye(dimension)
+
+    if grad is not None:
+        stencil = np.vstack([point + steps, point - steps])
+        grads = np.asarray(grad(*stencil.T), dtype=float).reshape(dimension, -1).T
+        result = (grads[:dimension] - grads[dimension:]) / (2 * h)
+    else:
+        # f(x + h*e_i + h*e_j) - f(x + h*e_i - h*e_j) - f(x - h*e_i + h*e_j) + f(x - h*e_i - h*e_j)
+        plus, minus = steps[:, None] + steps[None], steps[:, None] - steps[None]
+        stencil = point + np.stack([plus, minus, -minus, -plus]).reshape(-1, dimension)
+        values = evaluate(func, stencil).reshape(4, dimension, dimension)
+        result = (values[0] - values[1] - values[2] + values[3]) / (4 * h * h)
+
+    # Погрешности разностей делают матрицу чуть несимметричной
+    return (result + result.T) / 2
+
+# Функция вычисления градиента в точке (D,) -> (D,).
+# grad - аналитический градиент с теми же аргументами, что и func, имя функции
+# из functions.py (см. functions.gradients) или None (конечные разности)
+def gradient_function(func, grad=None):
+    grad = resolve_gradient(grad)
+    if grad is None:
+        return lambda point: gradient(func, point)
+    return lambda point: np.asarray(grad(*point), dtype=float)
+
+def resolve_gradient(grad):
+    if isinstance(grad, str):
+        from functions import gradients
+        return gradients(grad)
+    return grad
+
+# Поиск шага с условием Армихо: f(x + t*p) <= f(x) + c*t*(g, p).
+# Шаг делится пополам, пока условие не выполнится; возвращает шаг,
+# новую точку и значение в ней (шаг 0, если убывания найти не удалось)
+def backtracking(func, point, value, grad_value, direction, step=1.0, c=1e-4, max_halvings=60):
+    slope = np.dot(grad_value, direction)
+    for _ in range(max_halvings):
+        new_point = point + step * direction
+        new_value = func(*new_point)
+        if new_value <= value + c * step * slope:
+            return step, new_point, new_value
+        step = step / 2
+    return 0.0, point, value
+
+# Поиск шага с сильными условиями Вольфе: условие Армихо и |(g(x + t*p), p)| <= c2*|(g, p)|.
+# Интервал [low, high] с искомым шагом сужается делением пополам (пока правая граница
+# не найдена, шаг удваивается). Возвращает шаг, новую точку, значение и градиент в ней;
+# если условия не выполнились, возвращается лучшая найденная точка с убыванием (или шаг 0)
+def wolfe(func, grad_func, point, value, grad_value, direction, step=1.0, c1=1e-4, c2=0.9, max_iter=40):
+    slope = np.dot(grad_value, direction)
+    low, high = 0.0, np.inf
+    best = (0.0, point, value, grad_value)
+    for _ in range(max_iter):
+        new_point = point + step * direction
+        new_value = func(*new_point)
+        if not new_value <= value + c1 * step * slope:
+            high = step
+        else:
+            new_grad = grad_func(new_point)
+            new_slope = np.dot(new_grad, direction)
+            if abs(new_slope) <= -c2 * slope:
+                return step, new_point, new_value, new_grad
+            if new_value < best[2]:
+                best = (step, new_point, new_value, new_grad)
+            if new_slope > 0:
+                high = step
+            else:
+                low = step
+        step = (low + high) / 2 if np.isfinite(high) else 2 * step
+    return best
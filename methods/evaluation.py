@@ -0,0 +1,26 @@
+import numpy as np
+
+# Пакетное вычисление целевой функции для всей популяции за один вызов.
+# Функции из functions.py поддерживают broadcasting NumPy (они же строят
+# поверхность на meshgrid), поэтому столбцы массива (N, 2) передаются
+# как отдельные координаты: func(x_array, y_array) -> массив (N,)
+def evaluate(func, population):
+    population = np.asarray(population, dtype=float)
+    if population.ndim == 1:
+        population = population.reshape(1, -1)
+
+    try:
+        values = np.asarray(func(*population.T), dtype=float)
+    except (TypeError, ValueError):
+        # Функция не умеет работать с массивами (math.*, if по значению и т.п.)
+        values = None
+
+    if values is not None and values.ndim == 0:
+        # Функция вернула константу - размножаем её на всю популяцию
+        values = np.full(len(population), float(values))
+
+    if values is None or values.shape != (len(population),):
+        # Запасной вариант: поштучное вычисление
+        values = np.array([func(*ind) for ind in population], dtype=float)
+
+    return values
@@ -1,6 +1,12 @@
 import numpy as np
 
 import time
+from .evaluation import evaluate
+from .bounds import resolve_bounds
+from .history import History
+from .profiler import phases
+from .stream import counted, state, collect
+from .checkpoint import restore
 def functions(function_name):
     s = function_name.lower()
     match s:
@@ -13,100 +19,186 @@ def functions(function_name):
         case "isom":
             return lambda x, y: -np.cos(x)*np.cos(y)*np.exp(-((x-np.pi)**2 + (y-np.pi)**2))
 
-def optimize(objective_func, bounds, used_methods={"crossover": True, "mutation": True}, population_size=50, #Это число определяет, сколько решений будет рассмотрено в процессе эволюции.
-             crossover_prob=0.8, mutation_prob=0.1, mutation_parameter=3,
-             max_iter=100, tol=1e-6, patience=25,verbose = True):
+# Генерация нового поколения сразу для всей популяции: все пары родителей,
+# коэффициенты рекомбинации, маски и величины мутаций разыгрываются массивами.
+# profiler - замер фаз отбора ('selection') и изменения особей ('variation')
+def next_generation(population, probabilities, bounds, used_methods, crossover_prob, mutation_prob, mutation_parameter, recombination_parameter, rng=None, profiler=None):
+    rng = np.random.default_rng(rng)
+    phase = phases(profiler)
+    population_size, dim = population.shape
+    pairs_count = (population_size + 1) // 2
+    low, high = resolve_bounds(bounds)
+
+    with phase('selection'):
+        # Отбор (метод рулетки): накопленные вероятности + searchsorted
+        cumulative = np.cumsum(np.clip(probabilities, 0, None))
+        if not cumulative[-1] > 0:# вероятности вырождены - отбор равновероятный
+            cumulative = np.arange(1, population_size+1, dtype=float)
+        draws = rng.random((pairs_count, 2))
+        first = np.minimum(np.searchsorted(cumulative, draws[:, 0] * cumulative[-1], side='right'), population_size-1)
+        # Второй родитель - из рулетки без доли первого (пара из разных особей, как выбор без возвращения):
+        # точка на отрезке без доли первого переносится через его участок
+        weights = np.diff(cumulative, prepend=0.0)[first]
+        target = draws[:, 1] * (cumulative[-1] - weights)
+        target = np.where(target >= cumulative[first] - weights, target + weights, target)
+        second = np.minimum(np.searchsorted(cumulative, target, side='right'), population_size-1)
+        # Вся доля у первого родителя - второй равновероятно из остальных особей
+        alone = cumulative[-1] - weights <= 0
+        second[alone] = (first[alone] + 1 + (draws[alone, 1] * (population_size-1)).astype(int)) % population_size
+        parents1 = population[first]
+        parents2 = population[second]
+
+    with phase('variation'):
+        # Рекомбинация (линейная): потомки лежат на прямой через двух родителей
+        children = np.concatenate((parents1, parents2))
+        if used_methods['crossover']:
+            rec_coeffs = rng.uniform(-recombination_parameter, 1+recombination_parameter, (2, pairs_count, 1))
+            crossed = rng.random(pairs_count) < crossover_prob
+            children[:pairs_count][crossed] = (parents1 + rec_coeffs[0]*(parents2-parents1))[crossed]
+            children[pairs_count:][crossed] = (parents1 + rec_coeffs[1]*(parents2-parents1))[crossed]
+        children = children[:population_size]
+
+        # Мутация (мутация для вещественных особей)
+        if used_methods['mutation']:
+            mutated = rng.random(population_size) < mutation_prob
+            # Без разрядов (mutation_parameter < 1) добавка равна нулю
+            if mutation_parameter < 1:
+                delta = np.zeros(population_size)
+            else:
+                bits = rng.random((population_size, mutation_parameter)) < (1/mutation_parameter)
+                delta = bits @ (2.0 ** -np.arange(1, mutation_parameter+1))
+            signs = np.where(rng.random((population_size, dim)) <= 0.5, -1.0, 1.0)
+            children[mutated] += (delta[:, None] + 0.5*(high-low)*signs)[mutated]
+
+        # Проверка границ
+        return np.clip(children, low, high)
+
+# Пошаговый режим (methods.stream): после каждого поколения отдаётся состояние с лучшей
+# особью поколения и текущей популяцией. Генератор завершается значением
+# (converged, message, population) - последняя популяция нужна гибридному методу.
+# Через send((positions, values)) генератору передаются мигранты с других островов
+# (methods.islands) - они заменяют худших особей поколения перед отбором.
+# initial_positions - начальные особи (например, methods.checkpoint.warm_start),
+# initial_values - известные значения функции в них (не вычисляются повторно),
+# checkpoint - контрольная точка (methods.checkpoint.Checkpoint), resume - продолжение
+# работы с сохранённого состояния (путь к файлу или methods.checkpoint.load)
+def iterate(objective_func, bounds, used_methods={"crossover": True, "mutation": True}, population_size=50, #Это число определяет, сколько решений будет рассмотрено в процессе эволюции.
+            crossover_prob=0.8, mutation_prob=0.1, mutation_parameter=3,
+            max_iter=100, tol=1e-6, patience=25, seed=None, rng=None, termination=None, profiler=None,
+            initial_positions=None, checkpoint=None, resume=None, initial_values=None):
 
     # Инициализация параметров
-    history = []
-    start_time = time.time()
-    # 1. Генерация начальной популяции
-    population = np.zeros((population_size, 2))
-    population[:, 0] = np.random.uniform(bounds[0][0], bounds[0][1], population_size)
-    population[:, 1] = np.random.uniform(bounds[1][0], bounds[1][1], population_size)
-    
+    # Все случайные величины берутся из одного генератора (seed - для воспроизводимости)
+    rng = np.random.default_rng(seed if rng is None else rng)
+    # Замер фаз итерации (methods.profiler): вычисление, отбор, изменение особей, учёт результатов
+    phase = phases(profiler)
+    # Подсчёт вычислений и общие критерии остановки (methods.termination)
+    objective_func = counted(objective_func, termination)
+    start_evaluations = objective_func.evaluations
+    converged = False
+    message = "Достигнуто максимальное количество итераций"
+    low, high = resolve_bounds(bounds)
     best_fitness = np.inf #это числовое значение, которое оценивает, насколько хорошо индивид решает задачу
     no_improve = 0 #счетчик, отслеживающий количество итераций без улучшения.
 
     recombination_parameter = 0.25
+
+    completed = 0
+    known = None # значения функции первых особей начальной популяции, если известны
+    if resume is None:
+        # 1. Генерация начальной популяции (bounds - пары [min, max] по каждой координате)
+        population = rng.uniform(low, high, (population_size, len(low)))
+        if initial_positions is not None:
+            initial_positions = np.array(initial_positions, dtype=float)[:population_size]
+            population[:len(initial_positions)] = initial_positions
+            if initial_values is not None:
+                known = np.array(initial_values, dtype=float)[:len(initial_positions)]
+    else:
+        # Продолжение работы: популяция, генератор и счётчики из контрольной точки
+        # (сохранённая популяция - следующее поколение, ещё не вычисленное)
+        saved = restore(resume, 'genetic')
+        rng, completed = saved['rng'], saved['iteration']
+        population = saved['positions']
+        best_fitness, no_improve = saved['best_fitness'], saved['no_improve']
+        start_evaluations -= saved['evaluations']
+
+    def snapshot():
+        return dict(method='genetic', rng=rng, evaluations=objective_func.evaluations - start_evaluations,
+                    positions=population, best_fitness=best_fitness, no_improve=no_improve)
     
-    for iteration in range(max_iter):
+    for iteration in range(completed, max_iter):
         # 2. Вычисление пригодности
-        objective_values = np.array([objective_func(ind[0], ind[1]) for ind in population])
-        
-        # Сохранение лучшей особи по минимуму целевой функции
-        best_idx = np.argmin(objective_values)
-        current_best = population[best_idx]
-        current_value = objective_values[best_idx]
-        
-        # Критерий остановки
-        if abs(current_value - best_fitness) < tol:
-            no_improve += 1
-            if no_improve >= patience:
-                break
-        else:
-            if current_value < best_fitness:
-                no_improve = 0
-                best_fitness = current_value
+        with phase('evaluation'):
+            if known is None:
+                objective_values = evaluate(objective_func, population)
+            else:
+                # Вычисляются только особи с неизвестными значениями
+                objective_values = np.concatenate((known, evaluate(objective_func, population[len(known):])))
+                known = None
         
-        # Запись в историю
-        history.append({
-            'iteration': iteration+1,
-            'x': current_best[0],
-            'y': current_best[1],
-            'f_value': current_value
-        })
+        with phase('bookkeeping'):
+            # Сохранение лучшей особи по минимуму целевой функции
+            best_idx = np.argmin(objective_values)
+            current_best = population[best_idx]
+            current_value = objective_values[best_idx]
+            
+            # Критерий остановки
+            if abs(current_value - best_fitness) < tol:
+                no_improve += 1
+                if no_improve >= patience:
+                    converged = True
+                    message = f"Нет улучшения за {patience} поколений"
+                    break
+            else:
+                if current_value < best_fitness:
+                    no_improve = 0
+                    best_fitness = current_value
+
+            stop = termination is not None and termination.check(min(best_fitness, current_value))
         
-        fitness = 1 / (1+objective_values)#оценка пригодности чем меньше значение целевой функции тем больше пригодность
-        fitness_sum = fitness.sum()
-        if fitness_sum == 0:# у всех плохая пригодность
-            probabilities = np.ones(population_size) / population_size
-        else:
-            probabilities = fitness / fitness_sum
+        # Состояние поколения
+        immigrants = yield state(iteration+1, current_best, current_value, objective_func.evaluations - start_evaluations, population, objective_values)
+
+        if stop:
+            converged, message = termination.converged, termination.reason
+            break
+
+        if immigrants is not None:
+            positions, values = immigrants
+            worst = np.argsort(objective_values, kind='stable')[max(population_size - len(positions), 0):]
+            population[worst] = positions[:len(worst)]
+            objective_values[worst] = values[:len(worst)]
         
-        for i in range(len(probabilities)):
-            if np.isnan(probabilities[i]):
-                probabilities[i] = 0
+        with phase('selection'):
+            fitness = 1 / (1+objective_values)#оценка пригодности чем меньше значение целевой функции тем больше пригодность
+            fitness_sum = fitness.sum()
+            if fitness_sum == 0:# у всех плохая пригодность
+                probabilities = np.ones(population_size) / population_size
+            else:
+                probabilities = fitness / fitness_sum
+            probabilities = np.nan_to_num(probabilities, nan=0.0)
 
         # 3-6. Генерация нового поколения
-        temporary_population = []
-        while len(temporary_population) < population_size:
-            # Отбор (метод рулетки) вероятностный отбор по пригодности
-            parents = population[np.random.choice(
-                population_size, 2, p=probabilities, replace=False)]
-            
-            # Рекомбинация (линейная)
-            if used_methods['crossover']:
-                rec_coeffs = np.random.uniform(-recombination_parameter, 1+recombination_parameter, 2)
-                if np.random.rand() < crossover_prob:
-                    child1 = parents[0] + rec_coeffs[0]*(parents[1]-parents[0])
-                    child2 = parents[0] + rec_coeffs[1]*(parents[1]-parents[0])
-                else:
-                    child1, child2 = parents[0], parents[1]
-            else:
-                child1, child2 = parents[0], parents[1]
-            #Если используется кроссовер, то родители комбинируются для создания потомков. В противном случае потомки остаются такими же, как родители.
-
-            for child in [child1, child2]:
-                # Мутация (мутация для вещественных особей)
-                if used_methods['mutation']:
-                    if np.random.rand() < mutation_prob:
-                        delta = 0
-                        for i in range(1, mutation_parameter+1):
-                            delta += 2**(-i) * (1 if np.random.rand()<(1/mutation_parameter) else 0)
-                        child[0] += delta+0.5*(bounds[0][1]-bounds[0][0]) * ((-1) if np.random.rand()<=0.5 else 1)
-                        child[1] += delta+0.5*(bounds[1][1]-bounds[1][0]) * ((-1) if np.random.rand()<=0.5 else 1)
-                    #Если используется мутация, применяется случайная модификация значений потомков.
-                    # Проверка границ
-                    child[0] = np.clip(child[0], bounds[0][0], bounds[0][1])
-                    child[1] = np.clip(child[1], bounds[1][0], bounds[1][1])
-                temporary_population.append(child)
-
-        population = np.array(temporary_population) #обновление популяции
+        population = next_generation(population, probabilities, bounds, used_methods,
+                                     crossover_prob, mutation_prob, mutation_parameter, recombination_parameter, rng, profiler) #обновление популяции
+        completed = iteration+1
+        if checkpoint is not None:
+            checkpoint.step(completed, snapshot)
+    # Состояние в конце работы сохраняется всегда (при досрочной остановке
+    # незавершённое поколение при продолжении выполняется заново)
+    if checkpoint is not None:
+        checkpoint.save(completed, **snapshot())
+    return converged, message, population
+
+def optimize(objective_func, bounds, used_methods={"crossover": True, "mutation": True}, population_size=50,
+             crossover_prob=0.8, mutation_prob=0.1, mutation_parameter=3,
+             max_iter=100, tol=1e-6, patience=25,verbose = True, callback=None, seed=None, rng=None, termination=None, profiler=None,
+             initial_positions=None, checkpoint=None, resume=None, initial_values=None):
+    history = History(capacity=max_iter, callback=callback)
+    start_time = time.time()
+    converged, message, population = collect(iterate(objective_func, bounds, used_methods, population_size, crossover_prob, mutation_prob, mutation_parameter,
+                                                     max_iter, tol, patience, seed, rng, termination, profiler,
+                                                     initial_positions, checkpoint, resume, initial_values), history)
     if verbose:
         print(f"Время выполнения генетического: {time.time() - start_time:.2f} сек")
-    # Формирование результата
-    converged = True
-    message = "Оптимум найден" if converged else "Достигнуто максимальное количество итераций"
-    
-    return history, converged, message, population
\ No newline at end of file
+    return history, converged, message, population
@@ -1,67 +1,159 @@
 import numpy as np
+from .evaluation import evaluate
+from .derivatives import batch_gradient, gradient_function, resolve_gradient
+from .history import History
+from .stream import counted, state, collect
 
-def func(x, y):
-    # Функция сферы
-    return x**2 + y**2
+# Максимальное число делений шага пополам при поиске убывания функции
+MAX_HALVINGS = 60
 
-    # Функция Бута
-    # return (x + 2*y - 7)**2 + (2*x + y - 5)**2
+# func - целевая функция f(x, y) или f(x1, ..., xn).
+# Начальная точка: (x0, y0) или вектор x0 любой размерности (тогда y0 не задаётся).
+# grad - аналитический градиент с теми же аргументами, что и func, или имя функции
+# из functions.py (см. functions.gradients); без него градиент считается конечными разностями.
+# Пошаговый режим (methods.stream): состояние с полем grad_norm отдаётся после каждой итерации
+def iterate(func, x0, y0=None, learning_rate=0.1, epsilon=1e-6, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, grad=None, termination=None):
+    current_point = np.array([x0, y0] if y0 is not None else x0, dtype=float).ravel()
+    # Общие критерии остановки (methods.termination): вычисления для градиента тоже учитываются
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
 
-    # Функция Матьяса
-    # return 0.26*(x**2 + y**2) - 0.48*x*y
+    grad_func = gradient_function(func, grad)
 
-    # Функция Изома
-    # return -np.cos(x)*np.cos(y)*np.exp(-((x-np.pi)**2 + (y-np.pi)**2))
+    # Значение функции в текущей точке переиспользуется в проверках убывания
+    current_value = func(*current_point)
 
-    # Функция Экли
-    # return -20*np.exp(-0.2*np.sqrt(0.5*(x**2+y**2))) - np.exp(0.5*np.cos(2*np.pi*x) + np.cos(2*np.pi*y)) + np.e + 20
+    for i in range(max_iter):
+        grad_value = grad_func(current_point)
 
-def gradient(x, y, h=1e-5):
-    # Производная по x: (f(x+h, y) - f(x-h, y)  ) / (2h)
-    df_dx = (func(x + h, y) - func(x - h, y)) / (2 * h)
-    # Производная по y: (f(x, y+h) - f(x, y-h)) / (2h)
-    df_dy = (func(x, y + h) - func(x, y - h)) / (2 * h)
-    return np.array([df_dx, df_dy])
+        if not np.all(np.isfinite(grad_value)) or np.any(np.abs(grad_value) > 1e10):
+            return False, "Функция расходится (норма градиента слишком большая)"
+
+        grad_norm = np.linalg.norm(grad_value)
+
+        yield state(i+1, current_point, current_value, func.evaluations - start_evaluations, grad_norm=grad_norm)
 
-def optimize(x0, y0, learning_rate=0.1, epsilon=1e-6, epsilon1=1e-6, epsilon2=1e-6, max_iter=100):
-    history = []
-    current_point = np.array([x0, y0])
-    
-    for i in range(max_iter):   
-        grad = gradient(*current_point)
-        current_value = func(*current_point)
-        
-        if np.any(np.abs(grad) > 1e10):
-            return history, False, "Функция расходится (норма градиента слишком большая)"
-        
-        grad_norm = np.linalg.norm(grad)
-        
-        history.append({
-            'iteration': i+1,
-            'x': current_point[0],
-            'y': current_point[1],
-            'f_value': current_value,
-            'grad_norm': grad_norm
-        })
-        
         if grad_norm < epsilon1:
-            return history, True, "Сошёлся (норма градиента меньше заданной точности)"
-        
-        old_point = current_point 
-        current_point = current_point - learning_rate * grad
+            return True, "Сошёлся (норма градиента меньше заданной точности)"
+
+        if termination is not None and termination.check(current_value):
+            return termination.converged, termination.reason
+
+        old_point, old_value = current_point, current_value
+        current_point = current_point - learning_rate * grad_value
+        current_value = func(*current_point)
         modified_learning_rate = learning_rate
 
         # Вариант проверки 1
-        while not(func(*current_point) - func(*old_point)) < 0:
+        halvings = 0
+        while not(current_value - old_value) < 0:
+            if halvings == MAX_HALVINGS:
+                # Убывания нет даже при исчезающе малом шаге - поиск шага не удался
+                return False, "Не сошёлся (шаг уменьшился до нуля без убывания функции)"
             modified_learning_rate = modified_learning_rate / 2
-            current_point = old_point - modified_learning_rate * grad
+            current_point = old_point - modified_learning_rate * grad_value
+            current_value = func(*current_point)
+            halvings += 1
 
         # Вариант проверки 2
-        # while not(abs(func(*current_point) - func(*old_point)) < epsilon*(grad_norm**2)):
+        # while not(abs(current_value - old_value) < epsilon*(grad_norm**2)):
         #     modified_learning_rate = modified_learning_rate / 2
-        #     current_point = old_point - modified_learning_rate * grad
+        #     current_point = old_point - modified_learning_rate * grad_value
+        #     current_value = func(*current_point)
+
+        if (np.linalg.norm(current_point-old_point) < epsilon2) and (abs(current_value-old_value) < epsilon2):
+            return True, "Сошёлся (разница значений функции меньше заданной точности)"
+
+    return False, "Не сошёлся (достигнуто максимальное количество итераций)"
+
+
+def optimize(func, x0, y0=None, learning_rate=0.1, epsilon=1e-6, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, callback=None, grad=None, termination=None):
+    history = History(capacity=max_iter, callback=callback)
+    converged, message = collect(iterate(func, x0, y0, learning_rate, epsilon, epsilon1, epsilon2, max_iter, grad, termination), history, ('grad_norm',))
+    return history, converged, message
+
+
+# Пакетный спуск: M начальных точек x0 (M, D) движутся одновременно
+# (вектор x0 - одна начальная точка).
+# У каждой точки свой шаг при поиске убывания и свой признак остановки,
+# остановившиеся точки больше не вычисляются.
+# Возвращает словарь массивов: итоговые точки 'position' (M, D), 'f_value' (M,),
+# 'converged' (M,), 'iterations' (M,) - число выполненных шагов, и траектории
+# 'trajectory' (T, M, D), 'trajectory_f_value' (T, M), 'grad_norm' (T, M),
+# где строка t - состояние после t шагов (остановившиеся точки повторяются)
+def optimize_batch(func, x0, learning_rate=0.1, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, grad=None):
+    points = np.array(x0, dtype=float)
+    if points.ndim == 1:
+        points = points[None]  # одна начальная точка, как в optimize
+    count, dimension = points.shape
+
+    grad = resolve_gradient(grad)
+    if grad is None:
+        grad_func = lambda active: batch_gradient(func, active)
+    else:
+        grad_func = lambda active: np.asarray(grad(*active.T), dtype=float).reshape(dimension, -1).T
+
+    values = evaluate(func, points)
+    converged = np.zeros(count, dtype=bool)
+    iterations = np.zeros(count, dtype=np.int64)
+    active = np.ones(count, dtype=bool)
+
+    trajectory = np.empty((max_iter + 1, count, dimension))
+    trajectory_values = np.empty((max_iter + 1, count))
+    grad_norms = np.full((max_iter + 1, count), np.nan)
+    trajectory[0] = points
+    trajectory_values[0] = values
+
+    steps = 0
+    while steps < max_iter and np.any(active):
+        index = np.flatnonzero(active)
+        old_points, old_values = points[index], values[index]
+        grad_value = grad_func(old_points)
+        grad_norm = np.linalg.norm(grad_value, axis=1)
+        grad_norms[steps, index] = grad_norm
+
+        # Расходящиеся точки и точки с малой нормой градиента останавливаются
+        diverged = ~np.all(np.isfinite(grad_value), axis=1) | np.any(np.abs(grad_value) > 1e10, axis=1)
+        small = ~diverged & (grad_norm < epsilon1)
+        converged[index[small]] = True
+        moving = ~(diverged | small)
+
+        # Поиск убывания с отдельным шагом для каждой точки
+        rates = np.full(len(index), float(learning_rate))
+        new_points = old_points - rates[:, None] * grad_value
+        new_values = old_values.copy()
+        new_values[moving] = evaluate(func, new_points[moving])
+        need = moving & ~(new_values - old_values < 0)
+        for _ in range(MAX_HALVINGS):
+            if not np.any(need):
+                break
+            rates[need] /= 2
+            new_points[need] = old_points[need] - rates[need, None] * grad_value[need]
+            new_values[need] = evaluate(func, new_points[need])
+            need &= ~(new_values - old_values < 0)
+        # Убывания нет даже при исчезающе малом шаге - точка остаётся на месте
+        # и останавливается как не сошедшаяся
+        moving &= ~need
+
+        moved = index[moving]
+        points[moved] = new_points[moving]
+        values[moved] = new_values[moving]
+        iterations[moved] += 1
+
+        close = moving & (np.linalg.norm(new_points - old_points, axis=1) < epsilon2) & (np.abs(new_values - old_values) < epsilon2)
+        converged[index[close]] = True
+        active[index[~moving | close]] = False
+
+        steps += 1
+        trajectory[steps] = points
+        trajectory_values[steps] = values
 
-        if (np.linalg.norm(current_point-old_point) < epsilon2) and (np.linalg.norm(func(*current_point)-func(*old_point)) < epsilon2):
-            return history, True, "Сошёлся (разница значений функции меньше заданной точности)" 
-    
-    return history, False, "Не сошёлся (достигнуто максимальное количество итераций)"
\ No newline at end of file
+    return {
+        'position': points,
+        'f_value': values,
+        'converged': converged,
+        'iterations': iterations,
+        'trajectory': trajectory[:steps + 1],
+        'trajectory_f_value': trajectory_values[:steps + 1],
+        'grad_norm': grad_norms[:steps + 1]
+    }
@@ -0,0 +1,166 @@
+import numpy as np
+
+# Запись истории оптимизации: номер итерации, лучшая точка (вектор любой размерности)
+# и значение функции. Первые две координаты дублируются в 'x' и 'y' для графика и таблицы
+def record(iteration, position, f_value, **columns):
+    position = np.array(position, dtype=float).ravel()
+    row = {'iteration': iteration, 'position': position}
+    if len(position) > 0:
+        row['x'] = position[0]
+    if len(position) > 1:
+        row['y'] = position[1]
+    row['f_value'] = f_value
+    row.update(columns)
+    return row
+
+
+# История оптимизации в виде колонок: iteration (M,), position (M, D), f_value (M,)
+# и необязательные дополнительные колонки (например, grad_norm или evaluations).
+# Массивы выделяются заранее (capacity) и удваиваются при переполнении,
+# колонки отдаются как представления без копирования, а строки-словари
+# создаются только при обращении к ним (history[i], итерация по истории).
+# callback(row) вызывается после каждой новой записи - через него
+# методы сообщают о ходе оптимизации (например, фоновым задачам app.py)
+class History:
+    def __init__(self, capacity=128, callback=None):
+        self._callback = callback
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._iteration = np.empty(self._capacity, dtype=np.int64)
+        self._position = None  # размерность становится известна при первой записи
+        self._f_value = np.empty(self._capacity)
+        self._columns = {}
+
+    def append(self, iteration, position, f_value, **columns):
+        position = np.asarray(position, dtype=float).ravel()
+        if self._position is None:
+            self._position = np.empty((self._capacity, len(position)))
+        if self._size == self._capacity:
+            self._grow(2 * self._capacity)
+
+        i = self._size
+        self._iteration[i] = iteration
+        self._position[i] = position
+        self._f_value[i] = f_value
+        # Колонки, не переданные в этой записи, остаются NaN
+        for name, value in columns.items():
+            self._column_storage(name)[i] = value
+        self._size += 1
+
+        if self._callback is not None:
+            self._callback(self[i])
+
+    # Добавить все записи другой истории (номера итераций сдвигаются на offset)
+    def extend(self, other, offset=0):
+        count = len(other)
+        if count == 0:
+            return
+        if self._position is None:
+            self._position = np.empty((self._capacity, other.dimension))
+        if self._size + count > self._capacity:
+            self._grow(max(2 * self._capacity, self._size + count))
+
+        part = slice(self._size, self._size + count)
+        self._iteration[part] = other.iteration + offset
+        self._position[part] = other.position
+        self._f_value[part] = other.f_value
+        for name in set(self._columns) | set(other.columns):
+            self._column_storage(name)[part] = other.column(name) if name in other.columns else np.nan
+        self._size += count
+
+    # callback не сериализуется: история передаётся между процессами без него
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_callback'] = None
+        return state
+
+    def _column_storage(self, name):
+        if name not in self._columns:
+            self._columns[name] = np.full(self._capacity, np.nan)
+        return self._columns[name]
+
+    def _grow(self, capacity):
+        def resize(values):
+            resized = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+            resized[:self._size] = values[:self._size]
+            return resized
+
+        self._iteration = resize(self._iteration)
+        self._f_value = resize(self._f_value)
+        if self._position is not None:
+            self._position = resize(self._position)
+        for name, values in self._columns.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = values[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    # Колонки (представления без копирования)
+    @property
+    def iteration(self):
+        return self._iteration[:self._size]
+
+    @property
+    def position(self):
+        if self._position is None:
+            return np.empty((0, 0))
+        return self._position[:self._size]
+
+    @property
+    def x(self):
+        return self.position[:, 0] if self.dimension > 0 else np.empty(0)
+
+    @property
+    def y(self):
+        return self.position[:, 1] if self.dimension > 1 else np.empty(0)
+
+    @property
+    def f_value(self):
+        return self._f_value[:self._size]
+
+    @property
+    def dimension(self):
+        return 0 if self._position is None else self._position.shape[1]
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        return self._columns[name][:self._size]
+
+    # Строка истории в виде словаря (создаётся при обращении)
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Индекс вне истории оптимизации")
+        columns = {name: values[index] for name, values in self._columns.items()}
+        return record(int(self._iteration[index]), self._position[index], self._f_value[index], **columns)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (self[i] for i in range(self._size))
+
+    # Запись с наименьшим значением функции
+    def best(self):
+        return self[int(np.nanargmin(self.f_value))] if self._size else None
+
+    # Строки для таблицы: координаты и значения округляются сразу для всей колонки
+    def table_rows(self, decimals=4):
+        data = {'iteration': self.iteration.tolist()}
+        if self.dimension > 0:
+            data['x'] = np.round(self.x, decimals).tolist()
+        if self.dimension > 1:
+            data['y'] = np.round(self.y, decimals).tolist()
+        data['f_value'] = np.round(self.f_value, decimals).tolist()
+        for name in self._columns:
+            values = self.column(name)
+            # Пропуски (NaN) в дополнительных колонках отдаются как пустые ячейки
+            data[name] = np.where(np.isnan(values), None, np.round(values, decimals)).tolist()
+        names = list(data)
+        return [dict(zip(names, values)) for values in zip(*data.values())]
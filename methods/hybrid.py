@@ -1,7 +1,240 @@
 # methods/hybrid.py
 import numpy as np
-from .genetic_algorithm import optimize as ga_optimize
-from .particle_swarm import optimize as pso_optimize
+from . import genetic_algorithm, particle_swarm, immune, bee, bacterial, gradient_descent, newton, conjugate_gradient, lbfgs
+from .evaluation import evaluate
+from .bounds import resolve_bounds
+from .history import History
+from .profiler import phases
+from .termination import Termination
+from .stream import counted, collect
+from .checkpoint import restore, population as saved_population
+
+# Гибридный метод - конвейер этапов: каждый этап - отдельный метод, который начинает
+# с популяции, найденной предыдущим этапом. Популяция передаётся массивами вместе
+# со значениями функции (из последнего состояния этапа), поэтому точки не вычисляются
+# повторно. Локальные методы (градиентные) начинают с лучшей точки и возвращают
+# уточнённую точку в начало популяции.
+# Функции этапов: func, bounds, начальная популяция positions и её значения values
+# (None у первого этапа), rng, termination (бюджет этапа), profiler, checkpoint и
+# resume (у популяционных методов) и параметры этапа. Возвращают генератор
+# пошагового режима, завершающийся значением (converged, message)
+
+def _genetic(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume, **params):
+    converged, message, _ = yield from genetic_algorithm.iterate(
+        func, bounds, rng=rng, termination=termination, profiler=profiler,
+        initial_positions=positions, initial_values=values, checkpoint=checkpoint, resume=resume, **params)
+    return converged, message
+
+def _particle_swarm(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume,
+                    max_iter=30, swarmsize=30, current_velocity=0.5, local_ratio=2.0, global_ratio=5.0, penalty=10):
+    # PSO принимает [нижние границы, верхние границы]
+    return (yield from particle_swarm.iterate(
+        func, max_iter, swarmsize, resolve_bounds(bounds), current_velocity, local_ratio, global_ratio, penalty,
+        positions, rng=rng, initial_values=values, termination=termination, profiler=profiler, checkpoint=checkpoint, resume=resume))
+
+def _immune(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume, max_iter=100, population_size=50, **params):
+    return (yield from immune.iterate(
+        func, max_iter, population_size, bounds=bounds, rng=rng, termination=termination, profiler=profiler,
+        initial_positions=positions, initial_values=values, checkpoint=checkpoint, resume=resume, **params))
+
+def _bee(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume, max_iter=100, scoutbee_count=20, selectedbee_count=5,
+         bestbee_count=10, bestsites_count=3, selectedsites_count=3, radius=None, koeff=0.9, tolerance=10, globaltolerance=10):
+    # Радиус по умолчанию - десятая часть наибольшего размера области поиска
+    if radius is None:
+        low, high = resolve_bounds(bounds)
+        radius = 0.1 * np.max(high - low)
+    return (yield from bee.iterate(
+        func, max_iter, scoutbee_count, selectedbee_count, bestbee_count, bestsites_count, selectedsites_count, radius, koeff, tolerance, globaltolerance,
+        bounds=bounds, rng=rng, termination=termination, profiler=profiler,
+        initial_positions=positions, initial_values=values, checkpoint=checkpoint, resume=resume))
+
+def _bacterial(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume, **params):
+    return (yield from bacterial.iterate(
+        func, bounds=bounds, rng=rng, termination=termination, profiler=profiler,
+        initial_positions=positions, initial_values=values, checkpoint=checkpoint, resume=resume, **params))
+
+# Локальный метод начинает с лучшей точки популяции (первым этапом - с центра области)
+def _local(method):
+    def run(func, bounds, positions, values, rng, termination, profiler, checkpoint, resume, **params):
+        if positions is None:
+            low, high = resolve_bounds(bounds)
+            x0 = (low + high) / 2
+        else:
+            x0 = positions[0]
+        return (yield from method.iterate(func, x0, termination=termination, **params))
+    return run
+
+# Методы этапов: имя -> (подпись в сообщении, функция этапа)
+STAGES = {
+    'genetic': ("GA", _genetic),
+    'particle_swarm': ("PSO", _particle_swarm),
+    'immune': ("Иммунный", _immune),
+    'bee': ("Пчелиный", _bee),
+    'bacterial': ("Бактериальный", _bacterial),
+    'gradient_descent': ("Градиентный спуск", _local(gradient_descent)),
+    'newton': ("Ньютон", _local(newton)),
+    'conjugate_gradient': ("Сопряжённые градиенты", _local(conjugate_gradient)),
+    'lbfgs': ("L-BFGS", _local(lbfgs))
+}
+
+
+# Этап конвейера: method - имя метода из STAGES, max_evaluations - собственный бюджет
+# вычислений функции этапа (None - без ограничения), label - подпись этапа в сообщении,
+# params - параметры метода (max_iter, population_size, swarmsize и т.п., см. функции этапов)
+class Stage:
+    def __init__(self, method, max_evaluations=None, label=None, **params):
+        if method not in STAGES:
+            raise ValueError(f"Неизвестный метод этапа: {method}")
+        self.method = method
+        self.max_evaluations = max_evaluations
+        self.label = STAGES[method][0] if label is None else label
+        self.params = params
+
+
+# Популяция для следующего этапа по последнему состоянию этапа current:
+# точки внутри границ с известными конечными значениями функции, по возрастанию
+# значения. Лучшая точка этапа ставится первой, если в популяции нет лучше.
+# У локального метода популяции нет - его точка добавляется в начало прежней популяции
+def _handoff(func, current, positions, values, low, high, profiler):
+    if current['population'] is not None:
+        positions, values = current['population'], current['values']
+        if values is None:
+            with phases(profiler)('evaluation'):
+                values = evaluate(func, positions)
+        keep = np.isfinite(values) & np.all((positions >= low) & (positions <= high), axis=1)
+        positions, values = positions[keep], values[keep]
+
+    best = current['f_value']
+    if np.isfinite(best) and (positions is None or len(values) == 0 or best < values.min()):
+        position = current['position'][None]
+        positions = position if positions is None else np.concatenate((position, positions))
+        values = np.array([best]) if values is None else np.concatenate(([best], values))
+
+    if positions is None:
+        return None, None
+    order = np.argsort(values, kind='stable')
+    return positions[order], values[order]
+
+
+# Пошаговый режим (methods.stream): подряд отдаются состояния всех этапов
+# (номера итераций продолжают нумерацию предыдущих этапов, вычисления считаются
+# с начала работы). stages - список Stage или имён методов.
+# termination - общие критерии остановки всего конвейера, проверяются после каждой
+# итерации любого этапа; бюджет отдельного этапа - Stage(max_evaluations=...).
+# checkpoint - контрольная точка (methods.checkpoint.Checkpoint): состояние популяционных
+# этапов и популяция, передаваемая на границе этапов (метод 'pipeline'),
+# resume - продолжение работы с сохранённого состояния
+def pipeline_iterate(func, bounds, stages, seed=None, rng=None, termination=None, profiler=None, checkpoint=None, resume=None):
+    # Общий генератор случайных чисел для всех этапов
+    rng = np.random.default_rng(seed if rng is None else rng)
+    stages = [Stage(stage) if isinstance(stage, str) else stage for stage in stages]
+    low, high = resolve_bounds(bounds)
+    # Общие критерии остановки и замер фаз (profiler) действуют на все этапы вместе
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+
+    first, offset, start, messages = 0, 0, 0, []
+    positions = values = None  # популяция, передаваемая следующему этапу
+    saved = None
+    if resume is not None:
+        # Контрольная точка этапа (состояние метода и итоги предыдущих этапов)
+        # или границы этапов (популяция для этапа stage)
+        saved = restore(resume, 'pipeline', *{stage.method for stage in stages})
+        first = saved.get('stage', 0)
+        if first >= len(stages) or saved['method'] not in ('pipeline', stages[first].method):
+            raise ValueError(f"Контрольная точка метода {saved['method']} не подходит для этапа {first + 1} конвейера")
+        rng = saved['rng']
+        offset, start = saved.get('stage_iteration', 0), saved.get('stage_evaluations', 0)
+        messages = [saved['stage_message']] if saved.get('stage_message') else []
+        start_evaluations -= saved['evaluations'] + start
+        # Популяция на момент сохранения
+        positions, values = saved_population(saved)
+        if saved['method'] == 'pipeline':
+            saved = None
+
+    best_value = np.inf
+    converged = False
+    for index in range(first, len(stages)):
+        stage = stages[index]
+        run = STAGES[stage.method][1]
+        if index > first:
+            start = func.evaluations - start_evaluations
+        # Собственный бюджет вычислений этапа
+        stage_termination = None if stage.max_evaluations is None else Termination(max_evaluations=stage.max_evaluations)
+        stage_checkpoint = None if checkpoint is None else checkpoint.extend(
+            stage=index, stage_iteration=offset, stage_evaluations=start, stage_message=", ".join(messages))
+
+        steps = run(func, bounds, positions, values, rng, stage_termination, profiler, stage_checkpoint,
+                    saved if index == first else None, **stage.params)
+        current, stop = None, False
+        while True:
+            try:
+                current = next(steps)
+            except StopIteration as result:
+                stage_converged, stage_message = result.value
+                break
+            current['iteration'] += offset
+            current['evaluations'] = func.evaluations - start_evaluations
+            best_value = min(best_value, current['f_value'])
+            stop = termination is not None and termination.check(best_value)
+            yield current
+            if stop:
+                steps.close()
+                break
+
+        if stop:
+            messages.append(f"{stage.label}: {termination.reason}")
+            return termination.converged, ", ".join(messages)
+        messages.append(f"{stage.label}: {stage_message}")
+        converged = stage_converged
+
+        if current is not None:
+            offset = current['iteration']
+            positions, values = _handoff(func, current, positions, values, low, high, profiler)
+        if index + 1 < len(stages) and (positions is None or len(positions) == 0):
+            return False, f"{stage.label} не нашел допустимых решений"
+
+        # Граница этапов: популяция для следующего этапа и итоги завершённых
+        if checkpoint is not None and index + 1 < len(stages):
+            checkpoint.save(0, 'pipeline', rng, evaluations=0, stage=index + 1, stage_iteration=offset,
+                            stage_evaluations=func.evaluations - start_evaluations, stage_message=", ".join(messages),
+                            positions=positions, values=values)
+
+    return converged, ", ".join(messages)
+
+
+def pipeline_optimize(func, bounds, stages, callback=None, seed=None, rng=None, termination=None, profiler=None, checkpoint=None, resume=None):
+    stages = [Stage(stage) if isinstance(stage, str) else stage for stage in stages]
+    history = History(capacity=sum(stage.params.get('max_iter', 100) for stage in stages), callback=callback)
+    converged, message = collect(pipeline_iterate(func, bounds, stages, seed, rng, termination, profiler, checkpoint, resume), history)
+    return history, converged, message
+
+
+# Гибридный метод GA + PSO: конвейер из двух этапов с параметрами каждого этапа
+def hybrid_iterate(
+    func,
+    bounds,
+    ga_population_size=50,
+    ga_max_iter=50,
+    pso_swarmsize=30,
+    pso_max_iter=30,
+    pso_current_velocity=0.5,
+    pso_local_ratio=2.0,
+    pso_global_ratio=5.0,
+    pso_penalty=10,
+    seed=None,
+    rng=None,
+    termination=None,
+    profiler=None,
+    checkpoint=None,
+    resume=None
+):
+    stages = [
+        Stage('genetic', population_size=ga_population_size, max_iter=ga_max_iter),
+        Stage('particle_swarm', max_iter=pso_max_iter, swarmsize=pso_swarmsize, current_velocity=pso_current_velocity,
+              local_ratio=pso_local_ratio, global_ratio=pso_global_ratio, penalty=pso_penalty)
+    ]
+    return (yield from pipeline_iterate(func, bounds, stages, seed, rng, termination, profiler, checkpoint, resume))
 
 def hybrid_optimize(
     func,
@@ -11,49 +244,18 @@ def hybrid_optimize(
     pso_swarmsize=30,
     pso_max_iter=30,
     pso_current_velocity=0.5,
-    pso_local_ratio=1.0,
-    pso_global_ratio=1.0,
-    pso_penalty=10
+    pso_local_ratio=2.0,
+    pso_global_ratio=5.0,
+    pso_penalty=10,
+    callback=None,
+    seed=None,
+    rng=None,
+    termination=None,
+    profiler=None,
+    checkpoint=None,
+    resume=None
 ):
-    # Запуск GA
-    ga_history, ga_converged, ga_message, ga_population = ga_optimize(
-        objective_func=func,
-        bounds=bounds,
-        population_size=ga_population_size,
-        max_iter=ga_max_iter
-    )
-    
-    # Фильтрация NaN из GA
-    valid_solutions = [ind for ind in ga_population if not np.isnan(ind).any()]
-    if not valid_solutions:
-        return [], False, "GA не нашел допустимых решений"
-    
-    # Выбор лучших решений
-    sorted_solutions = sorted(valid_solutions, key=lambda x: func(x[0], x[1]))
-    initial_positions = sorted_solutions[:pso_swarmsize]
-    
-    # Запуск PSO
-    pso_history, pso_converged, pso_message = pso_optimize(
-        func=func,
-        maxIter=pso_max_iter,
-        swarmsize=pso_swarmsize,
-        bounds=bounds,
-        currentVelocityRatio=0.5,  # Пример значения
-        localVelocityRatio=1.0,
-        globalVelocityRatio=1.0,
-        penaltyRatio=10,
-        initial_positions=initial_positions 
-    )
-    # Объединение истории
-    combined_history = ga_history.copy()
-    last_iter = ga_history[-1]['iteration'] if ga_history else 0
-    
-    for pso_point in pso_history:
-        combined_history.append({
-            'iteration': last_iter + pso_point['iteration'],
-            'x': pso_point['x'],
-            'y': pso_point['y'],
-            'f_value': pso_point['f_value']
-        })
-    
-    return combined_history, pso_converged, f"GA: {ga_message}, PSO: {pso_message}"
\ No newline at end of file
+    history = History(capacity=ga_max_iter + pso_max_iter, callback=callback)
+    converged, message = collect(hybrid_iterate(func, bounds, ga_population_size, ga_max_iter, pso_swarmsize, pso_max_iter, pso_current_velocity,
+                                                pso_local_ratio, pso_global_ratio, pso_penalty, seed, rng, termination, profiler, checkpoint, resume), history)
+    return history, converged, message
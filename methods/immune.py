@@ -1,31 +1,55 @@
 import numpy as np
+from .evaluation import evaluate
+from .bounds import resolve_bounds
+from .history import History
+from .profiler import phases
+from .stream import counted, state, collect
+from .checkpoint import restore
 
-def optimize(func, max_iter, population_size, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps):
+def iterate(func, max_iter, population_size, x_min=None, x_max=None, y_min=None, y_max=None, nb=10, nc=3, nd=5, mutation=0.1, tolerance_steps=100, bounds=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
     """
-    Функция оптимизации методом, похожим на генетический алгоритм
+    Пошаговая оптимизация методом, похожим на генетический алгоритм:
+    генератор состояний после каждой итерации (см. methods.stream)
     
     Параметры:
     func - целевая функция для минимизации
     max_iter - максимальное количество итераций
     population_size - размер популяции
-    x_min, x_max, y_min, y_max - границы поиска
+    x_min, x_max, y_min, y_max - границы поиска (двумерная задача)
     nb - количество лучших особей для отбора
     nc - коэффициент размножения лучших особей
     nd - количество потомков для сохранения
     mutation - начальный уровень мутации
     tolerance_steps - количество шагов без улучшения для остановки
+    bounds - пары [min, max] по каждой координате (задача любой размерности),
+             используется вместо x_min, x_max, y_min, y_max
+    seed, rng - зерно или готовый numpy.random.Generator для воспроизводимости
+    termination - общие критерии остановки (methods.termination.Termination)
+    profiler - замер времени по фазам итерации (methods.profiler.Profiler)
+    initial_positions - начальные особи (например, methods.checkpoint.warm_start)
+    initial_values - известные значения функции в них (не вычисляются повторно)
+    checkpoint - контрольная точка (methods.checkpoint.Checkpoint)
+    resume - продолжение работы с сохранённого состояния
+             (путь к файлу или methods.checkpoint.load)
+
+    Значения функции хранятся вместе с особями, поэтому каждая точка
+    вычисляется ровно один раз. Поле состояния 'evaluations' - число
+    вычислений целевой функции с начала работы.
+    Генератор завершается значением (converged, message).
     """
     
-    # Размерность задачи (2D - x и y)
-    dim = 2
-    
-    # Инициализация начальной популяции случайными значениями в заданных границах
-    population = np.random.uniform(low=[x_min, y_min], 
-                                 high=[x_max, y_max],
-                                 size=(population_size, dim))
-    
-    # История оптимизации для сохранения результатов
-    history = []
+    # Подсчёт вычислений и общие критерии остановки (methods.termination)
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+
+    # Генератор случайных чисел запуска
+    rng = np.random.default_rng(seed if rng is None else rng)
+    # Замер фаз: отбор, клонирование с мутацией, вычисление, учёт результатов
+    phase = phases(profiler)
+
+    # Границы поиска и размерность задачи
+    low, high = resolve_bounds(bounds, x_min, x_max, y_min, y_max)
+    dim = len(low)
     
     # Лучшие значения
     best_fitness = np.inf  # Наилучшее значение функции
@@ -38,83 +62,135 @@ def optimize(func, max_iter, population_size, x_min, x_max, y_min, y_max, nb, nc
     # Параметры для критерия остановки
     tolerance = 1e-16  # Минимальное значимое изменение
     no_improvement_steps = 0  # Счетчик шагов без улучшения
+
+    if resume is None:
+        # Инициализация начальной популяции случайными значениями в заданных границах
+        population = rng.uniform(low=low, 
+                                     high=high,
+                                     size=(population_size, dim))
+        # Первые особи - в заданных начальных точках
+        known = np.empty(0)
+        if initial_positions is not None:
+            initial_positions = np.clip(np.array(initial_positions, dtype=float)[:population_size], low, high)
+            population[:len(initial_positions)] = initial_positions
+            if initial_values is not None:
+                known = np.array(initial_values, dtype=float)[:len(initial_positions)]
+        # Значения функции для особей популяции (вычисляются один раз)
+        fitness = np.concatenate((known, evaluate(func, population[len(known):])))
+        completed = 0
+    else:
+        # Продолжение работы: популяция, генератор и счетчики из контрольной точки
+        saved = restore(resume, 'immune')
+        rng, completed = saved['rng'], saved['iteration']
+        start_evaluations -= saved['evaluations']
+        population, fitness = saved['positions'], saved['values']
+        best_fitness, best_position = saved['best_fitness'], saved.get('best_position')
+        mutation_rate, no_improvement_steps = saved['mutation_rate'], saved['no_improvement_steps']
+
+    # Состояние для контрольной точки
+    def snapshot():
+        return dict(method='immune', rng=rng, evaluations=func.evaluations - start_evaluations, positions=population, values=fitness,
+                    best_fitness=best_fitness, best_position=best_position,
+                    mutation_rate=mutation_rate, no_improvement_steps=no_improvement_steps)
     
     # Основной цикл оптимизации
-    for iteration in range(max_iter):
-        # Вычисление значений функции для всех особей
-        fitness = np.array([func(*ind) for ind in population])
-        
-        # Отбор nb лучших особей
-        best_indices = np.argsort(fitness)[:nb]
-        Sb = population[best_indices].copy()
+    for iteration in range(completed, max_iter):
+        with phase('selection'):
+            # Отбор nb лучших особей
+            best_indices = np.argsort(fitness)[:nb]
+            Sb = population[best_indices].copy()
 
-        # Размножение лучших особей (каждую повторяем nc раз)
-        Sm = np.repeat(Sb, nc, axis=0)
-        
-        # Применение мутации к потомкам
-        mutation = mutation_rate * np.random.uniform(-0.5, 0.5, Sm.shape)
-        Sm = Sm + mutation
+        with phase('variation'):
+            # Размножение лучших особей (каждую повторяем nc раз)
+            Sm = np.repeat(Sb, nc, axis=0)
+            
+            # Применение мутации к потомкам
+            mutation = mutation_rate * rng.uniform(-0.5, 0.5, Sm.shape)
+            Sm = Sm + mutation
 
-        # Ограничение значений в допустимых границах
-        Sm[:, 0] = np.clip(Sm[:, 0], x_min, x_max)
-        Sm[:, 1] = np.clip(Sm[:, 1], y_min, y_max)
+            # Ограничение значений в допустимых границах
+            Sm = np.clip(Sm, low, high)
 
         # Оценка качества потомков
-        Sm_fitness = np.array([func(*ind) for ind in Sm])
-        
-        # Отбор nd лучших потомков
-        best_Sm_indices = np.argsort(Sm_fitness)[:nd]
-        Sm = Sm[best_Sm_indices]
-        
-        # Объединение исходной популяции и потомков
-        combined_population = np.vstack((population, Sm))
-        combined_fitness = np.array([func(*ind) for ind in combined_population])
+        with phase('evaluation'):
+            Sm_fitness = evaluate(func, Sm)
         
-        # Отбор лучших особей для новой популяции
-        best_combined_indices = np.argsort(combined_fitness)[:population_size]
-        population = combined_population[best_combined_indices]
-        
-        # Текущее лучшее решение
-        current_best_fitness = combined_fitness[best_combined_indices[0]]
-        current_best_position = population[0]
-
-        # Уменьшение уровня мутации
-        mutation_rate -= delta_mutation
-
-        # Проверка критерия остановки (отсутствие улучшений)
-        if abs(best_fitness - current_best_fitness) < tolerance:
-            no_improvement_steps += 1
-        else:
-            no_improvement_steps = 0
+        with phase('selection'):
+            # Отбор nd лучших потомков
+            best_Sm_indices = np.argsort(Sm_fitness)[:nd]
+            Sm = Sm[best_Sm_indices]
+            Sm_fitness = Sm_fitness[best_Sm_indices]
+            
+            # Объединение исходной популяции и потомков вместе с их значениями функции
+            combined_population = np.vstack((population, Sm))
+            combined_fitness = np.concatenate((fitness, Sm_fitness))
             
+            # Отбор лучших особей для новой популяции
+            best_combined_indices = np.argsort(combined_fitness)[:population_size]
+            population = combined_population[best_combined_indices]
+            fitness = combined_fitness[best_combined_indices]
+        
+        with phase('bookkeeping'):
+            # Текущее лучшее решение
+            current_best_fitness = combined_fitness[best_combined_indices[0]]
+            current_best_position = population[0]
+
+            # Уменьшение уровня мутации
+            mutation_rate -= delta_mutation
+
+            # Проверка критерия остановки (отсутствие улучшений)
+            if abs(best_fitness - current_best_fitness) < tolerance:
+                no_improvement_steps += 1
+            else:
+                no_improvement_steps = 0
+                
+            # Признак остановки по отсутствию улучшений
+            stagnated = no_improvement_steps >= tolerance_steps
+
+            # Обновление лучшего решения
+            if not stagnated and current_best_fitness < best_fitness:
+                best_fitness = current_best_fitness
+                best_position = current_best_position
+
+            stop = not stagnated and termination is not None and termination.check(best_fitness)
+
+        # Текущее состояние
+        yield state(iteration+1, best_position, best_fitness, func.evaluations - start_evaluations, population, fitness)
+        completed = iteration+1
+
         # Если долго нет улучшений - завершаем оптимизацию
-        if no_improvement_steps >= tolerance_steps:
-            history.append({
-                'iteration': iteration+1,
-                'x': best_position[0],
-                'y': best_position[1],
-                'f_value': best_fitness
-            })
+        if stagnated:
             converged = True
-            message = "Оптимум найден"
-            
-            return history, converged, message
+            message = f"Нет улучшения за {tolerance_steps} итераций"
+            break
 
-        # Обновление лучшего решения
-        if current_best_fitness < best_fitness:
-            best_fitness = current_best_fitness
-            best_position = current_best_position
-        
-        # Сохранение истории
-        history.append({
-            'iteration': iteration+1,
-            'x': best_position[0],
-            'y': best_position[1],
-            'f_value': best_fitness
-        })
-
-    # Если вышли по количеству итераций
-    converged = False
-    message = "Достигнуто максимальное количество итераций"
+        if stop:
+            converged, message = termination.converged, termination.reason
+            break
+
+        # Сохранение состояния каждые checkpoint.every итераций
+        if checkpoint is not None:
+            checkpoint.step(completed, snapshot)
+    else:
+        # Если вышли по количеству итераций
+        converged = False
+        message = "Достигнуто максимальное количество итераций"
+
+    # Состояние в конце работы сохраняется всегда
+    if checkpoint is not None:
+        checkpoint.save(completed, **snapshot())
     
+    return converged, message
+
+
+def optimize(func, max_iter, population_size, x_min=None, x_max=None, y_min=None, y_max=None, nb=10, nc=3, nd=5, mutation=0.1, tolerance_steps=100, bounds=None, callback=None, seed=None, rng=None, termination=None, profiler=None, initial_positions=None, checkpoint=None, resume=None, initial_values=None):
+    """
+    Функция оптимизации методом, похожим на генетический алгоритм.
+    Параметры те же, что у iterate, и callback - функция, вызываемая
+    с каждой новой записью истории. В истории поле 'evaluations' - число
+    вычислений целевой функции с начала работы.
+    """
+    history = History(capacity=max_iter, callback=callback)
+    converged, message = collect(iterate(func, max_iter, population_size, x_min, x_max, y_min, y_max, nb, nc, nd, mutation, tolerance_steps,
+                                         bounds, seed, rng, termination, profiler, initial_positions, checkpoint, resume, initial_values), history, ('evaluations',))
     return history, converged, message
\ No newline at end of file
@@ -0,0 +1,217 @@
+import time
+import inspect
+import multiprocessing
+
+import numpy as np
+from .history import History
+from .objective import Objective
+
+# Островная модель: K подпопуляций GA или PSO развиваются в отдельных процессах
+# и каждые interval итераций обмениваются лучшими особями через каналы (Pipe).
+# Обмен синхронный: координатор ждёт эмигрантов всех работающих островов
+# и рассылает мигрантов по топологии, мигранты заменяют худших особей острова
+# (через send генератора iterate, см. methods.stream).
+# Топологии: 'ring' - остров получает особей предыдущего острова кольца,
+# 'full' - лучших среди особей всех остальных островов.
+# Острова, завершившие работу, выбывают из обмена
+TOPOLOGIES = ('ring', 'full')
+
+
+# Шаг острова: ('migrate', эмигранты) или ('done', итоги острова)
+def _advance(steps, immigrants=None):
+    try:
+        return 'migrate', steps.send(immigrants)
+    except StopIteration as stop:
+        return 'done', stop.value
+
+
+# Лучшие особи острова для обмена: доля rate популяции (не меньше одной особи)
+# по возрастанию значения функции, лучшая точка острова - первой
+def _emigrants(current, rate):
+    positions, values = current['population'], current['values']
+    count = max(1, int(round(rate * len(positions))))
+    known = np.isfinite(values)
+    order = np.argsort(values[known], kind='stable')[:count]
+    positions, values = positions[known][order], values[known][order]
+    if np.isfinite(current['f_value']) and (len(values) == 0 or current['f_value'] < values[0]):
+        positions = np.concatenate((current['position'][None], positions))[:count]
+        values = np.concatenate(([current['f_value']], values))[:count]
+    return positions.copy(), values.copy()
+
+
+# Генератор острова: перебирает iterate метода с записью истории и каждые
+# interval итераций отдаёт эмигрантов, получая взамен мигрантов (или None).
+# Возвращает итоги острова
+def _island(method, func, args, kwargs, interval, rate):
+    if isinstance(func, str):
+        from functions import functions
+        func = functions(func)
+    func = Objective(func)  # счётчик вычислений целевой функции
+
+    start_time = time.perf_counter()
+    history = History()
+    steps = method(func, *args, **kwargs)
+    immigrants = None
+    migrations = 0
+    while True:
+        try:
+            current = steps.send(immigrants)
+        except StopIteration as stop:
+            converged, message = stop.value[:2]
+            break
+        history.append(current['iteration'], current['position'], current['f_value'])
+        immigrants = None
+        if current['iteration'] % interval == 0:
+            immigrants = yield _emigrants(current, rate)
+            migrations += immigrants is not None
+
+    best = history.best()
+    return {
+        'seed': kwargs['seed'],
+        'converged': converged,
+        'message': message,
+        'iterations': len(history),
+        'best_position': best['position'] if best is not None else None,
+        'best_value': best['f_value'] if best is not None else np.inf,
+        'time': time.perf_counter() - start_time,
+        'evaluations': func.evaluations,
+        'migrations': migrations,
+        'history': history
+    }
+
+
+# Выполняется в процессе острова: эмигранты и итоги отправляются координатору,
+# мигранты приходят от него. Ошибка метода передаётся координатору
+def _worker(connection, method, func, args, kwargs, interval, rate):
+    try:
+        steps = _island(method, func, args, kwargs, interval, rate)
+        kind, payload = _advance(steps)
+        connection.send((kind, payload))
+        while kind == 'migrate':
+            kind, payload = _advance(steps, connection.recv())
+            connection.send((kind, payload))
+    except Exception as error:
+        connection.send(('error', error))
+    finally:
+        connection.close()
+
+
+# Остров в процессе координатора с тем же интерфейсом, что у канала процесса:
+# send запоминает мигрантов, recv выполняет шаг острова до следующего обмена
+class _Local:
+    def __init__(self, steps):
+        self.steps = steps
+        self.immigrants = None
+
+    def send(self, immigrants):
+        self.immigrants = immigrants
+
+    def recv(self):
+        return _advance(self.steps, self.immigrants)
+
+
+# Мигранты для каждого острова из эмигрантов работающих островов
+# (номера островов по возрастанию задают кольцо)
+def _migrants(emigrants, topology):
+    islands = sorted(emigrants)
+    if len(islands) < 2:
+        return {i: None for i in islands}
+    if topology == 'ring':
+        return {i: emigrants[islands[k - 1]] for k, i in enumerate(islands)}
+
+    migrants = {}
+    for i in islands:
+        positions = np.concatenate([emigrants[j][0] for j in islands if j != i])
+        values = np.concatenate([emigrants[j][1] for j in islands if j != i])
+        best = np.argsort(values, kind='stable')[:len(emigrants[i][1])]
+        migrants[i] = positions[best], values[best]
+    return migrants
+
+
+# method - функция iterate генетического алгоритма или роя частиц
+# (genetic_algorithm.iterate, particle_swarm.iterate), args/kwargs - её параметры
+# после целевой функции, func - имя функции из functions.py или сериализуемая функция.
+# interval - число итераций между обменами, migration_rate - доля популяции,
+# которую остров отдаёт при обмене, topology - 'ring' или 'full'.
+# processes=False - острова по очереди в текущем процессе (результат тот же).
+# Возвращает историю лучшего острова, его признак сходимости и сообщение,
+# а также отчёт: {'islands': сводки островов, 'stats': статистика, 'best_island': индекс}
+def optimize(method, func, n_islands=4, args=(), kwargs=None, interval=10, migration_rate=0.1, topology='ring', seed=None, processes=True):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Неизвестная топология {topology!r}, доступны: {', '.join(TOPOLOGIES)}")
+    if interval < 1 or not 0 < migration_rate <= 1:
+        raise ValueError("interval должен быть не меньше 1, migration_rate - в интервале (0, 1]")
+    kwargs = dict(kwargs or {})
+    parameters = inspect.signature(method).parameters
+    for name in ('checkpoint', 'resume', 'profiler'):
+        if kwargs.get(name) is not None and name in parameters:
+            raise ValueError(f"Параметр {name} не поддерживается островной моделью")
+
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+    tasks = [(method, func, tuple(args), dict(kwargs, seed=s), interval, migration_rate) for s in seeds]
+
+    start_time = time.perf_counter()
+    workers = []
+    if processes:
+        channels = []
+        for task in tasks:
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_worker, args=(child, *task), daemon=True)
+            worker.start()
+            child.close()
+            channels.append(parent)
+            workers.append(worker)
+    else:
+        channels = [_Local(_island(*task)) for task in tasks]
+
+    islands = [None] * n_islands
+    active = list(range(n_islands))
+    exchanges = 0
+    try:
+        while active:
+            # Сначала ждём все острова, затем рассылаем мигрантов -
+            # процессы островов работают до следующего обмена одновременно
+            emigrants = {}
+            for i in active:
+                kind, payload = channels[i].recv()
+                if kind == 'error':
+                    raise payload
+                if kind == 'done':
+                    islands[i] = payload
+                else:
+                    emigrants[i] = payload
+            active = sorted(emigrants)
+            exchanges += len(active) > 1
+            for i, immigrants in _migrants(emigrants, topology).items():
+                channels[i].send(immigrants)
+    finally:
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        for channel in channels:
+            if processes:
+                channel.close()
+    total_time = time.perf_counter() - start_time
+
+    values = np.array([island['best_value'] for island in islands], dtype=float)
+    best_island = int(np.argmin(np.where(np.isnan(values), np.inf, values)))
+    best_history = islands[best_island]['history']
+    for island in islands:
+        del island['history']  # в отчёте остаются только сводки островов
+
+    stats = {
+        'n_islands': n_islands,
+        'topology': topology,
+        'exchanges': exchanges,
+        'converged_islands': sum(bool(island['converged']) for island in islands),
+        'best_value': values[best_island],
+        'mean_value': np.nanmean(values),
+        'worst_value': np.nanmax(values),
+        'evaluations': sum(island['evaluations'] for island in islands),
+        'total_time': total_time
+    }
+
+    report = {'islands': islands, 'stats': stats, 'best_island': best_island}
+    message = f"Лучший из {n_islands} островов: {islands[best_island]['message']}"
+    return best_history, islands[best_island]['converged'], message, report
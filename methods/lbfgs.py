@@ -0,0 +1,90 @@
+import numpy as np
+from collections import deque
+from .derivatives import gradient_function, wolfe
+from .history import History
+from .stream import counted, state, collect
+
+# Квазиньютоновский метод L-BFGS: направление спуска строится по последним
+# memory парам (s, y) - сдвигам точки и изменениям градиента - без хранения матрицы Гессе.
+# Шаг выбирается по сильным условиям Вольфе, начиная с единичного
+def direction(grad_value, pairs):
+    q = grad_value.copy()
+    alphas = []
+    # Первый проход: от новых пар к старым
+    for s, y, rho in reversed(pairs):
+        alpha = rho * np.dot(s, q)
+        q -= alpha * y
+        alphas.append(alpha)
+    # Начальное приближение обратного гессиана - скаляр (s, y) / (y, y) последней пары
+    if pairs:
+        s, y, _ = pairs[-1]
+        q *= np.dot(s, y) / np.dot(y, y)
+    # Второй проход: от старых пар к новым
+    for (s, y, rho), alpha in zip(pairs, reversed(alphas)):
+        beta = rho * np.dot(y, q)
+        q += (alpha - beta) * s
+    return -q
+
+# func - целевая функция f(x, y) или f(x1, ..., xn).
+# Начальная точка: (x0, y0) или вектор x0 любой размерности (тогда y0 не задаётся).
+# grad - аналитический градиент, имя функции из functions.py или None (конечные разности).
+# memory - число хранимых пар (s, y)
+def iterate(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, memory=10, grad=None, termination=None):
+    current_point = np.array([x0, y0] if y0 is not None else x0, dtype=float).ravel()
+    # Общие критерии остановки (methods.termination): вычисления для градиента тоже учитываются
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    grad_func = gradient_function(func, grad)
+
+    current_value = func(*current_point)
+    grad_value = grad_func(current_point)
+    pairs = deque(maxlen=memory)
+
+    for i in range(max_iter):
+        if not np.all(np.isfinite(grad_value)) or np.any(np.abs(grad_value) > 1e10):
+            return False, "Функция расходится (норма градиента слишком большая)"
+
+        grad_norm = np.linalg.norm(grad_value)
+
+        yield state(i+1, current_point, current_value, func.evaluations - start_evaluations, grad_norm=grad_norm)
+
+        if grad_norm < epsilon1:
+            return True, "Сошёлся (норма градиента меньше заданной точности)"
+
+        if termination is not None and termination.check(current_value):
+            return termination.converged, termination.reason
+
+        search_direction = direction(grad_value, pairs)
+        if np.dot(search_direction, grad_value) >= 0:
+            # Направление не ведёт к убыванию - начинаем заново с антиградиента
+            pairs.clear()
+            search_direction = -grad_value
+
+        # Без накопленных пар длина первого шага ограничивается единицей
+        initial_step = 1.0 if pairs else min(1.0, 1.0 / grad_norm)
+        step, new_point, new_value, new_grad = wolfe(func, grad_func, current_point, current_value, grad_value, search_direction, initial_step)
+        if step == 0 and pairs:
+            # Шага по направлению L-BFGS нет - память сбрасывается, шаг повторяется по антиградиенту
+            pairs.clear()
+            step, new_point, new_value, new_grad = wolfe(func, grad_func, current_point, current_value, grad_value, -grad_value, min(1.0, 1.0 / grad_norm))
+        if step == 0:
+            return True, "Сошёлся (значение функции больше не уменьшается)"
+
+        s, y = new_point - current_point, new_grad - grad_value
+        # Пара сохраняется только при выполнении условия кривизны (s, y) > 0
+        if np.dot(s, y) > 1e-12:
+            pairs.append((s, y, 1.0 / np.dot(s, y)))
+
+        old_point, old_value = current_point, current_value
+        current_point, current_value, grad_value = new_point, new_value, new_grad
+
+        if (np.linalg.norm(current_point-old_point) < epsilon2) and (abs(current_value-old_value) < epsilon2):
+            return True, "Сошёлся (разница значений функции меньше заданной точности)"
+
+    return False, "Не сошёлся (достигнуто максимальное количество итераций)"
+
+
+def optimize(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, memory=10, callback=None, grad=None, termination=None):
+    history = History(capacity=max_iter, callback=callback)
+    converged, message = collect(iterate(func, x0, y0, epsilon1, epsilon2, max_iter, memory, grad, termination), history, ('grad_norm',))
+    return history, converged, message
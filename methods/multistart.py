@@ -0,0 +1,80 @@
+import os
+import time
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from .objective import Objective
+
+# Мультистарт: независимые запуски стохастического метода в пуле процессов.
+# Каждый запуск получает собственное зерно (SeedSequence.spawn), результаты
+# сводятся в лучший запуск, краткую сводку по каждому запуску и общую статистику
+
+
+# Выполняется в процессе пула. func - имя функции из functions.py
+# (лямбды нельзя передать между процессами) или сериализуемая функция.
+# Зерно передаётся методу: все случайные величины запуска берутся из его генератора
+def _run(method, func, args, kwargs, seed):
+    if isinstance(func, str):
+        from functions import functions
+        func = functions(func)
+    func = Objective(func)  # счётчик вычислений целевой функции
+
+    start_time = time.perf_counter()
+    history, converged, message = method(func, *args, **dict(kwargs, seed=seed))[:3]
+    elapsed = time.perf_counter() - start_time
+
+    best = history.best()
+    return {
+        'seed': seed,
+        'converged': converged,
+        'message': message,
+        'iterations': len(history),
+        'best_position': best['position'] if best is not None else None,
+        'best_value': best['f_value'] if best is not None else np.inf,
+        'time': elapsed,
+        'evaluations': func.evaluations,
+        'history': history
+    }
+
+
+# method - функция optimize одного из методов (например, genetic_algorithm.optimize),
+# args/kwargs - её параметры после целевой функции.
+# Возвращает историю лучшего запуска, его признак сходимости и сообщение,
+# а также отчёт: {'runs': сводки запусков, 'stats': статистика, 'best_run': индекс}
+def optimize(method, func, n_runs=10, args=(), kwargs=None, seed=None, max_workers=None):
+    kwargs = dict(kwargs or {})
+    if 'verbose' in inspect.signature(method).parameters:
+        kwargs.setdefault('verbose', False)  # печать времени из каждого процесса не нужна
+
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_runs)]
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_run, method, func, tuple(args), kwargs, s) for s in seeds]
+        runs = [future.result() for future in futures]
+    total_time = time.perf_counter() - start_time
+
+    values = np.array([run['best_value'] for run in runs], dtype=float)
+    best_run = int(np.argmin(np.where(np.isnan(values), np.inf, values)))
+    best_history = runs[best_run]['history']
+    for run in runs:
+        del run['history']  # в отчёте остаются только сводки запусков
+
+    times = np.array([run['time'] for run in runs])
+    stats = {
+        'n_runs': n_runs,
+        'converged_runs': sum(bool(run['converged']) for run in runs),
+        'best_value': values[best_run],
+        'mean_value': np.nanmean(values),
+        'std_value': np.nanstd(values),
+        'median_value': np.nanmedian(values),
+        'worst_value': np.nanmax(values),
+        'mean_time': times.mean(),
+        'mean_evaluations': np.mean([run['evaluations'] for run in runs]),
+        'total_time': total_time
+    }
+
+    report = {'runs': runs, 'stats': stats, 'best_run': best_run}
+    message = f"Лучший из {n_runs} запусков: {runs[best_run]['message']}"
+    return best_history, runs[best_run]['converged'], message, report
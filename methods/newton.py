@@ -0,0 +1,78 @@
+import numpy as np
+from .derivatives import gradient_function, resolve_gradient, hessian, backtracking
+from .history import History
+from .stream import counted, state, collect
+
+# Метод Ньютона: шаг p из системы H p = -g с матрицей Гессе H.
+# Если H не положительно определена, к ней добавляется tau * I (tau растёт,
+# пока разложение Холецкого не выполнится), поэтому направление всегда ведёт к убыванию.
+# Длина шага выбирается по условию Армихо, начиная с полного шага Ньютона
+def newton_direction(hess_value, grad_value):
+    identity = np.eye(len(grad_value))
+    min_diagonal = np.min(np.diag(hess_value))
+    tau = 0.0 if min_diagonal > 0 else 1e-3 - min_diagonal
+    while True:
+        try:
+            lower = np.linalg.cholesky(hess_value + tau * identity)
+            break
+        except np.linalg.LinAlgError:
+            tau = max(2.0 * tau, 1e-3)
+    return -np.linalg.solve(lower.T, np.linalg.solve(lower, grad_value))
+
+# func - целевая функция f(x, y) или f(x1, ..., xn).
+# Начальная точка: (x0, y0) или вектор x0 любой размерности (тогда y0 не задаётся).
+# grad - аналитический градиент, имя функции из functions.py или None (конечные разности).
+# hess - аналитическая матрица Гессе hess(x, y) -> (D, D); без неё матрица считается
+# конечными разностями (по градиенту, если он задан)
+def iterate(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, grad=None, hess=None, termination=None):
+    current_point = np.array([x0, y0] if y0 is not None else x0, dtype=float).ravel()
+    # Общие критерии остановки (methods.termination): вычисления для градиента тоже учитываются
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    grad = resolve_gradient(grad)
+    grad_func = gradient_function(func, grad)
+    if hess is None:
+        hess_func = lambda point: hessian(func, point, grad)
+    else:
+        hess_func = lambda point: np.asarray(hess(*point), dtype=float)
+
+    current_value = func(*current_point)
+
+    for i in range(max_iter):
+        grad_value = grad_func(current_point)
+
+        if not np.all(np.isfinite(grad_value)) or np.any(np.abs(grad_value) > 1e10):
+            return False, "Функция расходится (норма градиента слишком большая)"
+
+        grad_norm = np.linalg.norm(grad_value)
+
+        yield state(i+1, current_point, current_value, func.evaluations - start_evaluations, grad_norm=grad_norm)
+
+        if grad_norm < epsilon1:
+            return True, "Сошёлся (норма градиента меньше заданной точности)"
+
+        if termination is not None and termination.check(current_value):
+            return termination.converged, termination.reason
+
+        hess_value = hess_func(current_point)
+        if not np.all(np.isfinite(hess_value)):
+            return False, "Матрица Гессе не определена в текущей точке"
+
+        search_direction = newton_direction(hess_value, grad_value)
+        step, new_point, new_value = backtracking(func, current_point, current_value, grad_value, search_direction)
+        if step == 0:
+            return True, "Сошёлся (значение функции больше не уменьшается)"
+
+        old_point, old_value = current_point, current_value
+        current_point, current_value = new_point, new_value
+
+        if (np.linalg.norm(current_point-old_point) < epsilon2) and (abs(current_value-old_value) < epsilon2):
+            return True, "Сошёлся (разница значений функции меньше заданной точности)"
+
+    return False, "Не сошёлся (достигнуто максимальное количество итераций)"
+
+
+def optimize(func, x0, y0=None, epsilon1=1e-6, epsilon2=1e-6, max_iter=100, callback=None, grad=None, hess=None, termination=None):
+    history = History(capacity=max_iter, callback=callback)
+    converged, message = collect(iterate(func, x0, y0, epsilon1, epsilon2, max_iter, grad, hess, termination), history, ('grad_norm',))
+    return history, converged, message
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+import numpy as np
+from .evaluation import evaluate
+
+# Число точек в вызове f(*coords). Обычные случаи - все координаты числа или массивы
+# одной формы - разбираются без np.broadcast_shapes: обёртка вызывается на каждом
+# шаге локальных методов, и подсчёт не должен стоить больше самой функции
+def _points(coords):
+    shape = ()
+    for c in coords:
+        c_shape = getattr(c, 'shape', None)
+        if c_shape is None:
+            if isinstance(c, (list, tuple)):
+                return int(np.prod(np.broadcast_shapes(*(np.shape(c) for c in coords))))
+            continue
+        if c_shape == () or c_shape == shape:
+            continue
+        if shape != ():
+            return int(np.prod(np.broadcast_shapes(*(np.shape(c) for c in coords))))
+        shape = c_shape
+    return int(np.prod(shape)) if shape else 1
+
+
+# Обёртка целевой функции: считает вызовы, вычисленные точки, попадания в кэш
+# и время, затраченное на саму функцию. Вызывается так же, как исходная функция -
+# f(x, y) или f(x1, ..., xn) с числами или массивами координат, - поэтому её можно
+# передать любому методу из methods/ вместо функции.
+# С cache_size > 0 значения запоминаются по координатам, округлённым до decimals
+# знаков (вытесняются давно не использованные), и повторные точки не вычисляются заново
+class Objective:
+    def __init__(self, func, cache_size=0, decimals=10):
+        self.func = func
+        self.cache_size = cache_size
+        self.decimals = decimals
+        self._cache = OrderedDict()
+
+        self.calls = 0        # вызовы обёртки (пакетный вызов считается один раз)
+        self.evaluations = 0  # точки, в которых функция действительно вычислялась
+        self.cache_hits = 0   # точки, значения которых взяты из кэша
+        self.time = 0.0       # время внутри исходной функции, сек
+
+    def __call__(self, *coords):
+        self.calls += 1
+        if self.cache_size > 0:
+            return self._cached(coords)
+
+        start_time = time.perf_counter()
+        result = self.func(*coords)
+        self.time += time.perf_counter() - start_time
+        self.evaluations += _points(coords)
+        return result
+
+    def _cached(self, coords):
+        arrays = np.broadcast_arrays(*(np.asarray(c, dtype=float) for c in coords))
+        shape = arrays[0].shape
+        points = np.stack([a.ravel() for a in arrays], axis=1)
+
+        values = np.empty(len(points))
+        missing = {}  # ключ -> строки пакета с этой точкой
+        for i, key in enumerate(map(tuple, np.round(points, self.decimals).tolist())):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                values[i] = self._cache[key]
+                self.cache_hits += 1
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            # Отсутствующие в кэше точки вычисляются одним пакетным вызовом (повторы - один раз)
+            rows = [index[0] for index in missing.values()]
+            start_time = time.perf_counter()
+            computed = evaluate(self.func, points[rows])
+            self.time += time.perf_counter() - start_time
+            self.evaluations += len(rows)
+            for (key, index), value in zip(missing.items(), computed):
+                values[index] = value
+                self.cache_hits += len(index) - 1
+                self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return values.reshape(shape) if shape else values[0]
+
+    # Счётчики в виде словаря (для отчётов и интерфейса)
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'evaluations': self.evaluations,
+            'cache_hits': self.cache_hits,
+            'time': self.time
+        }
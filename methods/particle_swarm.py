@@ -1,85 +1,45 @@
 import time
 import numpy as np
+from .evaluation import evaluate
+from .history import History
+from .profiler import phases
+from .stream import counted, state, collect
+from .checkpoint import restore
 
-class Particle:
-    def __init__(self, swarm):
-        self._position = self.getInitPosition(swarm)#начальная позиция
-
-        self._localBestPosition = self._position[:]#сохраняем как лучшее решение
-
-        self._localBestValue = swarm.getFuncValue(self._position)#считаем и запоминаем как лучшее значение
-
-        self._velocity = self.getInitVelocity(swarm)#начальная скорость частицы
-
-
-    @property
-    def position(self):
-        return self._position
-    
-    @property
-    def velocity(self):
-        return self._velocity
-    
-  #Создаёт случайную точку внутри диапазона
-    def getInitPosition(self, swarm):
-        return np.random.rand(swarm.dimension) * (swarm.maxvalues - swarm.minvalues) + swarm.minvalues
-    
-    #Задаёт начальную скорость 
-    def getInitVelocity(self, swarm):
-        minval = -(swarm.maxvalues - swarm.minvalues)
-        maxval = swarm.maxvalues - swarm.minvalues
-
-        return np.random.rand(swarm.dimension) * (maxval - minval) + minval
-    
-
-    def nextIteration(self, swarm):
-        #векторы  инерции и тяготения к лучшим позициям
-        random_currentPosition = np.random.rand(swarm.dimension)
-        random_globalPosition = np.random.rand(swarm.dimension)
-        
-        #влияние локального и глобального лучшего решения
-        velocityRatio = swarm.localVelocityRatio + swarm.globalVelocityRatio
-        #Вычисляется коэффициент,используется для масштабирования всей скорости 
-        under_sqrt = velocityRatio**2 - 4.0*velocityRatio
-        if under_sqrt < 0:
-            under_sqrt = 0  # или можно выбросить исключение, но обычно берут 0
-        commonRatio = (2.0*swarm.currentVelocityRatio) / (np.abs(2.0 - velocityRatio - np.sqrt(under_sqrt)))
-
-        newVelocity1 = commonRatio * self._velocity #инерция 
-        newVelocity2 = commonRatio * swarm.localVelocityRatio * random_currentPosition * (self._localBestPosition - self._position)#притяжение к локальному лучшему
-        newVelocity3 = commonRatio * swarm.globalVelocityRatio * random_globalPosition * (swarm.globalBestPosition - self._position)#притяжение к глобальному лучшему
-
-        newVelocity = newVelocity1 + newVelocity2 + newVelocity3
-
-        self._velocity = newVelocity
-
-        self._position += self._velocity
-        #считаем значение функции в новой точке
-        funcValue = swarm.getFuncValue(self._position)
-        #Если новая позиция лучше, она сохраняется как новое локальное лучшее
-        if funcValue < self._localBestValue:
-            self._localBestPosition = self._position[:]
-            self._localBestValue = funcValue
-
+#Рой хранится в виде массивов (N, D): позиции, скорости и лучшие позиции всех частиц,
+#поэтому одна итерация обновляет весь рой одним векторным шагом
 class Swarm:
-    def __init__(self, func, swarmsize, minvalues, maxvalues, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio):
+    def __init__(self, func, swarmsize, minvalues, maxvalues, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio, rng=None, initial_positions=None, initial_values=None, profiler=None, state=None):
         self._func = func
+        self._rng = np.random.default_rng(rng) #генератор случайных чисел роя
+        self._phase = phases(profiler) #замер фаз итерации (methods.profiler)
         self._swarmsize = swarmsize
-        self._minvalues = np.array(minvalues[:])
-        self._maxvalues = np.array(maxvalues[:])
+        self._minvalues = np.array(minvalues[:], dtype=float)
+        self._maxvalues = np.array(maxvalues[:], dtype=float)
         self._currentVelocityRatio = currentVelocityRatio #инерция
-        self._localVelocityRatio = localVelocityRatio#локальное лучшее 
+        self._localVelocityRatio = localVelocityRatio#локальное лучшее
         self._globalVelocityRatio = globalVelocityRatio#глобальное лучшее
         self._globalBestValue = None
         self._globalBestPosition = None
         self._penaltyRatio = penaltyRatio #коэффиценты штрафов
 
-        self._swarm = self.createSwarm()
+        #коэффициент масштабирования скорости одинаков для всех частиц - считаем один раз
+        self._commonRatio = self.getCommonRatio()
+
+        #state - сохранённое состояние роя (см. getState), тогда рой не создаётся заново
+        if state is None:
+            self.createSwarm(initial_positions, initial_values)
+        else:
+            self.setState(state)
 
     @property
     def func(self):
         return self._func
 
+    @property
+    def rng(self):
+        return self._rng
+
     @property
     def minvalues(self):
         return self._minvalues
@@ -107,66 +67,218 @@ class Swarm:
     @property
     def globalBestValue(self):
         return self._globalBestValue
-    
+
     @property
     def penaltyRatio(self):
         return self._penaltyRatio
-    
+
     @property
     def dimension(self):
         return len(self._minvalues)
-    #Получить частицу по индексу
-    def getParticle(self, index):
-        return self._swarm[index]
-    #Создание частиц в рое
-    def createSwarm(self):
-        return [Particle(self) for _ in range(self._swarmsize)]
-    #за итерацию  обновляем все частицы
+
+    @property
+    def positions(self):
+        return self._positions
+
+    #значения функции (со штрафом) в текущих позициях
+    @property
+    def values(self):
+        return self._values
+
+    #значения функции без штрафа в текущих позициях
+    @property
+    def funcValues(self):
+        return self._funcValues
+
+    @property
+    def velocities(self):
+        return self._velocities
+
+    @property
+    def localBestPositions(self):
+        return self._localBestPositions
+
+    @property
+    def localBestValues(self):
+        return self._localBestValues
+
+    #Вычисляется коэффициент,используется для масштабирования всей скорости
+    def getCommonRatio(self):
+        #влияние локального и глобального лучшего решения
+        velocityRatio = self._localVelocityRatio + self._globalVelocityRatio
+        under_sqrt = velocityRatio**2 - 4.0*velocityRatio
+        if under_sqrt < 0:
+            under_sqrt = 0  # или можно выбросить исключение, но обычно берут 0
+        return (2.0*self._currentVelocityRatio) / (np.abs(2.0 - velocityRatio - np.sqrt(under_sqrt)))
+
+    #Создание роя: случайные точки внутри диапазона и начальные скорости.
+    #initial_positions - начальные позиции первых частиц (например, лучшие решения другого метода),
+    #initial_values - уже известные значения функции в них (тогда они не вычисляются заново)
+    def createSwarm(self, initial_positions=None, initial_values=None):
+        size = (self._swarmsize, self.dimension)
+        span = self._maxvalues - self._minvalues
+
+        self._positions = self._rng.random(size) * span + self._minvalues
+        self._velocities = self._rng.random(size) * (2.0*span) - span
+        self._funcValues = np.empty(self._swarmsize)
+
+        count = 0
+        if initial_positions is not None:
+            initial_positions = np.array(initial_positions, dtype=float)[:self._swarmsize]
+            count = len(initial_positions)
+            self._positions[:count] = initial_positions
+            if initial_values is not None:
+                initial_values = np.array(initial_values, dtype=float)[:count]
+                self.updateGlobalBest(initial_positions, initial_values)
+                self._funcValues[:count] = initial_values
+                
+        #сохраняем как лучшие решения частиц (вычисляются только неизвестные значения)
+        self._localBestPositions = self._positions.copy()
+        evaluated = count if initial_values is not None else 0
+        self._funcValues[evaluated:] = self.getFuncValues(self._positions[evaluated:])
+        self._values = self._funcValues + self.getPenalties(self._positions)
+        self._localBestValues = self._values.copy()
+
+    #Мигранты с других островов (methods.islands) заменяют частицы с худшими лучшими позициями.
+    #values - значения функции без штрафа, как в состоянии iterate
+    def immigrate(self, positions, values):
+        positions = np.array(positions, dtype=float)[:self._swarmsize]
+        values = np.array(values, dtype=float)[:len(positions)]
+        worst = np.argsort(self._localBestValues, kind='stable')[self._swarmsize - len(positions):]
+        self.placeParticles(worst, positions, values)
+
+    #Частицы indices переносятся в точки positions с известными значениями функции values (без штрафа),
+    #штраф за выход за границы добавляется к лучшим значениям частиц один раз
+    def placeParticles(self, indices, positions, values):
+        self.updateGlobalBest(positions, values)
+        self._positions[indices] = positions
+        self._localBestPositions[indices] = positions
+        self._funcValues[indices] = values
+        self._values[indices] = values + self.getPenalties(positions)
+        self._localBestValues[indices] = self._values[indices]
+
+    #Состояние роя для контрольной точки (methods.checkpoint)
+    def getState(self):
+        return {
+            'positions': self._positions,
+            'values': self._values,
+            'func_values': self._funcValues,
+            'velocities': self._velocities,
+            'local_positions': self._localBestPositions,
+            'local_values': self._localBestValues,
+            'global_position': self._globalBestPosition,
+            'global_value': self._globalBestValue
+        }
+
+    def setState(self, state):
+        self._positions = np.array(state['positions'], dtype=float)
+        self._values = np.array(state['values'], dtype=float)
+        self._funcValues = np.array(state['func_values'], dtype=float)
+        self._velocities = np.array(state['velocities'], dtype=float)
+        self._localBestPositions = np.array(state['local_positions'], dtype=float)
+        self._localBestValues = np.array(state['local_values'], dtype=float)
+        self._globalBestPosition = np.array(state['global_position'], dtype=float)
+        self._globalBestValue = state['global_value']
+
+    #за итерацию обновляем все частицы
     def nextIteration(self):
-        for particle in self._swarm:
-            particle.nextIteration(self)
-    
-    def getFuncValue(self, position):
-        result = self._func(*position)
-        #Если это наилучшее значение из всех, сохраняется как глобальное
-        if (self._globalBestValue is None) or (result < self._globalBestValue):
-            self._globalBestValue = result
-            self._globalBestPosition = position[:]
-
-        return result + self.getPenalty(position)
+        with self._phase('movement'):
+            size = self._positions.shape
+            #векторы тяготения к лучшим позициям
+            random_currentPosition = self._rng.random(size)
+            random_globalPosition = self._rng.random(size)
+
+            newVelocity1 = self._velocities #инерция
+            newVelocity2 = self._localVelocityRatio * random_currentPosition * (self._localBestPositions - self._positions)#притяжение к локальному лучшему
+            newVelocity3 = self._globalVelocityRatio * random_globalPosition * (self._globalBestPosition - self._positions)#притяжение к глобальному лучшему
+
+            self._velocities = self._commonRatio * (newVelocity1 + newVelocity2 + newVelocity3)
+
+            self._positions += self._velocities
+        #считаем значение функции в новых точках
+        with self._phase('evaluation'):
+            self._funcValues = self.getFuncValues(self._positions)
+            self._values = self._funcValues + self.getPenalties(self._positions)
+        #Если новая позиция лучше, она сохраняется как новое локальное лучшее
+        with self._phase('bookkeeping'):
+            improved = self._values < self._localBestValues
+            self._localBestPositions[improved] = self._positions[improved]
+            self._localBestValues[improved] = self._values[improved]
+
+    #значения функции без штрафа (лучшее из них может стать глобальным лучшим)
+    def getFuncValues(self, positions):
+        results = evaluate(self._func, positions)
+        self.updateGlobalBest(positions, results)
+
+        return results
+
+    #Если лучшее из значений - наилучшее из всех, оно сохраняется как глобальное
+    def updateGlobalBest(self, positions, results):
+        if len(results) == 0:
+            return
+        best = np.argmin(np.where(np.isnan(results), np.inf, results))
+        if (self._globalBestValue is None) or (results[best] < self._globalBestValue):
+            self._globalBestValue = results[best]
+            self._globalBestPosition = positions[best].copy()
     #если координата вне допустимого диапазона, добавляется штраф
-    def getPenalty(self, position):
-        penalty1 = sum([self._penaltyRatio*abs(coord-minval) for coord, minval in zip(position, self.minvalues) if coord < minval])
-        penalty2 = sum([self._penaltyRatio*abs(coord-maxval) for coord, maxval in zip(position, self.maxvalues) if coord > maxval])
+    def getPenalties(self, positions):
+        penalty1 = self._penaltyRatio * np.clip(self._minvalues - positions, 0, None).sum(axis=1)
+        penalty2 = self._penaltyRatio * np.clip(positions - self._maxvalues, 0, None).sum(axis=1)
 
         return penalty1 + penalty2
-    
 
-def optimize(func, maxIter, swarmsize, bounds, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio,initial_positions = None, verbose=True):
+
+# Пошаговый режим (methods.stream): после каждой итерации отдаётся состояние
+# с лучшей точкой роя и текущими позициями частиц. Через send((positions, values))
+# генератору передаются мигранты с других островов (methods.islands).
+# checkpoint - контрольная точка (methods.checkpoint.Checkpoint), resume - продолжение
+# работы с сохранённого состояния (путь к файлу или methods.checkpoint.load)
+def iterate(func, maxIter, swarmsize, bounds, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio, initial_positions=None, seed=None, rng=None, initial_values=None, termination=None, profiler=None, checkpoint=None, resume=None):
 
     # Инициализация параметров
-    history = []
-    start_time = time.time()
-    swarm = Swarm(func, swarmsize, bounds[:][0], bounds[:][1], currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio)
-    if initial_positions is not None:
-        for i, pos in enumerate(initial_positions):
-            if i < len(swarm._swarm):
-                swarm._swarm[i]._position = np.array(pos)
-                swarm._swarm[i]._localBestPosition = np.array(pos)
-                swarm._swarm[i]._localBestValue = swarm.getFuncValue(pos)
-    for i in range(maxIter):
+    # bounds - [нижние границы, верхние границы], каждая - вектор длины D,
+    # initial_values - известные значения функции в initial_positions (не вычисляются повторно)
+    # Подсчёт вычислений и общие критерии остановки (methods.termination)
+    func = counted(func, termination)
+    start_evaluations = func.evaluations
+    converged = False
+    message = "Достигнуто максимальное количество итераций"
+    rng = seed if rng is None else rng
+    # Продолжение работы: рой, генератор и счётчики из контрольной точки
+    saved = None if resume is None else restore(resume, 'particle_swarm')
+    completed = 0
+    if saved is not None:
+        rng, completed = saved['rng'], saved['iteration']
+        start_evaluations -= saved['evaluations']
+    swarm = Swarm(func, swarmsize, bounds[:][0], bounds[:][1], currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio, rng, initial_positions, initial_values, profiler, saved)
+    phase = phases(profiler)
+
+    def snapshot():
+        return dict(method='particle_swarm', rng=swarm.rng, evaluations=func.evaluations - start_evaluations, **swarm.getState())
+
+    for i in range(completed, maxIter):
         swarm.nextIteration()
-        history.append({
-            'iteration': i+1,
-            'x': swarm.globalBestPosition[0],
-            'y': swarm.globalBestPosition[1],
-            'f_value': swarm.globalBestValue
-        })
-    
+        completed = i+1
+        with phase('bookkeeping'):
+            stop = termination is not None and termination.check(swarm.globalBestValue)
+        immigrants = yield state(i+1, swarm.globalBestPosition, swarm.globalBestValue, func.evaluations - start_evaluations, swarm.positions, swarm.funcValues)
+        if stop:
+            converged, message = termination.converged, termination.reason
+            break
+        if immigrants is not None:
+            swarm.immigrate(*immigrants)
+        if checkpoint is not None:
+            checkpoint.step(completed, snapshot)
+    # Состояние в конце работы сохраняется всегда
+    if checkpoint is not None:
+        checkpoint.save(completed, **snapshot())
+    return converged, message
+
+def optimize(func, maxIter, swarmsize, bounds, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio,initial_positions = None, verbose=True, callback=None, seed=None, rng=None, initial_values=None, termination=None, profiler=None, checkpoint=None, resume=None):
+    history = History(capacity=maxIter, callback=callback)
+    start_time = time.time()
+    converged, message = collect(iterate(func, maxIter, swarmsize, bounds, currentVelocityRatio, localVelocityRatio, globalVelocityRatio, penaltyRatio,
+                                         initial_positions, seed, rng, initial_values, termination, profiler, checkpoint, resume), history)
     if verbose:
         print(f"Время выполнения рой частиц: {time.time() - start_time:.2f} сек")
-    # Формирование результата
-    converged = True
-    message = "Оптимум найден" if converged else "Достигнуто максимальное количество итераций"
-    
-    return history, converged, message
\ No newline at end of file
+    return history, converged, message
@@ -0,0 +1,66 @@
+import time
+from contextlib import nullcontext
+
+# Профилирование методов по фазам. Метод получает profiler (или None) и оборачивает
+# участки итерации в with phase('имя'): ... - время и число входов накапливаются
+# по имени фазы. Без профилировщика phases() возвращает один общий пустой
+# контекст, поэтому выключенное профилирование почти ничего не стоит.
+# Фазы не вкладываются друг в друга: каждый участок итерации относится к одной фазе
+class Profiler:
+    def __init__(self):
+        self.times = {}   # фаза -> суммарное время, сек
+        self.counts = {}  # фаза -> число входов в фазу
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, elapsed):
+        self.times[name] = self.times.get(name, 0.0) + elapsed
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.times.values())
+
+    # Сводка по фазам в порядке убывания времени: время, число входов,
+    # среднее время одного входа и доля от суммарного времени всех фаз
+    def stats(self):
+        total = self.total
+        return {
+            name: {
+                'time': elapsed,
+                'count': self.counts[name],
+                'mean': elapsed / self.counts[name],
+                'share': elapsed / total if total > 0 else 0.0
+            }
+            for name, elapsed in sorted(self.times.items(), key=lambda item: -item[1])
+        }
+
+    def reset(self):
+        self.times.clear()
+        self.counts.clear()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_DISABLED = nullcontext()
+
+
+# Функция phase(name) для метода: замер фазы или пустой контекст без профилировщика
+def phases(profiler):
+    if profiler is None:
+        return lambda name: _DISABLED
+    return profiler.phase
@@ -1,6 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
 from scipy.optimize import minimize, linprog
 import numpy as np
-#SLSQP
+from .history import History
+
+# Задача квадратичного программирования:
+#   f(x) = 1/2 x^T H x + g^T x -> min,  A x <= b,  x >= 0 (если nonnegative)
+# H, g строятся из коэффициентов целевой функции, A, b - из коэффициентов ограничений.
+# Выпуклая задача (H положительно полуопределена) решается прямо-двойственным методом
+# внутренней точки (предиктор-корректор Мехротры), при H = 0 задача линейная и
+# передаётся linprog. Невыпуклая задача (например, максимум выпуклой функции)
+# решается SLSQP с аналитическими градиентами - найденный экстремум локальный
+
+# Максимальное число итераций и точность метода внутренней точки: TOLERANCE - для
+# невязок условий оптимальности, COMPLEMENTARITY - для средней дополняющей
+# нежёсткости mu (в вырожденных задачах ошибка точки порядка sqrt(mu))
+MAX_ITER = 100
+TOLERANCE = 1e-9
+COMPLEMENTARITY = 1e-14
 
 def objective(x, coeffs):
     x1, x2 = x[0], x[1]
@@ -8,47 +24,279 @@ def objective(x, coeffs):
 
 def objective_param(coeffs):
     return lambda x1, x2: coeffs[0] * x1 ** 2 + coeffs[1] * x2 ** 2 + coeffs[2] * x1 * x2 + coeffs[3] * x1 + coeffs[4] * x2
-#задаем ограничения в виде неравенств
-def constraints(coeffs_con):
-    cons = []
-    for i in range(0, len(coeffs_con), 3):
-        a, b, c = coeffs_con[i], coeffs_con[i+1], coeffs_con[i+2]
-        cons.append({'type': 'ineq', 
-                    'fun': lambda x, a=a, b=b, c=c: c - (a * x[0] + b * x[1])})
-    
-    # Ограничения неотрицательности
-    cons.append({'type': 'ineq', 'fun': lambda x: x[0]})
-    cons.append({'type': 'ineq', 'fun': lambda x: x[1]})
+
+# Коды результата решения (массив 'status' в optimize_batch)
+SUCCESS = 0         # решение найдено
+MAX_ITERATIONS = 1  # достигнут предел итераций
+DIVERGED = 2        # задача не ограничена или несовместна
+FAILED = 3          # linprog или SLSQP не нашли решения
+
+STATUS_MESSAGES = {
+    MAX_ITERATIONS: "Достигнуто максимальное количество итераций метода внутренней точки",
+    DIVERGED: "Задача не ограничена или несовместна (метод внутренней точки расходится)"
+}
+
+# Матрица Гессе H и линейный член g целевой функции.
+# coeffs_obj - коэффициенты двумерной функции [x1^2, x2^2, x1*x2, x1, x2]
+# или пара (Q, c) для функции x^T Q x + c^T x любой размерности.
+# Для пакета задач коэффициенты складываются по первой оси: (K, 5) или Q (K, n, n), c (K, n)
+def quadratic_terms(coeffs_obj):
+    try:
+        coeffs = np.asarray(coeffs_obj, dtype=float)
+    except ValueError:
+        coeffs = None  # пара (Q, c) разной формы
+    if coeffs is None or coeffs.shape[-1] != 5:
+        Q, c = np.asarray(coeffs_obj[0], dtype=float), np.asarray(coeffs_obj[1], dtype=float)
+        return Q + np.swapaxes(Q, -1, -2), c
+    a11, a22, a12, c1, c2 = np.moveaxis(coeffs, -1, 0)
+    H = np.stack([np.stack([2*a11, a12], axis=-1), np.stack([a12, 2*a22], axis=-1)], axis=-2)
+    return H, np.stack([c1, c2], axis=-1)
+
+# Матрица A и правая часть b ограничений A x <= b.
+# coeffs_con - строки [a_1, ..., a_n, b]: плоский список по n+1 числу, матрица (m, n+1)
+# или для пакета задач (K, m, n+1)
+def linear_constraints(coeffs_con, dimension):
+    rows = np.asarray(coeffs_con, dtype=float)
+    if rows.ndim < 2:
+        rows = rows.reshape(-1, dimension + 1)
+    return rows[..., :dimension], rows[..., dimension]
+
+#задаем ограничения в виде неравенств: одно векторное ограничение b - A x >= 0 с якобианом
+def constraints(A, b, nonnegative=True):
+    cons = [{'type': 'ineq', 'fun': lambda x: b - A @ x, 'jac': lambda x: -A}]
+    if nonnegative:
+        cons.append({'type': 'ineq', 'fun': lambda x: x, 'jac': lambda x: np.eye(len(x))})
     return cons
-#строим квадратичную апроксимацию целевой функции и линейную апроксимацию ограничений потом решается QP
-def optimize(x0, coeffs_obj, coeffs_con, type):
-    
-    if type == "minimize":
-        result = minimize(objective, x0, args=coeffs_obj,
-                         constraints=constraints(coeffs_con),
-                         options={'maxiter': 1000, 'ftol': 1e-9})
-        f_value = result.fun
-    elif type == "maximize":
-        result = minimize(lambda x, coeffs: -objective(x, coeffs), x0,
-                         args=coeffs_obj, constraints=constraints(coeffs_con),
-                         options={'maxiter': 1000, 'ftol': 1e-9})
-        f_value = -result.fun
-
-    if not result.success:
-        return [{
-            'iteration': "Final",
-            'x': result.x[0],
-            'y': result.x[1],
-            'f_value': f_value,
-            'grad_norm': np.nan
-    }
-    ], False, "Минимум функции не найден. Сообщение программы: "+result.message if type=="minimize" else "Максимум функции не найден. Сообщение программы: "+result.message
+
+# Шаг до границы положительной области по последней оси: наибольшее alpha <= 1,
+# при котором v + alpha*dv >= 0
+def step_to_boundary(v, dv):
+    negative = dv < 0
+    ratio = np.where(negative, -v / np.where(negative, dv, -1.0), np.inf)
+    return np.minimum(1.0, ratio.min(axis=-1, initial=np.inf))
+
+# Произведение пакета матриц (K, p, q) на пакет векторов (K, q)
+def _matvec(M, v):
+    return (M @ v[..., None])[..., 0]
+
+# Решение пакета систем M x = rhs; при вырожденной матрице - по отдельности методом наименьших квадратов
+def _solve(M, rhs):
+    try:
+        return np.linalg.solve(M, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.array([np.linalg.lstsq(Mk, rk, rcond=None)[0] for Mk, rk in zip(M, rhs)])
+
+# Метод внутренней точки для пакета выпуклых задач min 1/2 x^T H x + g^T x, A x <= b
+# одинаковой формы: H (K, n, n), g (K, n), A (K, m, n), b (K, m), x0 (K, n).
+# Переменные: x, невязки ограничений s = b - A x >= 0 и двойственные z >= 0.
+# На каждой итерации для всех ещё не решённых задач сразу решается приведённая система
+# (H + A^T diag(z/s) A) dx = rhs; решённые и расходящиеся задачи выбывают из пакета.
+# Возвращает итоговые точки, коды результата, число итераций и (при trajectory) точки всех итераций
+def interior_point(H, g, A, b, x0, max_iter=MAX_ITER, tol=TOLERANCE, trajectory=False):
+    K, m = b.shape
+    x = np.array(x0, dtype=float)
+    status = np.full(K, MAX_ITERATIONS, dtype=np.int8)
+    iterations = np.zeros(K, dtype=np.int64)
+    points = [x.copy()] if trajectory else None
+
+    if m == 0:
+        # Без ограничений минимум - решение системы H x = -g
+        for k in range(K):
+            x[k] = np.linalg.lstsq(H[k], -g[k], rcond=None)[0]
+            status[k] = SUCCESS if np.allclose(H[k] @ x[k], -g[k]) else DIVERGED
+        if trajectory:
+            points.append(x.copy())
+        return x, status, iterations, points
+
+    s = np.maximum(b - _matvec(A, x), 1.0)
+    z = np.ones((K, m))
+    scale_d = 1.0 + np.linalg.norm(g, axis=1)
+    scale_p = 1.0 + np.linalg.norm(b, axis=1)
+    active = np.ones(K, dtype=bool)
+
+    for iteration in range(max_iter):
+        index = np.flatnonzero(active)
+        Hk, gk, Ak, bk = H[index], g[index], A[index], b[index]
+        xk, sk, zk = x[index], s[index], z[index]
+        At = np.swapaxes(Ak, 1, 2)
+
+        r_d = _matvec(Hk, xk) + gk + _matvec(At, zk)
+        r_p = _matvec(Ak, xk) + sk - bk
+        mu = np.sum(sk * zk, axis=1) / m
+        done = (np.linalg.norm(r_d, axis=1) <= tol * scale_d[index]) & (np.linalg.norm(r_p, axis=1) <= tol * scale_p[index]) & (mu <= COMPLEMENTARITY * scale_d[index] * scale_p[index])
+        status[index[done]] = SUCCESS
+        active[index[done]] = False
+        if np.all(done):
+            break
+
+        # Дальше - только нерешённые задачи
+        keep = ~done
+        index, Hk, Ak, At, bk = index[keep], Hk[keep], Ak[keep], At[keep], bk[keep]
+        xk, sk, zk, r_d, r_p, mu = xk[keep], sk[keep], zk[keep], r_d[keep], r_p[keep], mu[keep]
+
+        D = zk / sk
+        M = Hk + At @ (D[..., None] * Ak)
+
+        def direction(r_c):
+            dx = _solve(M, -r_d - _matvec(At, D * r_p - r_c / sk))
+            dz = D * (_matvec(Ak, dx) + r_p) - r_c / sk
+            ds = -(r_c + sk * dz) / zk
+            return dx, ds, dz
+
+        # Предиктор: аффинное направление (без центрирования)
+        dx, ds, dz = direction(sk * zk)
+        alpha = np.minimum(step_to_boundary(sk, ds), step_to_boundary(zk, dz))[:, None]
+        mu_affine = np.sum((sk + alpha * ds) * (zk + alpha * dz), axis=1) / m
+        sigma = (mu_affine / mu) ** 3
+
+        # Корректор: центрирование и поправка второго порядка
+        dx, ds, dz = direction(sk * zk + ds * dz - (sigma * mu)[:, None])
+        alpha = np.minimum(1.0, 0.99 * np.minimum(step_to_boundary(sk, ds), step_to_boundary(zk, dz)))[:, None]
+
+        x[index], s[index], z[index] = xk + alpha * dx, sk + alpha * ds, zk + alpha * dz
+        iterations[index] += 1
+        if trajectory:
+            points.append(x.copy())
+
+        # Неограниченная задача уводит x на бесконечность, несовместная - двойственные z
+        xk, zk = x[index], z[index]
+        diverged = ~(np.all(np.isfinite(xk), axis=1) & np.all(np.isfinite(zk), axis=1)) | (np.maximum(np.abs(xk).max(axis=1), zk.max(axis=1)) > 1e12)
+        status[index[diverged]] = DIVERGED
+        active[index[diverged]] = False
+
+    return x, status, iterations, points
+
+# Линейная задача (H = 0): linprog. Возвращает точку, код результата, число итераций и сообщение
+def _linear(g, A, b, x0, nonnegative):
+    result = linprog(g, A_ub=A if len(b) else None, b_ub=b if len(b) else None,
+                     bounds=(0, None) if nonnegative else (None, None), method='highs')
+    if result.x is None:
+        return np.array(x0, dtype=float), FAILED, result.nit, result.message
+    return result.x, SUCCESS if result.success else FAILED, result.nit, result.message
+
+# Невыпуклая задача: SLSQP с аналитическими градиентами (экстремум локальный)
+def _nonconvex(H, g, A, b, x0, nonnegative):
+    result = minimize(lambda x: 0.5 * x @ H @ x + g @ x, x0, jac=lambda x: H @ x + g, constraints=constraints(A, b, nonnegative),
+                      method='SLSQP', options={'maxiter': 1000, 'ftol': 1e-9})
+    return result.x, SUCCESS if result.success else FAILED, result.nit, result.message
+
+# Признаки линейной и выпуклой задачи для пакета матриц Гессе (K, n, n)
+def _classify(H):
+    linear = ~np.any(H, axis=(1, 2))
+    scale = np.maximum(1.0, np.abs(H).max(axis=(1, 2)))
+    convex = np.linalg.eigvalsh(H)[:, 0] >= -1e-10 * scale
+    return linear, convex & ~linear
+
+# Ограничения x >= 0 для метода внутренней точки - дополнительные строки -x <= 0
+def _with_nonnegative(A, b):
+    K, _, n = A.shape
+    return np.concatenate((A, np.broadcast_to(-np.eye(n), (K, n, n))), axis=1), np.concatenate((b, np.zeros((K, n))), axis=1)
+
+# Решение задачи квадратичного программирования (см. описание в начале модуля).
+# Возвращает итоговую точку, значение f, флаг успеха, сообщение и точки итераций
+def solve_qp(H, g, A, b, x0=None, nonnegative=True):
+    H, g = np.asarray(H, dtype=float), np.asarray(g, dtype=float)
+    A, b = np.asarray(A, dtype=float).reshape(-1, len(g)), np.asarray(b, dtype=float)
+    x0 = np.zeros(len(g)) if x0 is None else np.asarray(x0, dtype=float)
+    value = lambda x: 0.5 * x @ H @ x + g @ x
+
+    linear, convex = _classify(H[None])
+    if linear[0]:
+        x, status, _, message = _linear(g, A, b, x0, nonnegative)
+        return x, value(x), status == SUCCESS, message, [x0, x] if status == SUCCESS else [x0]
+
+    if convex[0]:
+        A_ip, b_ip = _with_nonnegative(A[None], b[None]) if nonnegative else (A[None], b[None])
+        x, status, iterations, points = interior_point(H[None], g[None], A_ip, b_ip, x0[None], trajectory=True)
+        message = STATUS_MESSAGES.get(status[0], f"Оптимизация завершена (метод внутренней точки, итераций: {iterations[0]})")
+        return x[0], value(x[0]), status[0] == SUCCESS, message, [point[0] for point in points]
+
+    x, status, _, message = _nonconvex(H, g, A, b, x0, nonnegative)
+    return x, value(x), status == SUCCESS, message, [x0, x]
+
+# Решение части пакета (выполняется и в процессе пула). Выпуклые задачи, в том числе
+# линейные (H = 0 - тоже положительно полуопределённая матрица), решаются одним пакетным
+# методом внутренней точки: для тысяч маленьких задач это быстрее поочерёдных вызовов
+# linprog. Невыпуклые задачи решаются по очереди.
+# warm_start - невыпуклая задача начинается из решения предыдущей невыпуклой задачи
+# пакета (соседние задачи обычно близки), если та решена
+def _solve_batch(H, g, A, b, x0, nonnegative, warm_start):
+    x = np.array(x0, dtype=float)
+    status = np.full(len(g), FAILED, dtype=np.int8)
+    iterations = np.zeros(len(g), dtype=np.int64)
+    linear, convex = _classify(H)
+
+    index = np.flatnonzero(convex | linear)
+    if len(index):
+        A_ip, b_ip = (A[index], b[index])
+        if nonnegative:
+            A_ip, b_ip = _with_nonnegative(A_ip, b_ip)
+        x[index], status[index], iterations[index], _ = interior_point(H[index], g[index], A_ip, b_ip, x[index])
+
+    previous = None
+    for k in np.flatnonzero(~linear & ~convex):
+        start = previous if (warm_start and previous is not None) else x[k]
+        x[k], status[k], iterations[k], _ = _nonconvex(H[k], g[k], A[k], b[k], start, nonnegative)
+        previous = x[k].copy() if status[k] == SUCCESS else None
+
+    return x, status, iterations
+
+# x0 - начальная точка (её размерность задаёт число переменных),
+# coeffs_obj - коэффициенты целевой функции (см. quadratic_terms),
+# coeffs_con - коэффициенты ограничений A x <= b (см. linear_constraints),
+# type - "minimize" или "maximize". В истории - точки итераций решателя
+def optimize(x0, coeffs_obj, coeffs_con, type, callback=None, nonnegative=True):
+    H, g = quadratic_terms(coeffs_obj)
+    A, b = linear_constraints(coeffs_con, len(g))
+    # Максимум f - минимум -f
+    sign = 1.0 if type == "minimize" else -1.0
+    _, _, success, solver_message, points = solve_qp(sign * H, sign * g, A, b, x0, nonnegative)
+
+    history = History(capacity=len(points), callback=callback)
+    for iteration, point in enumerate(points):
+        history.append(iteration, point, 0.5 * point @ H @ point + g @ point, grad_norm=np.nan)
+
+    if not success:
+        return history, False, "Минимум функции не найден. Сообщение программы: "+solver_message if type=="minimize" else "Максимум функции не найден. Сообщение программы: "+solver_message
     else:
-        return [{
-                'iteration': "Final",
-                'x': result.x[0],
-                'y': result.x[1],
-                'f_value': f_value,
-                'grad_norm': np.nan
-        }
-        ], True, "Минимум функции найден. Сообщение программы: "+result.message if type=="minimize" else "Максимум функции найден. Сообщение программы: "+result.message
\ No newline at end of file
+        return history, True, "Минимум функции найден. Сообщение программы: "+solver_message if type=="minimize" else "Максимум функции найден. Сообщение программы: "+solver_message
+
+# Пакет из K задач одной формы: коэффициенты складываются по первой оси
+# (x0 (K, n), целевая функция (K, 5) или Q (K, n, n), c (K, n), ограничения (K, m, n+1)).
+# Общие для всех задач части можно передать без оси K - они не копируются
+# (если оси K нет ни у одной части, пакет состоит из одной задачи).
+# max_workers - число процессов пула (по умолчанию пакет решается в текущем процессе).
+# Возвращает словарь массивов: 'position' (K, n), 'f_value' (K,), 'status' (K,) - коды
+# SUCCESS, MAX_ITERATIONS, DIVERGED, FAILED, 'converged' (K,) и 'iterations' (K,)
+def optimize_batch(x0, coeffs_obj, coeffs_con, type="minimize", nonnegative=True, warm_start=True, max_workers=None):
+    H, g = quadratic_terms(coeffs_obj)
+    n = g.shape[-1]
+    A, b = linear_constraints(coeffs_con, n)
+    x0 = np.asarray(x0, dtype=float)
+    batch = np.broadcast_shapes(H.shape[:-2], g.shape[:-1], A.shape[:-2], b.shape[:-1], x0.shape[:-1])
+    if len(batch) > 1:
+        raise ValueError(f"Пакет задач должен иметь одну ось K, получена форма {batch}")
+    # Без оси K у всех частей - пакет из одной задачи
+    count = batch[0] if batch else 1
+    H, g = np.broadcast_to(H, (count, n, n)), np.broadcast_to(g, (count, n))
+    A, b = np.broadcast_to(A, (count,) + A.shape[-2:]), np.broadcast_to(b, (count, b.shape[-1]))
+    x0 = np.broadcast_to(x0, (count, n))
+    # Максимум f - минимум -f
+    sign = 1.0 if type == "minimize" else -1.0
+
+    if max_workers is None or max_workers <= 1 or count < 2:
+        x, status, iterations = _solve_batch(sign * H, sign * g, A, b, x0, nonnegative, warm_start)
+    else:
+        chunks = np.array_split(np.arange(count), min(max_workers, count))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_solve_batch, sign * H[c], sign * g[c], A[c], b[c], x0[c], nonnegative, warm_start) for c in chunks]
+            results = [future.result() for future in futures]
+        x, status, iterations = (np.concatenate(parts) for parts in zip(*results))
+
+    return {
+        'position': x,
+        'f_value': 0.5 * np.einsum('ki,kij,kj->k', x, H, x) + np.einsum('ki,ki->k', g, x),
+        'status': status,
+        'converged': status == SUCCESS,
+        'iterations': iterations
+    }
@@ -0,0 +1,64 @@
+import numpy as np
+from .objective import Objective
+
+# Пошаговый режим методов. iterate(...) каждого метода - генератор, который после
+# каждой итерации отдаёт состояние (см. state) и по завершении возвращает
+# (converged, message) как значение StopIteration. optimize(...) собирает эти
+# состояния в History через collect. Генератор можно прервать в любой момент
+# (достаточно перестать его перебирать), а без записи истории память не растёт
+# с числом итераций. GA и PSO принимают через send((positions, values)) мигрантов,
+# которые заменяют худших особей (островная модель, methods.islands)
+
+
+# Минимальная обёртка функции, которая только считает вычисленные точки
+# (без замера времени Objective - для дешёвых функций он заметно дороже самой функции).
+# Число точек берётся по размеру результата: векторизованная функция возвращает
+# массив формы координат, а вызов с числами - одно значение
+class Counter:
+    __slots__ = ('func', 'evaluations')
+
+    def __init__(self, func):
+        self.func = func
+        self.evaluations = 0
+
+    def __call__(self, *coords):
+        result = self.func(*coords)
+        self.evaluations += getattr(result, 'size', 1)
+        return result
+
+
+# Функция с подсчётом вычислений: с критериями остановки - их обёртка
+# (Termination.start), иначе Counter (уже обёрнутая функция не оборачивается повторно)
+def counted(func, termination=None):
+    if termination is not None:
+        return termination.start(func)
+    return func if isinstance(func, (Objective, Counter)) else Counter(func)
+
+
+# Состояние после итерации: номер итерации, лучшая точка (копия), лучшее значение,
+# число вычислений функции с начала работы метода и, у популяционных методов,
+# текущая популяция (представление массива метода - действительно до следующего шага)
+# и значения функции в её точках (values, NaN - значение неизвестно).
+# Дополнительные поля (например, grad_norm) передаются через columns
+def state(iteration, position, f_value, evaluations, population=None, values=None, **columns):
+    return {
+        'iteration': iteration,
+        'position': np.array(position, dtype=float),
+        'f_value': f_value,
+        'evaluations': evaluations,
+        'population': population,
+        'values': values,
+        **columns
+    }
+
+
+# Перебор генератора iterate с записью каждого состояния в history.
+# columns - поля состояния, сохраняемые в истории как дополнительные колонки.
+# Возвращает значение, с которым завершился генератор
+def collect(steps, history, columns=()):
+    while True:
+        try:
+            current = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        history.append(current['iteration'], current['position'], current['f_value'], **{name: current[name] for name in columns})
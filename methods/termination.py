@@ -0,0 +1,67 @@
+import time
+import numpy as np
+from .objective import Objective
+
+# Общие критерии остановки для всех методов:
+# max_evaluations - бюджет вычислений целевой функции,
+# max_time - ограничение времени работы (сек),
+# target - целевое значение функции (остановка, как только лучшее значение не больше его),
+# stagnation - число итераций подряд, за которые лучшее значение улучшилось
+# не больше чем на tolerance.
+# Метод вызывает start(func) перед работой (функция оборачивается в Objective
+# для подсчёта вычислений) и check(best_value) после каждой итерации.
+# Бюджет и время проверяются между итерациями, поэтому последняя итерация
+# может немного превысить бюджет вычислений
+class Termination:
+    def __init__(self, max_evaluations=None, max_time=None, target=None, stagnation=None, tolerance=1e-12):
+        self.max_evaluations = max_evaluations
+        self.max_time = max_time
+        self.target = target
+        self.stagnation = stagnation
+        self.tolerance = tolerance
+
+        self.objective = None
+        self.reason = None      # сообщение о причине остановки
+        self.converged = False  # остановка по цели или по отсутствию улучшений
+
+    # Начало работы метода. Повторный вызов с уже обёрнутой функцией (например,
+    # второй этап гибридного метода) продолжает общий счёт вычислений и времени
+    def start(self, func):
+        if self.objective is not None and func is self.objective:
+            return func
+
+        self.objective = func if isinstance(func, Objective) else Objective(func)
+        self._start_evaluations = self.objective.evaluations
+        self._start_time = time.perf_counter()
+        self._best_value = np.inf
+        self._stagnant = 0
+        self.reason = None
+        self.converged = False
+        return self.objective
+
+    @property
+    def evaluations(self):
+        return self.objective.evaluations - self._start_evaluations
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start_time
+
+    # Проверка после итерации: возвращает сообщение о причине остановки или None
+    def check(self, best_value):
+        if best_value < self._best_value - self.tolerance:
+            self._stagnant = 0
+        else:
+            self._stagnant += 1
+        if best_value < self._best_value:
+            self._best_value = best_value
+
+        if self.target is not None and best_value <= self.target:
+            self.reason, self.converged = "Достигнуто целевое значение функции", True
+        elif self.stagnation is not None and self._stagnant >= self.stagnation:
+            self.reason, self.converged = f"Нет улучшения за {self.stagnation} итераций", True
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason, self.converged = "Исчерпан бюджет вычислений функции", False
+        elif self.max_time is not None and self.elapsed >= self.max_time:
+            self.reason, self.converged = "Превышено время работы", False
+        return self.reason
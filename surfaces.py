@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# LRU-кэш поверхностей для 3D-графика. Поверхность - сетка x (R,), y (R,)
+# и значения z (R, R); ключ составляется из имени функции, границ и разрешения.
+# Объём кэша ограничен в байтах: при переполнении вытесняются давно не использованные сетки
+class SurfaceCache:
+    def __init__(self, max_bytes=64 * 1024**2):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key, compute):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+
+        value = compute()
+        for array in value:
+            array.setflags(write=False)  # закэшированные массивы используются повторно
+        size = sum(array.nbytes for array in value)
+        if size <= self.max_bytes:
+            self._items[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, old = self._items.popitem(last=False)
+                self._bytes -= sum(array.nbytes for array in old)
+        return value
+
+    def clear(self):
+        self._items.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Значения функции на равномерной сетке resolution x resolution
+def evaluate_surface(func, x_range, y_range, resolution):
+    x = np.linspace(x_range[0], x_range[1], resolution)
+    y = np.linspace(y_range[0], y_range[1], resolution)
+    X, Y = np.meshgrid(x, y)
+    Z = np.broadcast_to(np.asarray(func(X, Y), dtype=float), X.shape).copy()
+    return x, y, Z
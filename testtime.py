@@ -1,165 +1,266 @@
-import numpy as np
+import argparse
+import csv
+import json
+import sys
 import time
-import matplotlib.pyplot as plt
-from methods.genetic_algorithm import optimize as ga_optimize
-from methods.particle_swarm import optimize as pso_optimize
+import tracemalloc
+import numpy as np
+from methods import gradient_descent, lbfgs, newton, conjugate_gradient, genetic_algorithm, particle_swarm, bee, immune, bacterial
 from methods.hybrid import hybrid_optimize
+from methods.objective import Objective
+from methods.termination import Termination
 from functions import functions
 
-# Конфигурация тестовых функций
-global_minima = {
-    "rosenbrock": ((1, 1), 0),
-    "himmelblau": ((3.0, 2.0), 0),
-    "isom": ((np.pi, np.pi), -1),
-    "sphere": ((0, 0), 0),
-    "rastrigin": ((0, 0), 0),
-    "bukin": ((-10, 1), 0)
+# Сравнительное тестирование методов в стиле COCO: каждый метод запускается
+# несколько раз на каждой функции из functions.py (N-мерные - в нескольких размерностях)
+# с общим бюджетом вычислений и целевым значением f_opt + precision.
+# Для каждой пары (метод, задача) считаются: доля успешных запусков, число вычислений
+# до цели, ERT (ожидаемое число вычислений до цели), время запусков (perf_counter,
+# среднее и процентили) и пиковая память. Результаты сохраняются в JSON и CSV.
+# Запуск: python testtime.py --runs 10 --dims 2 5 --out results/benchmark
+
+# Задачи: границы по каждой координате, известный минимум и допустимые размерности
+# (None - любая размерность)
+problems = {
+    "rosenbrock": {"bounds": (-5, 5), "f_opt": 0.0, "dims": None},
+    "rastrigin": {"bounds": (-5.12, 5.12), "f_opt": 0.0, "dims": None},
+    "sphere": {"bounds": (-5, 5), "f_opt": 0.0, "dims": None},
+    "himmelblau": {"bounds": (-5, 5), "f_opt": 0.0, "dims": [2]},
+    "isom": {"bounds": (0, 6), "f_opt": -1.0, "dims": [2]},
+    "bukin": {"bounds": [(-15, -5), (-3, 3)], "f_opt": 0.0, "dims": [2]},
+    "goldstein_price": {"bounds": (-2, 2), "f_opt": 3.0, "dims": [2]},
+    "cross_in_tray": {"bounds": (-10, 10), "f_opt": -2.06261187, "dims": [2]},
 }
 
-test_config = {
-    "rosenbrock": {"bounds": [(-5, 5), (-5, 5)]},
-    "himmelblau": {"bounds": [(-5, 5), (-5, 5)]},
-    "isom": {"bounds": [(0, 6), (0, 6)]},
-    "sphere": {"bounds": [(-5, 5), (-5, 5)]},
-    "rastrigin": {"bounds": [(-5.12, 5.12), (-5.12, 5.12)]},
-    "bukin": {"bounds": [(-15, -5), (-3, 3)]}
+
+# Параметры запуска методов. Каждая функция получает целевую функцию, имя функции
+# (для аналитического градиента), границы [[min, max], ...], бюджет вычислений,
+# генератор случайных чисел запуска и общие критерии остановки.
+# Симплекс-метод не участвует: он решает квадратичную задачу по коэффициентам,
+# а не минимизирует произвольную функцию
+def _start_point(bounds, rng):
+    bounds = np.array(bounds, dtype=float)
+    return rng.uniform(bounds[:, 0], bounds[:, 1])
+
+methods = {
+    "Gradient": lambda f, name, bounds, budget, rng, termination: gradient_descent.optimize(
+        f, _start_point(bounds, rng), learning_rate=0.01, epsilon1=1e-12, epsilon2=0, max_iter=budget, grad=name, termination=termination),
+    "L-BFGS": lambda f, name, bounds, budget, rng, termination: lbfgs.optimize(
+        f, _start_point(bounds, rng), epsilon1=1e-12, epsilon2=0, max_iter=budget, grad=name, termination=termination),
+    "Newton": lambda f, name, bounds, budget, rng, termination: newton.optimize(
+        f, _start_point(bounds, rng), epsilon1=1e-12, epsilon2=0, max_iter=budget, grad=name, termination=termination),
+    "CG": lambda f, name, bounds, budget, rng, termination: conjugate_gradient.optimize(
+        f, _start_point(bounds, rng), epsilon1=1e-12, epsilon2=0, max_iter=budget, grad=name, termination=termination),
+    "GA": lambda f, name, bounds, budget, rng, termination: genetic_algorithm.optimize(
+        f, bounds, population_size=50, max_iter=budget // 50 + 1, patience=budget, verbose=False, rng=rng, termination=termination),
+    "PSO": lambda f, name, bounds, budget, rng, termination: particle_swarm.optimize(
+        f, budget // 40 + 1, 40, np.array(bounds, dtype=float).T, 0.5, 2.0, 2.0, 10, verbose=False, rng=rng, termination=termination),
+    "Bee": lambda f, name, bounds, budget, rng, termination: bee.optimize(
+        f, budget // 65 + 1, 20, 5, 10, 3, 3, 0.1 * np.ptp(np.array(bounds, dtype=float)), 0.9, 10, 10,
+        bounds=bounds, verbose=False, rng=rng, termination=termination),
+    "Immune": lambda f, name, bounds, budget, rng, termination: immune.optimize(
+        f, budget // 30 + 1, 30, bounds=bounds, tolerance_steps=budget, rng=rng, termination=termination),
+    "Bacterial": lambda f, name, bounds, budget, rng, termination: bacterial.optimize(
+        f, bounds=bounds, population_count=50, n_chemotaxis=budget // 50 + 1, rng=rng, termination=termination),
+    "Hybrid": lambda f, name, bounds, budget, rng, termination: hybrid_optimize(
+        f, bounds, ga_population_size=50, ga_max_iter=budget // 100 + 1, pso_swarmsize=30, pso_max_iter=budget // 60 + 1,
+        rng=rng, termination=termination),
 }
 
-def compute_error(f, found_xy, global_min):
+
+# Целевая функция, запоминающая номер вычисления, на котором впервые достигнута цель
+class TargetObjective(Objective):
+    def __init__(self, func, target):
+        super().__init__(func)
+        self.target = target
+        self.hit = None  # число вычислений до цели (None - цель не достигнута)
+
+    def __call__(self, *coords):
+        before = self.evaluations
+        result = super().__call__(*coords)
+        if self.hit is None:
+            hits = np.flatnonzero(np.ravel(result) <= self.target)
+            if len(hits):
+                self.hit = before + int(hits[0]) + 1
+        return result
+
+
+def problem_bounds(function_name, dimension):
+    bounds = problems[function_name]["bounds"]
+    if isinstance(bounds, tuple):
+        return [list(bounds)] * dimension
+    return [list(b) for b in bounds]
+
+
+# Один запуск метода: число вычислений до цели, всего вычислений, время и лучшее значение.
+# Ошибка метода записывается в результат запуска (strict=True - пробрасывается дальше)
+def run_once(method_name, function_name, dimension, budget, precision, seed, strict=False):
+    target = problems[function_name]["f_opt"] + precision
+    objective = TargetObjective(functions(function_name), target)
+    termination = Termination(max_evaluations=budget, target=target)
+    rng = np.random.default_rng(seed)
+
+    run = {'seed': seed, 'error': None}
+    start_time = time.perf_counter()
     try:
-        if any(np.isnan(found_xy)) or any(np.isinf(found_xy)):
-            return np.inf
-        
-        calculated = f(*found_xy)
-        
-        if np.isnan(calculated) or np.isinf(calculated):
-            return np.inf
-            
-        return abs(calculated - global_min)
-    except:
-        return np.inf
-
-def run_experiment(function_name, bounds, n_runs=10):
-    f = functions(function_name)
-    true_min, true_f = global_minima[function_name]
-
-    results = {}
-    for method_name, method in {
-        'GA': ga_optimize,
-        'PSO': pso_optimize,
-        'Hybrid': hybrid_optimize,
-    }.items():
-        times = []
-        errors = []
-        for _ in range(n_runs):
-            try:
-                t0 = time.time()
-                if method_name == 'GA':
-                    history, _, _, _ = method(
-                        objective_func=f,
-                        bounds=bounds,
-                        population_size=50,
-                        max_iter=100,
-                        verbose=False
-                    )
-                    best = min(history, key=lambda h: h['f_value'])
-                elif method_name == 'PSO':
-                    history, _, _ = method(
-                        func=f,
-                        maxIter=100,
-                        swarmsize=50,
-                        bounds=bounds,
-                        currentVelocityRatio=0.5,
-                        localVelocityRatio=2.0,
-                        globalVelocityRatio=2.0,
-                        penaltyRatio=10,
-                        verbose=False
-                    )
-                    best = min(history, key=lambda h: h['f_value'])
-                else:
-                    history, _, _ = method(
-                        func=f,
-                        bounds=bounds,
-                        ga_population_size=50,
-                        ga_max_iter=30,
-                        pso_swarmsize=30,
-                        pso_max_iter=30,
-                        pso_current_velocity=0.5,
-                        pso_local_ratio=2.0,
-                        pso_global_ratio=2.0,
-                        pso_penalty=10,
-                    )
-                    best = min(history, key=lambda h: h['f_value'])
-                
-                t1 = time.time()
-                error = compute_error(f, (best['x'], best['y']), true_f)
-                
-                if np.isnan(error) or np.isinf(error):
-                    error = np.inf
-                
-                times.append(t1-t0)
-                errors.append(error)
-                
-            except Exception as e:
-                print(f"Ошибка в {method_name}: {str(e)}")
-                errors.append(np.inf)
-                times.append(np.inf)
-        
-        clean_errors = [e for e in errors if np.isfinite(e)]
-        clean_times = [t for t in times if np.isfinite(t)]
-        
-        mean_time = np.mean(clean_times) if clean_times else np.inf
-        std_time = np.std(clean_times) if clean_times else 0
-        mean_error = np.mean(clean_errors) if clean_errors else np.inf
-        std_error = np.std(clean_errors) if clean_errors else 0
-        
-        results[method_name] = {
-            "mean_time": mean_time,
-            "mean_error": mean_error,
-        }
-    return results
-
-def plot_function_results(results, function_name):
-    methods = list(results.keys())
-    times = [res['mean_time'] for res in results.values()]
-    errors = [res['mean_error'] for res in results.values()]
-
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    
-    # График времени выполнения
-    bars = ax1.bar(methods, times, color=['#2ecc71', '#3498db', '#9b59b6'])
-    ax1.set_title(f'Среднее время выполнения\n({function_name})')
-    ax1.set_ylabel('Секунды')
-    ax1.bar_label(bars, fmt='%.3f', padding=3)
-    
-    # График ошибок
-    bars = ax2.bar(methods, errors, color=['#e74c3c', '#f1c40f', '#34495e'])
-    ax2.set_title(f'Средняя ошибка\n({function_name})')
-    ax2.set_ylabel('Ошибка (log scale)')
-    ax2.set_yscale('log')
-    ax2.bar_label(bars, fmt='%.2e', padding=3)
-    
-    plt.tight_layout()
-    plt.show()
-
-def run_comparative_study(n_runs=10):
-    all_results = {}
-    
-    for func_name in test_config.keys():
-        print(f"\n=== Тестирование функции {func_name.upper()} ===")
-        bounds = test_config[func_name]["bounds"]
-        results = run_experiment(func_name, bounds, n_runs)
-        all_results[func_name] = results
-        plot_function_results(results, func_name)
-    
-    # Сводная таблица результатов
-    print("\n=== ИТОГОВЫЕ РЕЗУЛЬТАТЫ ===")
-    for func_name in test_config.keys():
-        print(f"\nФункция: {func_name}")
-        for method, res in all_results[func_name].items():
-            print(f"{method}:")
-            print(f"  Время: {res['mean_time']:.4f} сек")
-            print(f"  Ошибка: {res['mean_error']:.4e}")
+        # Переполнения и NaN за пределами области - часть поведения метода, а не ошибка
+        with np.errstate(all='ignore'):
+            history = methods[method_name](objective, function_name, problem_bounds(function_name, dimension), budget, rng, termination)[0]
+        best = history.best()
+        run['best_value'] = float(best['f_value']) if best is not None else None
+    except Exception as e:
+        if strict:
+            raise
+        run['best_value'] = None
+        run['error'] = f"{type(e).__name__}: {e}"
+        print(f"Ошибка: {method_name}, {function_name} ({dimension}D), seed={seed}: {run['error']}", file=sys.stderr)
+    run['time'] = time.perf_counter() - start_time
+    run['evaluations'] = objective.evaluations
+    run['evaluations_to_target'] = objective.hit
+    run['success'] = objective.hit is not None and objective.hit <= budget
+    return run
+
+
+# Пиковая память (МБ) одного запуска; измеряется отдельным запуском,
+# чтобы трассировка памяти не искажала время основных запусков
+def peak_memory(method_name, function_name, dimension, budget, precision, seed):
+    tracemalloc.start()
+    try:
+        run_once(method_name, function_name, dimension, budget, precision, seed)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+# Сводка по запускам одной пары (метод, задача)
+def summarize(runs, budget):
+    successes = [run for run in runs if run['success']]
+    times = np.array([run['time'] for run in runs])
+    # ERT: все вычисления неуспешных запусков плюс вычисления до цели успешных, делённые на число успехов
+    spent = sum(run['evaluations_to_target'] if run['success'] else run['evaluations'] for run in runs)
+    to_target = [run['evaluations_to_target'] for run in successes]
+    best_values = [run['best_value'] for run in runs if run['best_value'] is not None]
+    return {
+        'runs': len(runs),
+        'errors': sum(run['error'] is not None for run in runs),
+        'success_rate': len(successes) / len(runs),
+        'ert': spent / len(successes) if successes else np.inf,
+        'median_evaluations_to_target': float(np.median(to_target)) if to_target else None,
+        'median_best_value': float(np.median(best_values)) if best_values else None,
+        'mean_time': float(times.mean()),
+        'time_p10': float(np.percentile(times, 10)),
+        'time_p50': float(np.percentile(times, 50)),
+        'time_p90': float(np.percentile(times, 90)),
+        'budget': budget,
+    }
+
+
+def run_benchmark(method_names=None, function_names=None, dimensions=(2, 5, 10), n_runs=10, budget_per_dim=1000, precision=1e-4, seed=0, memory=True, strict=False, verbose=True):
+    method_names = method_names or list(methods)
+    function_names = function_names or list(problems)
+
+    results = []
+    for function_name in function_names:
+        allowed = problems[function_name]["dims"]
+        for dimension in dimensions:
+            if allowed is not None and dimension not in allowed:
+                continue
+            budget = budget_per_dim * dimension
+            # Одинаковые зёрна для всех методов на одной задаче
+            seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence([seed, dimension, list(problems).index(function_name)]).spawn(n_runs)]
+            for method_name in method_names:
+                runs = [run_once(method_name, function_name, dimension, budget, precision, s, strict) for s in seeds]
+                summary = summarize(runs, budget)
+                if memory:
+                    summary['peak_memory_mb'] = peak_memory(method_name, function_name, dimension, budget, precision, seeds[0])
+                results.append({'method': method_name, 'function': function_name, 'dimension': dimension, 'summary': summary, 'runs': runs})
+                if verbose:
+                    print(f"{function_name:>16} {dimension:>3}D {method_name:>10}: успех {summary['success_rate']:.0%}, "
+                          f"ERT {summary['ert']:.0f}, время p50 {summary['time_p50']:.4f} сек")
+
+    config = {
+        'methods': method_names, 'functions': function_names, 'dimensions': list(dimensions), 'runs': n_runs,
+        'budget_per_dim': budget_per_dim, 'precision': precision, 'seed': seed,
+        'numpy': np.__version__, 'python': sys.version.split()[0], 'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    return {'config': config, 'results': results}
+
+
+# Бесконечности (ERT без успехов) в JSON записываются строкой "inf"
+def write_json(benchmark, path):
+    def default(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Нельзя сохранить {type(value)} в JSON")
+
+    def clean(value):
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [clean(v) for v in value]
+        if isinstance(value, float) and not np.isfinite(value):
+            return str(value)
+        return value
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(clean(benchmark), file, ensure_ascii=False, indent=2, default=default)
+
+# Сводная таблица: одна строка на пару (метод, задача)
+def write_csv(benchmark, path):
+    rows = [{'method': r['method'], 'function': r['function'], 'dimension': r['dimension'], **r['summary']} for r in benchmark['results']]
+    if not rows:
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+# Графики ERT и доли успехов по задачам (сохраняются в файлы, без окна)
+def plot_results(benchmark, prefix):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    problems_done = sorted({(r['function'], r['dimension']) for r in benchmark['results']})
+    for function_name, dimension in problems_done:
+        entries = [r for r in benchmark['results'] if r['function'] == function_name and r['dimension'] == dimension]
+        names = [r['method'] for r in entries]
+        ert = [r['summary']['ert'] if np.isfinite(r['summary']['ert']) else np.nan for r in entries]
+        success = [r['summary']['success_rate'] for r in entries]
+
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+        ax1.bar(names, ert)
+        ax1.set_title(f'ERT (вычислений до цели)\n({function_name}, {dimension}D)')
+        ax1.set_yscale('log')
+        ax1.tick_params(axis='x', rotation=45)
+        ax2.bar(names, success)
+        ax2.set_title(f'Доля успешных запусков\n({function_name}, {dimension}D)')
+        ax2.set_ylim(0, 1)
+        ax2.tick_params(axis='x', rotation=45)
+        fig.tight_layout()
+        fig.savefig(f"{prefix}_{function_name}_{dimension}d.png")
+        plt.close(fig)
+
 
 if __name__ == "__main__":
-    run_comparative_study(n_runs=10)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Сравнительное тестирование методов оптимизации")
+    parser.add_argument('--methods', nargs='+', choices=list(methods), help="методы (по умолчанию все)")
+    parser.add_argument('--functions', nargs='+', choices=list(problems), help="функции (по умолчанию все)")
+    parser.add_argument('--dims', nargs='+', type=int, default=[2, 5, 10], help="размерности N-мерных функций")
+    parser.add_argument('--runs', type=int, default=10, help="запусков на пару (метод, задача)")
+    parser.add_argument('--budget', type=int, default=1000, help="бюджет вычислений на одну размерность")
+    parser.add_argument('--precision', type=float, default=1e-4, help="цель: f_opt + precision")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="не измерять пиковую память")
+    parser.add_argument('--strict', action='store_true', help="прерывать тестирование при ошибке метода")
+    parser.add_argument('--plot', action='store_true', help="сохранить графики PNG")
+    parser.add_argument('--out', default='benchmark', help="префикс файлов результатов")
+    args = parser.parse_args()
+
+    benchmark = run_benchmark(args.methods, args.functions, args.dims, args.runs, args.budget, args.precision,
+                              args.seed, memory=not args.no_memory, strict=args.strict)
+    write_json(benchmark, f"{args.out}.json")
+    write_csv(benchmark, f"{args.out}.csv")
+    if args.plot:
+        plot_results(benchmark, args.out)
+    print(f"Результаты сохранены: {args.out}.json, {args.out}.csv")